@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import WelcomeSection from './components/WelcomeSection';
 import FormSection from './components/FormSection';
@@ -10,30 +10,98 @@ const API_BASE_URL = 'http://localhost:5000';
 function App() {
   const [currentSection, setCurrentSection] = useState('welcome');
   const [agents, setAgents] = useState([]);
+  // Cursor of the next page of agents, null once the whole list is shown
+  const [agentsCursor, setAgentsCursor] = useState(null);
   const [loading, setLoading] = useState(false);
   const [createdAgent, setCreatedAgent] = useState(null);
+  const [loadingMessage, setLoadingMessage] = useState('');
+  const [loadingProgress, setLoadingProgress] = useState('');
+  // Session prepared on the server while the form is being filled in (null until the user starts typing)
+  const prepareToken = useRef(null);
 
   useEffect(() => {
     fetchAgents();
   }, []);
 
-  const fetchAgents = async () => {
+  const fetchAgents = async (after = null) => {
+    // The listing is paginated: the first page, or the page after the agents shown already
     try {
-      const response = await axios.get(`${API_BASE_URL}/api/agents`);
+      const response = await axios.get(`${API_BASE_URL}/api/agents`, { params: after ? { after } : {} });
       if (response.data.success) {
-        setAgents(response.data.agents);
+        setAgents((shown) => (after ? [...shown, ...response.data.agents] : response.data.agents));
+        setAgentsCursor(response.data.has_more ? response.data.next_cursor : null);
       }
     } catch (error) {
       console.error('Error fetching agents:', error);
     }
   };
 
+  const waitForJob = (jobId) => {
+    // Agent generation runs as a background job; follow its progress events until it finishes
+    let tokenCount = 0;
+    return new Promise((resolve, reject) => {
+      const events = new EventSource(`${API_BASE_URL}/api/jobs/${jobId}/events`);
+
+      events.onerror = () => {
+        // EventSource reconnects on its own unless the server rejected the stream
+        if (events.readyState === EventSource.CLOSED) {
+          reject(new Error('Lost connection to the server'));
+        }
+      };
+      events.addEventListener('phase', (event) => {
+        const phase = JSON.parse(event.data).name;
+        setLoadingMessage({
+          warming_up: 'Waiting for the server to finish starting...',
+          generating: 'Generating your agent...',
+          post_processing: 'Adding custom tools...',
+          saving: 'Saving your agent...'
+        }[phase] || 'Creating your agent...');
+      });
+      events.addEventListener('tool_start', (event) => {
+        setLoadingProgress(`Running tool: ${JSON.parse(event.data).name}`);
+      });
+      events.addEventListener('token', () => {
+        tokenCount++;
+        setLoadingProgress(`Received ${tokenCount} chunks from the model`);
+      });
+      events.addEventListener('done', (event) => {
+        events.close();
+        resolve(JSON.parse(event.data).result);
+      });
+      events.addEventListener('failed', (event) => {
+        events.close();
+        reject(new Error(JSON.parse(event.data).error || 'Agent creation failed'));
+      });
+    });
+  };
+
+  const prepareSession = async () => {
+    // Let the server fetch the documentation the generation needs while the user is still typing
+    if (prepareToken.current !== null) {
+      return;
+    }
+    prepareToken.current = '';
+    try {
+      const response = await axios.post(`${API_BASE_URL}/api/prepare`, {});
+      prepareToken.current = response.data.session.token;
+    } catch (error) {
+      // Only an optimization; the agent is still created without it
+      console.warn('Could not prepare session:', error);
+    }
+  };
+
   const createAgent = async (agentData) => {
     setLoading(true);
+    setLoadingMessage('');
+    setLoadingProgress('');
     try {
-      const response = await axios.post(`${API_BASE_URL}/api/create-agent`, agentData);
+      const response = await axios.post(`${API_BASE_URL}/api/create-agent`, {
+        ...agentData,
+        ...(prepareToken.current ? { prepareToken: prepareToken.current } : {})
+      });
       if (response.data.success) {
-        setCreatedAgent(response.data.agent);
+        const agent = await waitForJob(response.data.job.id);
+        setCreatedAgent(agent);
         setCurrentSection('success');
         fetchAgents();
       }
@@ -51,6 +119,7 @@ function App() {
   };
 
   const showForm = () => {
+    prepareToken.current = null;
     setCurrentSection('form');
   };
 
@@ -65,6 +134,8 @@ function App() {
         {currentSection === 'welcome' && (
           <WelcomeSection 
             agents={agents} 
+            hasMore={agentsCursor !== null}
+            onLoadMore={() => fetchAgents(agentsCursor)}
             onCreateAgent={showForm}
           />
         )}
@@ -73,6 +144,7 @@ function App() {
           <FormSection 
             onSubmit={createAgent}
             onCancel={showWelcome}
+            onPrepare={prepareSession}
           />
         )}
         
@@ -88,7 +160,7 @@ function App() {
         <p>&copy; 2025 KTern.AI Agent Creator | Powered by Strands Framework</p>
       </footer>
 
-      {loading && <LoadingOverlay />}
+      {loading && <LoadingOverlay message={loadingMessage} progress={loadingProgress} />}
     </div>
   );
 }
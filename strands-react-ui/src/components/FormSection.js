@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
 
-const FormSection = ({ onSubmit, onCancel }) => {
+const FormSection = ({ onSubmit, onCancel, onPrepare }) => {
   const [agentName, setAgentName] = useState('');
   const [agentDescription, setAgentDescription] = useState('');
   const [standardTools, setStandardTools] = useState([]);
@@ -51,7 +51,10 @@ const FormSection = ({ onSubmit, onCancel }) => {
             type="text"
             id="agent-name"
             value={agentName}
-            onChange={(e) => setAgentName(e.target.value)}
+            onChange={(e) => {
+              setAgentName(e.target.value);
+              onPrepare();
+            }}
             placeholder="Enter agent name"
             required
           />
@@ -62,7 +65,10 @@ const FormSection = ({ onSubmit, onCancel }) => {
           <textarea
             id="agent-description"
             value={agentDescription}
-            onChange={(e) => setAgentDescription(e.target.value)}
+            onChange={(e) => {
+              setAgentDescription(e.target.value);
+              onPrepare();
+            }}
             placeholder="Describe what your agent does"
             required
           />
@@ -1,10 +1,11 @@
 import React from 'react';
 
-const LoadingOverlay = () => {
+const LoadingOverlay = ({ message, progress }) => {
   return (
     <div className="loading-overlay">
       <div className="spinner"></div>
-      <p>Creating your agent...</p>
+      <p>{message || 'Creating your agent...'}</p>
+      {progress && <p className="loading-progress">{progress}</p>}
     </div>
   );
 };
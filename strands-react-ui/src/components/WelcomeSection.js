@@ -1,6 +1,6 @@
 import React from 'react';
 
-const WelcomeSection = ({ agents, onCreateAgent }) => {
+const WelcomeSection = ({ agents, hasMore, onLoadMore, onCreateAgent }) => {
   return (
     <div className="welcome-section">
       <h2>Welcome to KTern.AI Agent Creator</h2>
@@ -30,6 +30,11 @@ const WelcomeSection = ({ agents, onCreateAgent }) => {
               </div>
             ))}
           </div>
+          {hasMore && (
+            <button className="load-more-btn" onClick={onLoadMore}>
+              Load more agents
+            </button>
+          )}
         </>
       )}
       
@@ -0,0 +1,311 @@
+import ast
+import builtins
+import logging
+import sys
+import textwrap
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_agent_editor")
+
+# Names the generated @tool methods rely on, and where they are imported from
+TOOL_METHOD_IMPORTS = {'tool': 'strands', 'Dict': 'typing', 'Any': 'typing'}
+
+
+class AgentEditError(Exception):
+    """Raised when an agent file cannot be edited, e.g. because it has no agent class or does not compile."""
+
+
+def _is_tool_decorator(node) -> bool:
+    """Check whether a decorator is Strands' @tool, written as tool, tool(...), strands.tool or strands.tool(...)."""
+    if isinstance(node, ast.Call):
+        node = node.func
+    return (isinstance(node, ast.Name) and node.id == 'tool') or (isinstance(node, ast.Attribute) and node.attr == 'tool')
+
+
+def _is_method_ref(node) -> bool:
+    """Check whether a node is a self.<name> reference."""
+    return isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 'self'
+
+
+def _parse(source: str, filename: str = '<agent>') -> ast.Module:
+    try:
+        return ast.parse(source, filename)
+    except SyntaxError as e:
+        raise AgentEditError(f"Agent file does not parse: {str(e)}")
+
+
+def _creates_agent(class_node: ast.ClassDef) -> bool:
+    """Check whether a class constructs a Strands Agent(...) somewhere in its body."""
+    return any(isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'Agent'
+               for node in ast.walk(class_node))
+
+
+def find_agent_class(tree: ast.Module) -> ast.ClassDef:
+    """
+    Return the class an agent's tool methods belong to: the first top-level class with an @tool method,
+    else the first that creates an Agent(...), else the first named *Agent, else the first class.
+
+    Raises:
+        AgentEditError: If the module has no top-level class
+    """
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    if not classes:
+        raise AgentEditError("Agent file has no class to hold tool methods")
+    for matches in (tool_methods, _creates_agent, lambda node: node.name.endswith('Agent')):
+        for node in classes:
+            if matches(node):
+                return node
+    return classes[0]
+
+
+def tool_methods(class_node: ast.ClassDef) -> dict:
+    """Return the @tool method nodes of a class by name."""
+    return {node.name: node for node in class_node.body
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and any(_is_tool_decorator(decorator) for decorator in node.decorator_list)}
+
+
+def list_tool_methods(source: str) -> list:
+    """Return the names of the @tool methods of an agent file's agent class."""
+    return list(tool_methods(find_agent_class(_parse(source))))
+
+
+def _function_name(code: str) -> str:
+    """Return the name of the function defined by method source."""
+    tree = _parse(textwrap.dedent(code))
+    return next(node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)))
+
+
+def _unbound_names(code: str, defined: set) -> set:
+    """Return the names method source reads without binding them itself, as builtins or in `defined`."""
+    tree = _parse(textwrap.dedent(code))
+    local = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            local.add(node.id)
+        elif isinstance(node, ast.arguments):
+            local.update(arg.arg for arg in node.posonlyargs + node.args + node.kwonlyargs + [node.vararg, node.kwarg] if arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            local.update((alias.asname or alias.name).split('.')[0] for alias in node.names)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            local.add(node.name)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            local.add(node.name)
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+            and node.id not in local and node.id not in defined and not hasattr(builtins, node.id)}
+
+
+class AgentModule:
+    """
+    A generated agent module, parsed once, with queued edits to its @tool methods and imports.
+
+    Methods and imports are located with the ast module rather than by searching the text, so strings,
+    comments, decorators and further classes do not confuse the edit. Every edit replaces a span of the
+    original source; render() applies them all in one pass and checks that the result compiles.
+    """
+
+    def __init__(self, source: str, filename: str = '<agent>'):
+        """
+        Parse an agent module.
+
+        Args:
+            source (str): The module's source
+            filename (str, optional): Shown in error messages
+
+        Raises:
+            AgentEditError: If the source does not parse
+        """
+        self.source = source if source.endswith('\n') else source + '\n'
+        self.filename = filename
+        self.tree = _parse(self.source, filename)
+        self._lines = self.source.splitlines(keepends=True)
+        self._line_starts = [0]
+        for line in self._lines:
+            self._line_starts.append(self._line_starts[-1] + len(line))
+        self._class = None
+        self._edits = []
+        self._added = []
+        self._removed = set()
+        self._new_code = []
+
+    @property
+    def agent_class(self) -> ast.ClassDef:
+        """The class holding the agent's @tool methods (see find_agent_class)."""
+        if self._class is None:
+            self._class = find_agent_class(self.tree)
+        return self._class
+
+    def tool_methods(self) -> list:
+        """Return the names of the agent class's @tool methods."""
+        return list(tool_methods(self.agent_class))
+
+    def _offset(self, lineno: int, col_offset: int) -> int:
+        """Turn an ast position (1-based line, UTF-8 byte column) into an index into the source."""
+        return self._line_starts[lineno - 1] + len(self._lines[lineno - 1].encode('utf-8')[:col_offset].decode('utf-8'))
+
+    def _method_span(self, node) -> tuple:
+        """Source span of a method, including its decorators and one preceding blank line."""
+        first = min([decorator.lineno for decorator in node.decorator_list] + [node.lineno])
+        if first > 1 and not self._lines[first - 2].strip():
+            first -= 1
+        return self._line_starts[first - 1], self._line_starts[node.end_lineno]
+
+    def _method_text(self, code: str) -> str:
+        """Re-indent method source to the class body's indentation, preceded by a blank line."""
+        indent = ' ' * self.agent_class.body[0].col_offset
+        return '\n' + textwrap.indent(textwrap.dedent(code).strip('\n'), indent) + '\n'
+
+    def replace_method(self, name: str, code: str):
+        """Replace an @tool method with new source (decorator included), or add it if there is none by that name."""
+        node = tool_methods(self.agent_class).get(name)
+        if node is None:
+            self.add_method(code)
+            return
+        start, end = self._method_span(node)
+        self._edits.append((start, end, self._method_text(code)))
+        self._new_code.append(code)
+
+    def remove_method(self, name: str):
+        """Delete an @tool method; unknown names are ignored."""
+        node = tool_methods(self.agent_class).get(name)
+        if node is not None:
+            self._edits.append((*self._method_span(node), ''))
+            self._removed.add(name)
+
+    def add_method(self, code: str):
+        """Append a method to the end of the agent class."""
+        end = self._line_starts[self.agent_class.end_lineno]
+        self._edits.append((end, end, self._method_text(code)))
+        self._added.append(_function_name(code))
+        self._new_code.append(code)
+
+    def _registration_edit(self):
+        """
+        Keep the list the agent class passes as Agent(tools=[...]) in step with its @tool methods.
+
+        The list is recognised by holding self.<method> references to existing @tool methods; agents without
+        one (e.g. ones that collect their tools differently) are left alone.
+        """
+        if not self._added and not self._removed:
+            return
+        existing = tool_methods(self.agent_class)
+        for node in ast.walk(self.agent_class):
+            if isinstance(node, ast.List) and any(_is_method_ref(element) and element.attr in existing
+                                                  for element in node.elts):
+                break
+        else:
+            logger.info(f"No tools list with @tool methods found in {self.agent_class.name}, new tools are not registered")
+            return
+        elements = [ast.get_source_segment(self.source, element) for element in node.elts
+                    if not (_is_method_ref(element) and element.attr in self._removed)]
+        present = {element.attr for element in node.elts if _is_method_ref(element)}
+        elements += [f"self.{name}" for name in dict.fromkeys(self._added) if name not in present]
+        self._edits.append((self._offset(node.lineno, node.col_offset),
+                            self._offset(node.end_lineno, node.end_col_offset),
+                            '[' + ', '.join(elements) + ']'))
+
+    def _module_names(self) -> set:
+        """Names bound at module level by imports, definitions and assignments."""
+        names = set()
+        for node in self.tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                names.update((alias.asname or alias.name).split('.')[0] for alias in node.names)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(node.name)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                names.update(name.id for target in targets for name in ast.walk(target) if isinstance(name, ast.Name))
+        return names
+
+    def _import_edit(self):
+        """
+        Import the names the new methods use but the module does not define: those of the @tool method
+        template, and standard library modules referenced by bodies the model wrote (e.g. json without import json).
+        """
+        needed = {}
+        defined = self._module_names()
+        for code in self._new_code:
+            for name in _unbound_names(code, defined):
+                if name in TOOL_METHOD_IMPORTS:
+                    needed.setdefault(TOOL_METHOD_IMPORTS[name], set()).add(name)
+                elif name in sys.stdlib_module_names:
+                    needed.setdefault(None, set()).add(name)
+        if not needed:
+            return
+        lines = [f"import {name}\n" for name in sorted(needed.pop(None, ()))]
+        lines += [f"from {module} import {', '.join(sorted(names))}\n" for module, names in sorted(needed.items())]
+
+        # After the last top-level import, or after the module docstring when there is none
+        anchor = None
+        for index, node in enumerate(self.tree.body):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                anchor = node
+            elif (index == 0 and anchor is None and isinstance(node, ast.Expr)
+                  and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)):
+                anchor = node
+        position = self._line_starts[anchor.end_lineno] if anchor is not None else 0
+        self._edits.append((position, position, ''.join(lines)))
+        logger.info(f"Adding missing imports to {self.filename}: {'; '.join(line.strip() for line in lines)}")
+
+    def render(self) -> str:
+        """
+        Apply the queued edits and return the new source.
+
+        Returns:
+            str: The edited source, which is checked to compile
+
+        Raises:
+            AgentEditError: If the result does not compile
+        """
+        self._registration_edit()
+        self._import_edit()
+        parts = []
+        position = 0
+        # Stable sort keeps insertions at the same position in the order they were queued
+        for start, end, text in sorted(self._edits, key=lambda edit: edit[0]):
+            if start < position:
+                raise AgentEditError("Overlapping edits to the agent file")
+            parts.append(self.source[position:start])
+            parts.append(text)
+            position = end
+        parts.append(self.source[position:])
+        self._edits = []
+        result = ''.join(parts)
+        try:
+            compile(result, self.filename, 'exec', dont_inherit=True)
+        except (SyntaxError, ValueError) as e:
+            raise AgentEditError(f"Edited agent file does not compile: {str(e)}")
+        return result
+
+
+def splice_tool_methods(source: str, replace: dict = None, remove: list = None, add: list = None) -> str:
+    """
+    Edit the @tool methods of an agent file, leaving every other line untouched.
+
+    Args:
+        source (str): The agent module's source
+        replace (dict, optional): Method name to new method source (decorator included); a name that is not
+            an @tool method yet is added instead
+        remove (list, optional): Names of @tool methods to delete
+        add (list, optional): Sources of methods to append to the agent class
+
+    Returns:
+        str: The edited source, which is checked to compile
+
+    Raises:
+        AgentEditError: If the source or the result does not compile, or there is no agent class
+    """
+    module = AgentModule(source)
+    for name in remove or []:
+        module.remove_method(name)
+    for name, code in (replace or {}).items():
+        if name not in (remove or []):
+            module.replace_method(name, code)
+    for code in add or []:
+        module.add_method(code)
+    return module.render()
@@ -0,0 +1,144 @@
+import base64
+import json
+import re
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+# Fields clients may request from GET /api/agents
+AGENT_FIELDS = ('name', 'description', 'tools', 'status', 'created_at', 'updated_at')
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Indexes backing every filter/sort combination offered by the listing; the _id suffix makes sort order total
+AGENT_INDEXES = [
+    [('created_at', DESCENDING), ('_id', DESCENDING)],
+    [('status', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+    [('tools', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+    [('name', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]
+]
+
+
+class InvalidListingRequest(ValueError):
+    """Raised when listing parameters are malformed."""
+
+
+def encode_cursor(document: dict) -> str:
+    """Build the opaque cursor that resumes a listing after the given document."""
+    payload = json.dumps({'created_at': document['created_at'].isoformat(), 'id': str(document['_id'])})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor from encode_cursor() into (created_at, _id)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(payload['created_at']), ObjectId(payload['id'])
+    except Exception:
+        raise InvalidListingRequest("Invalid 'after' cursor")
+
+
+def parse_listing_args(args) -> dict:
+    """
+    Validate the query string of GET /api/agents.
+
+    Args:
+        args (MultiDict): The request query parameters
+
+    Returns:
+        dict: limit, after, fields, status, tool, name_prefix and order
+
+    Raises:
+        InvalidListingRequest: If a parameter is malformed
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise InvalidListingRequest("'limit' must be an integer")
+    if limit < 1:
+        raise InvalidListingRequest("'limit' must be positive")
+
+    fields = None
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in AGENT_FIELDS]
+        if unknown:
+            raise InvalidListingRequest(f"Unknown fields: {', '.join(unknown)}")
+
+    order = args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise InvalidListingRequest("'order' must be 'asc' or 'desc'")
+
+    return {
+        'limit': min(limit, MAX_LIMIT),
+        'after': decode_cursor(args['after']) if args.get('after') else None,
+        'fields': fields,
+        'status': args.get('status') or None,
+        'tool': args.get('tool') or None,
+        'name_prefix': args.get('name_prefix') or None,
+        'order': order
+    }
+
+
+def build_mongo_query(listing: dict) -> tuple:
+    """
+    Translate parsed listing parameters into a MongoDB filter, projection and sort.
+
+    Args:
+        listing (dict): Parameters from parse_listing_args()
+
+    Returns:
+        tuple: (filter, projection, sort)
+    """
+    query = {}
+    if listing['status']:
+        query['status'] = listing['status']
+    if listing['tool']:
+        query['tools'] = listing['tool']
+    if listing['name_prefix']:
+        # An anchored, case-sensitive prefix regex can use the name index
+        query['name'] = {'$regex': '^' + re.escape(listing['name_prefix'])}
+
+    direction = DESCENDING if listing['order'] == 'desc' else ASCENDING
+    if listing['after']:
+        created_at, last_id = listing['after']
+        op = '$lt' if direction == DESCENDING else '$gt'
+        query['$or'] = [
+            {'created_at': {op: created_at}},
+            {'created_at': created_at, '_id': {op: last_id}}
+        ]
+
+    # created_at and _id are always fetched because the next cursor is built from them
+    fields = listing['fields'] or AGENT_FIELDS
+    projection = {field: 1 for field in fields}
+    projection['created_at'] = 1
+
+    sort = [('created_at', direction), ('_id', direction)]
+    return query, projection, sort
+
+
+def shape_page(documents: list, listing: dict) -> dict:
+    """
+    Turn the documents fetched for a page (limit + 1 of them) into the response payload.
+
+    Args:
+        documents (list): Documents returned by the query, at most limit + 1
+        listing (dict): Parameters from parse_listing_args()
+
+    Returns:
+        dict: agents, next_cursor and has_more
+    """
+    has_more = len(documents) > listing['limit']
+    documents = documents[:listing['limit']]
+    next_cursor = encode_cursor(documents[-1]) if has_more else None
+
+    requested = listing['fields'] or AGENT_FIELDS
+    agents = [{field: document[field] for field in requested if field in document} for document in documents]
+    return {
+        'agents': agents,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
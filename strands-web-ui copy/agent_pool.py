@@ -0,0 +1,305 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from async_waiters import AsyncWaiters
+from strands_agent import StrandsAgent
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_agent_pool")
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no StrandsAgent instance becomes available before the checkout timeout."""
+
+
+class StrandsAgentPool:
+    """Pool of independent StrandsAgent instances that can run generations in parallel."""
+
+    def __init__(self, factory=StrandsAgent, min_size: int = 1, max_size: int = 4, checkout_timeout: float = 300.0,
+                 idle_timeout: float = 300.0):
+        """
+        Initialize the pool.
+
+        Args:
+            factory (callable): Creates a new StrandsAgent instance
+            min_size (int): Number of instances created by prewarm() and kept around
+            max_size (int): Maximum number of instances alive at the same time
+            checkout_timeout (float): Default seconds to wait for a free instance
+            idle_timeout (float): Seconds an instance beyond min_size may sit idle before it is closed, 0 to keep it
+        """
+        if min_size > max_size:
+            raise ValueError("min_size cannot be larger than max_size")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        # Idle instances, least recently used first, with the time each was returned
+        self._idle = []
+        self._idle_since = {}
+        self._size = 0
+        self._in_use = 0
+        self._evicted = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._async_waiters = AsyncWaiters()
+        self._stopped = threading.Event()
+        self._reaper = None
+        if idle_timeout > 0:
+            self._reaper = threading.Thread(target=self._reap_loop, name="agent-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _notify(self):
+        """Wake one waiting thread and every waiting coroutine after an instance or slot became free."""
+        self._condition.notify()
+        self._async_waiters.wake_all()
+
+    def prewarm(self):
+        """Create instances until the pool holds min_size of them."""
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            instance = self._create()
+            if instance is None:
+                return
+            with self._condition:
+                self._put_idle(instance)
+                self._notify()
+
+    def ensure_idle(self):
+        """Create an instance ahead of demand if none is idle and the pool has room, so the next checkout gets one."""
+        with self._condition:
+            if self._closed or self._idle or self._size >= self.max_size:
+                return
+            self._size += 1
+        instance = self._create()
+        if instance is None:
+            return
+        with self._condition:
+            self._put_idle(instance)
+            self._notify()
+
+    def _create(self):
+        """Create a new instance, releasing its reserved slot if construction fails."""
+        try:
+            instance = self.factory()
+            logger.info("Created new StrandsAgent instance for the pool")
+            return instance
+        except Exception as e:
+            logger.error(f"Failed to create StrandsAgent instance: {str(e)}")
+            with self._condition:
+                self._size -= 1
+                self._notify()
+            return None
+
+    def checkout(self, timeout: float = None) -> StrandsAgent:
+        """
+        Take an instance out of the pool; its conversation is prepared by the next generation
+        according to its context mode.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free instance, defaults to checkout_timeout
+
+        Returns:
+            StrandsAgent: An instance reserved for the caller
+
+        Raises:
+            PoolExhaustedError: If no instance becomes available in time
+            RuntimeError: If the pool has been closed or a new instance cannot be created
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            instance = None
+            create = False
+            with self._condition:
+                while not self._idle and self._size >= self.max_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhaustedError(f"No StrandsAgent available after {timeout:.0f}s")
+                    self._condition.wait(remaining)
+
+                if self._closed:
+                    raise RuntimeError("StrandsAgent pool is closed")
+
+                if self._idle:
+                    # Most recently used first, so idle instances beyond min_size age out and are reaped
+                    instance = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                instance = self._create()
+                if instance is None:
+                    raise RuntimeError("Failed to create StrandsAgent instance")
+
+            if self._reserve(instance):
+                return instance
+
+    async def checkout_async(self, timeout: float = None) -> StrandsAgent:
+        """
+        Like checkout(), but waits for a free instance without holding a thread; new instances are
+        created on a worker thread.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        wakeup = self._async_waiters.register()
+        try:
+            while True:
+                instance = None
+                create = False
+                with self._condition:
+                    if self._closed:
+                        raise RuntimeError("StrandsAgent pool is closed")
+                    if self._idle:
+                        instance = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                    else:
+                        wakeup.clear()
+
+                if instance is None and not create:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not await self._async_waiters.wait(wakeup, remaining):
+                        raise PoolExhaustedError(f"No StrandsAgent available after {timeout:.0f}s")
+                    continue
+
+                if create:
+                    instance = await asyncio.to_thread(self._create)
+                    if instance is None:
+                        raise RuntimeError("Failed to create StrandsAgent instance")
+
+                if self._reserve(instance):
+                    return instance
+        finally:
+            self._async_waiters.unregister(wakeup)
+
+    def _reserve(self, instance: StrandsAgent) -> bool:
+        """Mark a taken instance as in use, or evict it and return False if it is broken."""
+        try:
+            healthy = instance.is_healthy()
+        except Exception:
+            self.evict(instance, failed=True)
+            raise
+
+        if not healthy:
+            self.evict(instance, failed=True)
+            return False
+
+        with self._condition:
+            self._in_use += 1
+        return True
+
+    def checkin(self, instance: StrandsAgent):
+        """
+        Return an instance to the pool, evicting it if it is no longer healthy.
+
+        Args:
+            instance (StrandsAgent): An instance previously returned by checkout()
+        """
+        with self._condition:
+            self._in_use -= 1
+
+        if self._closed:
+            self.evict(instance)
+            return
+        if not instance.is_healthy():
+            self.evict(instance, failed=True)
+            return
+
+        with self._condition:
+            self._put_idle(instance)
+            self._notify()
+
+    def _put_idle(self, instance: StrandsAgent):
+        """Add an instance to the idle list; called with the condition held."""
+        self._idle.append(instance)
+        self._idle_since[instance] = time.monotonic()
+
+    def evict(self, instance: StrandsAgent, failed: bool = False):
+        """
+        Close an instance and free its slot in the pool.
+
+        Args:
+            instance (StrandsAgent): The instance to close
+            failed (bool): The instance is broken, as opposed to no longer needed
+        """
+        if failed:
+            logger.warning("Evicting broken StrandsAgent instance from the pool")
+        else:
+            logger.info("Closing StrandsAgent instance")
+        try:
+            instance.close()
+        except Exception as e:
+            logger.error(f"Error closing evicted StrandsAgent instance: {str(e)}")
+        with self._condition:
+            self._idle_since.pop(instance, None)
+            self._size -= 1
+            self._evicted += 1
+            self._notify()
+
+    def reap_idle(self):
+        """Close instances beyond min_size that have been idle for longer than idle_timeout."""
+        expired = []
+        with self._condition:
+            cutoff = time.monotonic() - self.idle_timeout
+            while (self._idle and self._size - len(expired) > self.min_size
+                   and self._idle_since.get(self._idle[0], 0) <= cutoff):
+                expired.append(self._idle.pop(0))
+        for instance in expired:
+            self.evict(instance)
+        if expired:
+            logger.info(f"Closed {len(expired)} StrandsAgent instance(s) idle for more than {self.idle_timeout:.0f}s")
+
+    def _reap_loop(self):
+        while not self._stopped.wait(max(self.idle_timeout / 2, 1.0)):
+            try:
+                self.reap_idle()
+            except Exception as e:
+                logger.error(f"Error closing idle StrandsAgent instances: {str(e)}")
+
+    @contextmanager
+    def agent(self, timeout: float = None):
+        """Context manager that checks an instance out and always checks it back in."""
+        instance = self.checkout(timeout)
+        try:
+            yield instance
+        finally:
+            self.checkin(instance)
+
+    def stats(self) -> dict:
+        """Return the current pool occupancy."""
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'evicted': self._evicted,
+                'min_size': self.min_size,
+                'max_size': self.max_size
+            }
+
+    def close(self):
+        """Close all idle instances; instances still checked out are closed on checkin."""
+        with self._condition:
+            self._closed = True
+            self._stopped.set()
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+            self._async_waiters.wake_all()
+        for instance in idle:
+            self.evict(instance)
+        logger.info("StrandsAgent pool closed")
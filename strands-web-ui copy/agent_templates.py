@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+
+from jinja2 import ChoiceLoader, Environment, FileSystemLoader, StrictUndefined, TemplateNotFound
+
+from strands_agent import MODEL_ID
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_agent_templates")
+
+# Templates shipped with the server; directories passed to TemplateLibrary are searched before it
+BUILTIN_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'agents')
+TEMPLATE_SUFFIX = '.py.j2'
+
+# How an agent's code is produced: 'llm' has the generator agent write all of it, 'template' renders it from
+# the template library without a model call, 'hybrid' renders it with tool method bodies written by the model
+GENERATION_MODES = ('llm', 'template', 'hybrid')
+
+# Tools from strands_tools that a generated agent can import directly; any other requested tool
+# becomes a @tool method on the agent class
+STRANDS_TOOLS = (
+    'calculator', 'current_time', 'editor', 'environment', 'file_read', 'file_write', 'http_request',
+    'image_reader', 'journal', 'python_repl', 'retrieve', 'shell', 'sleep', 'think', 'use_aws'
+)
+
+
+class TemplateNotFoundError(Exception):
+    """Raised when a request names a template the library does not have."""
+
+
+def python_identifier(text: str, fallback: str = 'tool') -> str:
+    """Turn free text into a snake_case Python identifier."""
+    identifier = re.sub(r'\W+', '_', text.strip().lower()).strip('_')
+    if not identifier:
+        return fallback
+    return f"{fallback}_{identifier}" if identifier[0].isdigit() else identifier
+
+
+def function_names(tool_names: list, taken=()) -> list:
+    """Return a distinct method name for each tool name, in order, adding _tool to names already taken."""
+    used = set(taken)
+    names = []
+    for tool_name in tool_names:
+        function_name = python_identifier(tool_name)
+        while function_name in used:
+            function_name += '_tool'
+        used.add(function_name)
+        names.append(function_name)
+    return names
+
+
+def class_name_for(agent_name: str) -> str:
+    """Return the CamelCase class name of the agent's generated class."""
+    name = ''.join(part[:1].upper() + part[1:] for part in re.split(r'\W+', agent_name) if part) or 'Generated'
+    if name[0].isdigit():
+        name = f"Agent{name}"
+    return name if name.endswith('Agent') else f"{name}Agent"
+
+
+def escape_docstring(text: str) -> str:
+    """
+    Escape text for use inside a triple-quoted docstring.
+
+    Every quote is escaped, not just triple quotes, so text that starts or ends with a quote cannot close the
+    docstring early; control characters other than newlines and tabs are written as escapes.
+    """
+    text = str(text).replace('\\', '\\\\').replace('"', '\\"')
+    return re.sub(r'[\x00-\x08\x0b-\x1f\x7f]', lambda match: f"\\x{ord(match.group()):02x}", text)
+
+
+def tool_specs(standard_tools: list, custom_tools: list) -> tuple:
+    """
+    Split the requested tools into strands_tools imports and @tool methods to generate.
+
+    Args:
+        standard_tools (list): Tool names picked from the standard tool list
+        custom_tools (list): Dicts with 'name' and 'description'
+
+    Returns:
+        tuple: (names imported from strands_tools, list of method specs with 'name', 'function_name' and 'description')
+    """
+    imported = [tool for tool in dict.fromkeys(standard_tools or []) if tool in STRANDS_TOOLS]
+    methods = [{'name': tool, 'description': f"Use {tool} to help fulfil the agent's purpose."}
+               for tool in dict.fromkeys(standard_tools or []) if tool not in STRANDS_TOOLS]
+    methods += [{'name': tool['name'], 'description': tool.get('description') or tool['name']} for tool in custom_tools or []]
+    for method, function_name in zip(methods, function_names([method['name'] for method in methods], imported)):
+        method['function_name'] = function_name
+    return imported, methods
+
+
+class TemplateLibrary:
+    """Jinja templates that render complete Strands agent modules without a model call."""
+
+    def __init__(self, directories: list = None):
+        """
+        Initialize the library.
+
+        Args:
+            directories (list, optional): Extra template directories; a template there overrides a built-in
+                template with the same name
+        """
+        self.directories = [directory for directory in directories or [] if directory] + [BUILTIN_TEMPLATE_DIR]
+        self.environment = Environment(
+            loader=ChoiceLoader([FileSystemLoader(directory) for directory in self.directories]),
+            # Templates are compiled once and never checked for changes, so rendering is pure Python
+            auto_reload=False,
+            cache_size=-1,
+            keep_trailing_newline=True,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            undefined=StrictUndefined,
+            autoescape=False
+        )
+        self.environment.filters['pystr'] = repr
+        self.environment.filters['docstring'] = escape_docstring
+
+    def names(self) -> list:
+        """Return the names of the available templates."""
+        return sorted({name[:-len(TEMPLATE_SUFFIX)] for name in self.environment.list_templates()
+                       if name.endswith(TEMPLATE_SUFFIX)})
+
+    def precompile(self):
+        """Compile every template now so the first request does not pay for it."""
+        for name in self.names():
+            self.environment.get_template(name + TEMPLATE_SUFFIX)
+        logger.info(f"Compiled {len(self.names())} agent templates from {', '.join(self.directories)}")
+
+    def has(self, name: str) -> bool:
+        """Check whether a template exists."""
+        return name in self.names()
+
+    def render(self, template_name: str, agent_name: str, agent_description: str, standard_tools: list = None,
+               custom_tools: list = None, tool_bodies: dict = None) -> str:
+        """
+        Render the code of an agent module.
+
+        Args:
+            template_name (str): Name of the template, without its suffix
+            agent_name (str): The name of the agent
+            agent_description (str): The purpose of the agent
+            standard_tools (list, optional): Tool names picked from the standard tool list
+            custom_tools (list, optional): Dicts with 'name' and 'description'
+            tool_bodies (dict, optional): Method bodies by function name, e.g. written by the model; tools
+                without one get the template's placeholder body
+
+        Returns:
+            str: The Python source of the agent module
+
+        Raises:
+            TemplateNotFoundError: If the template does not exist
+        """
+        try:
+            template = self.environment.get_template(template_name + TEMPLATE_SUFFIX)
+        except TemplateNotFound:
+            raise TemplateNotFoundError(f"Unknown agent template '{template_name}'")
+        imported, methods = tool_specs(standard_tools, custom_tools)
+        for method in methods:
+            method['body'] = (tool_bodies or {}).get(method['function_name'])
+        return template.render(
+            name=agent_name,
+            description=agent_description,
+            class_name=class_name_for(agent_name),
+            module_name=python_identifier(agent_name, 'agent'),
+            model_id=MODEL_ID,
+            strands_tools=imported,
+            custom_tools=methods,
+            # What goes into Agent(tools=...): imported tools, then the generated methods
+            tool_refs=imported + [f"self.{method['function_name']}" for method in methods]
+        )
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_agents_cache")
+
+
+class AgentListCache:
+    """In-process cache of serialized agent listing pages, invalidated whenever agents change."""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (float): Seconds a page stays cached, bounding staleness for writes no invalidation saw
+            max_entries (int): Maximum number of distinct listing queries kept
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag_for(body: str) -> str:
+        """Return the entity tag of a serialized listing."""
+        return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> tuple:
+        """
+        Look up a cached page.
+
+        Args:
+            key (str): Canonical form of the listing query
+
+        Returns:
+            tuple: (body, etag), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def generation(self) -> int:
+        """Return the invalidation counter; pass it to put() to detect writes during a query."""
+        with self._lock:
+            return self._generation
+
+    def put(self, key: str, body: str, generation: int) -> str:
+        """
+        Cache a serialized page unless agents changed while it was being built.
+
+        Args:
+            key (str): Canonical form of the listing query
+            body (str): The serialized response body
+            generation (int): Value of generation() taken before querying the database
+
+        Returns:
+            str: The entity tag of the body
+        """
+        etag = self.etag_for(body)
+        with self._lock:
+            if generation != self._generation:
+                return etag
+            self._entries[key] = (time.monotonic() + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self):
+        """Drop every cached page after agents were created, changed or removed."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Return hit/miss/invalidation counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries)
+            }
+
+
+class ChangeStreamInvalidator:
+    """Invalidates an AgentListCache on every change to a MongoDB collection, including writes by other servers."""
+
+    def __init__(self, collection, cache: AgentListCache, retry_delay: float = 5.0):
+        """
+        Initialize the watcher.
+
+        Args:
+            collection (pymongo.collection.Collection): The collection to watch
+            cache (AgentListCache): The cache to invalidate
+            retry_delay (float): Seconds to wait before reopening a failed change stream
+        """
+        self.collection = collection
+        self.cache = cache
+        self.retry_delay = retry_delay
+        self.active = False
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start watching on a background thread."""
+        self._thread = threading.Thread(target=self._watch, name="agents-change-stream", daemon=True)
+        self._thread.start()
+
+    def _watch(self):
+        resume_token = None
+        while not self._stopped.is_set():
+            try:
+                with self.collection.watch(resume_after=resume_token, max_await_time_ms=1000) as stream:
+                    self.active = True
+                    # Changes may have been missed while the stream was down
+                    self.cache.invalidate()
+                    logger.info("Watching the agents collection for changes")
+                    while not self._stopped.is_set() and stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            self.cache.invalidate()
+                        resume_token = stream.resume_token
+            except OperationFailure as e:
+                # Standalone servers do not support change streams; the cache TTL bounds staleness instead
+                self.active = False
+                logger.warning(f"Change streams unavailable, relying on cache TTL: {str(e)}")
+                return
+            except PyMongoError as e:
+                self.active = False
+                logger.warning(f"Agents change stream interrupted: {str(e)}")
+                self._stopped.wait(self.retry_delay)
+        self.active = False
+
+    def stop(self):
+        """Stop watching."""
+        self._stopped.set()
@@ -0,0 +1,260 @@
+import gzip
+import hashlib
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_artifact_store")
+
+# How blobs are compressed: 'zlib' and 'zstd' prime the compressor with a dictionary of code that generated
+# agents have in common, so near-identical agents store little more than their differences; 'gzip' blobs
+# are self-contained
+CODECS = ('zlib', 'zstd', 'gzip')
+DEFAULT_LEVELS = {'zlib': 9, 'zstd': 19, 'gzip': 9}
+
+
+class ArtifactError(Exception):
+    """Raised when a stored artifact cannot be read back, e.g. because its blob or dictionary is missing."""
+
+
+def content_hash(data: bytes) -> str:
+    """Return the content address of a blob."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _utcnow() -> datetime:
+    # Naive UTC, which is what MongoDB returns and what HTTP dates are built from
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ArtifactStore:
+    """
+    Content-addressed, compressed store of generated agent code with a version history per agent.
+
+    Each distinct file is stored once as a blob named by its SHA-256, however many agents or versions share
+    it; a version record points an agent name at a blob. Blobs and versions live in the agent store's database,
+    so any server node can serve code that another node generated.
+    """
+
+    def __init__(self, backend, codec: str = 'zlib', level: int = None, dictionary: str = None,
+                 cache_size: int = 256):
+        """
+        Initialize the store.
+
+        Args:
+            backend (storage.AgentStore): Holds the blobs and version records
+            codec (str): Compression for new blobs, one of CODECS; blobs are read with the codec they were written with
+            level (int, optional): Compression level, DEFAULT_LEVELS[codec] by default
+            dictionary (str, optional): Code typical of generated agents, used to prime 'zlib' and 'zstd'
+            cache_size (int): Decompressed blobs kept in memory for repeated reads
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Artifact codec must be one of {', '.join(CODECS)}, not '{codec}'")
+        if codec == 'zstd' and zstandard is None:
+            raise ValueError("The 'zstd' artifact codec needs the zstandard package")
+        self.backend = backend
+        self.codec = codec
+        self.level = level if level is not None else DEFAULT_LEVELS[codec]
+        self.cache_size = cache_size
+        self._dictionary = dictionary.encode('utf-8') if dictionary and codec != 'gzip' else None
+        self._dictionary_id = content_hash(self._dictionary) if self._dictionary else None
+        self._dictionary_stored = False
+        # Blobs never change, so cached content is never stale
+        self._cache = OrderedDict()
+        self._dictionaries = {}
+        self._lock = threading.Lock()
+        self.versions_written = 0
+        self.blobs_written = 0
+        self.deduplicated = 0
+        self.bytes_in = 0
+        self.bytes_stored = 0
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'gzip':
+            # A fixed mtime keeps the output, like the hash of the input, deterministic
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        if self.codec == 'zstd':
+            dict_data = (zstandard.ZstdCompressionDict(self._dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+                         if self._dictionary else None)
+            return zstandard.ZstdCompressor(level=self.level, dict_data=dict_data).compress(data)
+        if self._dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self._dictionary)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return compressor.compress(data) + compressor.flush()
+
+    def _decompress(self, blob: dict) -> bytes:
+        dictionary = self._load_dictionary(blob['dictionary']) if blob.get('dictionary') else None
+        data = bytes(blob['data'])
+        if blob['codec'] == 'gzip':
+            return gzip.decompress(data)
+        if blob['codec'] == 'zstd':
+            if zstandard is None:
+                raise ArtifactError(f"Blob {blob['_id']} is zstd-compressed, which needs the zstandard package")
+            dict_data = (zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+                         if dictionary else None)
+            return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+        if blob['codec'] == 'zlib':
+            decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+            return decompressor.decompress(data) + decompressor.flush()
+        raise ArtifactError(f"Blob {blob['_id']} uses unknown codec '{blob['codec']}'")
+
+    def _load_dictionary(self, dictionary_id: str) -> bytes:
+        """Return a compression dictionary, which is itself stored as a self-contained blob."""
+        with self._lock:
+            dictionary = self._dictionaries.get(dictionary_id)
+        if dictionary is None:
+            if dictionary_id == self._dictionary_id:
+                dictionary = self._dictionary
+            else:
+                blob = self.backend.get_blob(dictionary_id)
+                if blob is None:
+                    raise ArtifactError(f"Compression dictionary {dictionary_id} is missing")
+                dictionary = gzip.decompress(bytes(blob['data']))
+            with self._lock:
+                self._dictionaries[dictionary_id] = dictionary
+        return dictionary
+
+    def _store_dictionary(self):
+        """Store the current dictionary once, so nodes configured with another one can still read these blobs."""
+        if self._dictionary is None or self._dictionary_stored:
+            return
+        data = gzip.compress(self._dictionary, mtime=0)
+        self.backend.put_blob({
+            '_id': self._dictionary_id,
+            'codec': 'gzip',
+            'dictionary': None,
+            'data': data,
+            'size': len(self._dictionary),
+            'stored_size': len(data),
+            'created_at': _utcnow()
+        })
+        self._dictionary_stored = True
+
+    def _remember(self, blob_id: str, data: bytes):
+        with self._lock:
+            self._cache[blob_id] = data
+            self._cache.move_to_end(blob_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put(self, agent_name: str, code: str, source: str = 'create', trace_id: str = None) -> dict:
+        """
+        Store a new version of an agent's code.
+
+        Args:
+            agent_name (str): The agent the code belongs to
+            code (str): The complete agent module
+            source (str): What produced the version, e.g. 'create' or 'update'
+            trace_id (str, optional): Trace id of the job that produced it
+
+        Returns:
+            dict: The version record: agent, version, sha256, size, source, trace_id and created_at
+        """
+        data = code.encode('utf-8')
+        blob_id = content_hash(data)
+        # Identical code is only compressed and written the first time it is seen
+        with self._lock:
+            known = blob_id in self._cache
+        new = False
+        if not known and self.backend.get_blob(blob_id) is None:
+            self._store_dictionary()
+            compressed = self._compress(data)
+            new = self.backend.put_blob({
+                '_id': blob_id,
+                'codec': self.codec,
+                'dictionary': self._dictionary_id,
+                'data': compressed,
+                'size': len(data),
+                'stored_size': len(compressed),
+                'created_at': _utcnow()
+            })
+            if new:
+                logger.info(f"Stored {len(data)} byte artifact for {agent_name} in {len(compressed)} bytes ({self.codec})")
+        self._remember(blob_id, data)
+
+        record = {
+            'agent': agent_name,
+            'sha256': blob_id,
+            'size': len(data),
+            'source': source,
+            'trace_id': trace_id,
+            'created_at': _utcnow()
+        }
+        record['version'] = self.backend.insert_version(dict(record))
+        with self._lock:
+            self.versions_written += 1
+            self.bytes_in += len(data)
+            if new:
+                self.blobs_written += 1
+                self.bytes_stored += len(compressed)
+            else:
+                self.deduplicated += 1
+        return record
+
+    def read_blob(self, blob_id: str) -> bytes:
+        """
+        Return the content of a blob.
+
+        Raises:
+            ArtifactError: If the blob is missing or cannot be decompressed
+        """
+        with self._lock:
+            data = self._cache.get(blob_id)
+            if data is not None:
+                self._cache.move_to_end(blob_id)
+                return data
+        blob = self.backend.get_blob(blob_id)
+        if blob is None:
+            raise ArtifactError(f"Artifact blob {blob_id} is missing")
+        data = self._decompress(blob)
+        if content_hash(data) != blob_id:
+            raise ArtifactError(f"Artifact blob {blob_id} is corrupt")
+        self._remember(blob_id, data)
+        return data
+
+    def get(self, agent_name: str, version: int = None) -> tuple:
+        """
+        Fetch an agent's code.
+
+        Args:
+            agent_name (str): The agent's name
+            version (int, optional): The version to fetch, the latest by default
+
+        Returns:
+            tuple: (version record, code as UTF-8 bytes), or (None, None) if there is no such version
+        """
+        record = self.backend.get_version(agent_name, version)
+        if record is None:
+            return None, None
+        return record, self.read_blob(record['sha256'])
+
+    def versions(self, agent_name: str, limit: int = 100) -> list:
+        """Return an agent's version records, newest first."""
+        return self.backend.list_versions(agent_name, limit)
+
+    def stats(self) -> dict:
+        """Return counters of the versions and blobs written since startup."""
+        with self._lock:
+            return {
+                'codec': self.codec,
+                'versions_written': self.versions_written,
+                'blobs_written': self.blobs_written,
+                'deduplicated': self.deduplicated,
+                'bytes_in': self.bytes_in,
+                'bytes_stored': self.bytes_stored,
+                'cached_blobs': len(self._cache)
+            }
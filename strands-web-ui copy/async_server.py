@@ -0,0 +1,278 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+# Read by server.py when it is imported below: size the agent pool for generations running on the event loop
+os.environ.setdefault('STRANDS_ASYNC', 'true')
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import server
+from job_queue import QueueFullError
+from metrics import HTTP_REQUEST_SECONDS
+from strands_agent import GenerationEventHandler
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_async_server")
+
+# Threads for blocking work: Bedrock response streams, storage calls, post-processing and validation
+async_threads = int(os.environ.get('STRANDS_ASYNC_THREADS', str(server.pool_max_size + 16)))
+# Threads serving the routes that are still answered by the Flask app
+wsgi_threads = int(os.environ.get('STRANDS_THREADS', '32'))
+graceful_timeout = float(os.environ.get('STRANDS_GRACEFUL_TIMEOUT', '30'))
+# Seconds between checks of whether warm-up has finished
+WARMUP_POLL_INTERVAL = 0.1
+
+
+def json_response(body: dict, status: int = 200) -> Response:
+    """Build a JSON response the way the Flask routes do, with datetimes as strings."""
+    return Response(json.dumps(body, default=str), status_code=status, media_type='application/json')
+
+
+def traced(route: str):
+    """
+    Give an async route the trace id and latency metric the Flask routes get from before/after_request.
+
+    Args:
+        route (str): The route pattern in Flask syntax, so both serving modes report the same series
+    """
+    def decorator(handler):
+        async def wrapper(request):
+            trace_id = request.headers.get('X-Request-ID', '')
+            request.state.trace_id = trace_id if server.TRACE_ID_PATTERN.match(trace_id) else uuid.uuid4().hex
+            started = time.monotonic()
+            response = await handler(request)
+            response.headers['X-Request-ID'] = request.state.trace_id
+            HTTP_REQUEST_SECONDS.observe(time.monotonic() - started, method=request.method, route=route,
+                                         status=response.status_code)
+            return response
+        wrapper.__name__ = handler.__name__
+        wrapper.__doc__ = handler.__doc__
+        return wrapper
+    return decorator
+
+
+async def read_create_request(request):
+    """Parse and check a create-agent request body; returns (data, error response)."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not data.get('name') or not data.get('description'):
+        return None, json_response({
+            'success': False,
+            'message': "Agent name and description are required"
+        }, 400)
+    error = server.apply_generation_options(data)
+    if error:
+        return None, json_response({
+            'success': False,
+            'message': error
+        }, 400)
+    return data, None
+
+
+async def start_create_agent_job(request, data):
+    """Run a cheap create-agent job right away, or queue a generation on the event loop."""
+    locks = server.agent_locks([data['name']])
+    if data['mode'] == 'template' or await asyncio.to_thread(server.is_cached_generation, data):
+        return await asyncio.to_thread(server.job_queue.run_inline, 'create-agent', server.run_create_agent_job, data,
+                                       trace_id=request.state.trace_id, locks=locks)
+    return server.job_queue.submit_async('create-agent', run_create_agent_job_async, data,
+                                         trace_id=request.state.trace_id, locks=locks)
+
+
+@traced('/api/create-agent')
+async def create_agent(request):
+    """API endpoint to queue the creation of a Strands agent."""
+    try:
+        data, error = await read_create_request(request)
+        if error is not None:
+            return error
+        logger.info(f"Received request to create agent: {data['name']}")
+
+        job = await start_create_agent_job(request, data)
+        if job.finished:
+            message = f"Agent '{data['name']}' created from {'template' if data['mode'] == 'template' else 'cache'}"
+        else:
+            message = f"Agent '{data['name']}' queued for creation"
+        return json_response({
+            'success': True,
+            'message': message,
+            'job': job.to_dict()
+        }, 200 if job.finished else 202)
+
+    except QueueFullError as e:
+        logger.warning(f"Rejected agent creation: {str(e)}")
+        return json_response({
+            'success': False,
+            'message': str(e)
+        }, 429)
+    except Exception as e:
+        logger.error(f"Error queuing agent creation: {str(e)}")
+        return json_response({
+            'success': False,
+            'message': f"Error creating agent: {str(e)}"
+        }, 500)
+
+
+@traced('/api/create-agent/stream')
+async def create_agent_stream(request):
+    """API endpoint to create a Strands agent and stream its progress as Server-Sent Events."""
+    try:
+        data, error = await read_create_request(request)
+        if error is not None:
+            return error
+        logger.info(f"Received streaming request to create agent: {data['name']}")
+        return job_event_stream(await start_create_agent_job(request, data))
+
+    except QueueFullError as e:
+        logger.warning(f"Rejected agent creation: {str(e)}")
+        return json_response({
+            'success': False,
+            'message': str(e)
+        }, 429)
+    except Exception as e:
+        logger.error(f"Error queuing agent creation: {str(e)}")
+        return json_response({
+            'success': False,
+            'message': f"Error creating agent: {str(e)}"
+        }, 500)
+
+
+@traced('/api/jobs/<job_id>')
+async def get_job(request):
+    """API endpoint to get the state of a single job."""
+    job_id = request.path_params['job_id']
+    job = server.job_queue.get(job_id)
+    if job is None:
+        return json_response({
+            'success': False,
+            'message': f"Job '{job_id}' not found"
+        }, 404)
+    return json_response({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+
+@traced('/api/jobs/<job_id>/events')
+async def get_job_events(request):
+    """API endpoint streaming the progress events of a job as Server-Sent Events."""
+    job_id = request.path_params['job_id']
+    job = server.job_queue.get(job_id)
+    if job is None:
+        return json_response({
+            'success': False,
+            'message': f"Job '{job_id}' not found"
+        }, 404)
+
+    # Resume after the last event the client saw when EventSource reconnects
+    last_event_id = request.headers.get('Last-Event-ID', request.query_params.get('after'))
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    return job_event_stream(job, start)
+
+
+def job_event_stream(job, start=0):
+    """Build a Server-Sent Events response that follows a job until it finishes, without holding a thread."""
+    async def generate():
+        yield f"event: job\ndata: {json.dumps(job.to_dict())}\n\n"
+        async for item in job.iter_events_async(start):
+            if item is None:
+                # Comment line keeps proxies and browsers from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            index, event = item
+            yield f"id: {index}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+async def wait_for_warmup_async(job):
+    """Wait until the MCP servers and first agents are up."""
+    if server.warmup.ready:
+        return
+    job.emit('phase', {'name': 'warming_up'})
+    deadline = time.monotonic() + server.agent_pool.checkout_timeout
+    while not server.warmup.ready:
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Server is still warming up: {server.warmup.last_error or server.warmup.status}")
+        await asyncio.sleep(WARMUP_POLL_INTERVAL)
+
+
+async def run_create_agent_job_async(job):
+    """
+    Generate an agent for a create-agent job on the event loop and return the agent details.
+
+    The model turns run on the loop; the steps around them (cache lookup, template rendering, post-processing,
+    validation and storage) are short and run on worker threads with the same functions as threaded jobs.
+    """
+    data = job.payload
+    cached = None
+    if data.get('mode', 'llm') != 'llm':
+        code = await asyncio.to_thread(server.render_agent, job, data)
+    else:
+        with job.timed('cache_lookup'):
+            cached = await asyncio.to_thread(server.lookup_generation, data)
+        if cached is not None:
+            job.emit('phase', {'name': 'cached'})
+            code = cached['code']
+        else:
+            with job.timed('warmup_wait'):
+                await wait_for_warmup_async(job)
+            documentation = await asyncio.to_thread(server.prepared_documentation, job)
+
+            job.emit('phase', {'name': 'generating'})
+            with job.timed('pool_checkout'):
+                strands_agent = await server.agent_pool.checkout_async()
+            try:
+                with job.timed('generation'):
+                    await strands_agent.create_strands_agent_async(data['name'], data['description'],
+                                                                   server.combine_tools(data),
+                                                                   callback_handler=GenerationEventHandler(job.emit),
+                                                                   documentation=documentation)
+            finally:
+                job.timings['model'] = strands_agent.last_timings
+                server.agent_pool.checkin(strands_agent)
+            code = await asyncio.to_thread(server.read_agent_file, data['name'])
+
+    return await asyncio.to_thread(server.finish_create_agent_job, job, code, cached)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Size the loop's thread pool on startup; let running generations finish and stop everything on shutdown."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=async_threads, thread_name_prefix="strands-async"))
+    logger.info(f"Async server started: up to {server.job_queue.max_async_jobs} generations at once, "
+                f"{async_threads} worker threads")
+    yield
+    # Generations still waiting to start are dropped, like the threaded queue does
+    await server.job_queue.drain_async(graceful_timeout)
+    await asyncio.to_thread(server.shutdown)
+
+
+# The generation path is served natively; every other route is still answered by the Flask app on a thread pool
+app = Starlette(routes=[
+    Route('/api/create-agent', create_agent, methods=['POST']),
+    Route('/api/create-agent/stream', create_agent_stream, methods=['POST']),
+    Route('/api/jobs/{job_id}', get_job, methods=['GET']),
+    Route('/api/jobs/{job_id}/events', get_job_events, methods=['GET']),
+    Mount('/', app=WSGIMiddleware(server.app, workers=wsgi_threads))
+], lifespan=lifespan)
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_async_waiters")
+
+
+class AsyncWaiters:
+    """
+    Wake-ups for coroutines waiting on state that threads change under a threading lock.
+
+    A coroutine registers an asyncio.Event, clears it while it holds the lock and finds it has to wait, then
+    awaits it. Whoever changes the state calls wake_all() afterwards, from any thread, so no wake-up is lost
+    and no thread is held while the coroutine waits.
+    """
+
+    def __init__(self):
+        self._waiters = {}
+        self._lock = threading.Lock()
+
+    def register(self) -> asyncio.Event:
+        """Return a new event woken by wake_all(); must be called on the event loop that will await it."""
+        event = asyncio.Event()
+        with self._lock:
+            self._waiters[event] = asyncio.get_running_loop()
+        return event
+
+    def unregister(self, event: asyncio.Event):
+        """Stop waking an event registered with register()."""
+        with self._lock:
+            self._waiters.pop(event, None)
+
+    def wake_all(self):
+        """Set every registered event on its own loop."""
+        with self._lock:
+            waiters = list(self._waiters.items())
+        for event, loop in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The loop has been closed; its coroutines are gone
+                self.unregister(event)
+
+    async def wait(self, event: asyncio.Event, timeout: float = None) -> bool:
+        """
+        Await an event from register().
+
+        Args:
+            event (asyncio.Event): The registered event
+            timeout (float, optional): Seconds to wait at most
+
+        Returns:
+            bool: False if the timeout passed first
+        """
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._waiters)
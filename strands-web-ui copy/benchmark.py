@@ -0,0 +1,284 @@
+"""
+Offline load benchmark for the Strands Agent Creator.
+
+Runs server.py in this process with the fake model (fake_model.py), the fake
+documentation MCP server (fake_mcp_server.py) and an in-memory SQLite store,
+then drives /api/create-agent/stream and /api/agents from concurrent clients
+and reports latency percentiles, throughput and memory. No AWS credentials,
+database or network access are needed:
+
+    python benchmark.py --requests 50 --concurrency 8 --model-latency 0.5
+
+Pass --url to drive a server that is already running instead (configure its
+fakes through the same environment variables).
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS = ('create', 'list')
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark the Strands Agent Creator offline")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help="Scenario to run, may be repeated (default: all)")
+    parser.add_argument('--requests', type=int, default=50, help="Requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Job workers and agent pool size of the in-process server (default: --concurrency)")
+    parser.add_argument('--model-latency', type=float, default=0.5, help="Seconds before each model turn starts answering")
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help="Output rate of the fake model")
+    parser.add_argument('--output-tokens', type=int, default=800, help="Output tokens of the turn that writes the agent")
+    parser.add_argument('--doc-lookups', type=int, default=2, help="MCP documentation calls per generation")
+    parser.add_argument('--mcp-latency', type=float, default=0.05, help="Seconds per fake MCP tool call")
+    parser.add_argument('--seed-agents', type=int, default=200, help="Agents stored before the list scenario")
+    parser.add_argument('--generation-cache', action='store_true', help="Keep the generation cache enabled")
+    parser.add_argument('--mode', choices=('llm', 'template', 'hybrid'), default='llm',
+                        help="Generation mode of the create scenario")
+    parser.add_argument('--url', help="Benchmark a running server at this base URL instead of starting one")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--verbose', action='store_true', help="Keep the server's INFO logging")
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or list(SCENARIOS)
+    args.workers = args.workers or args.concurrency
+    return args
+
+
+def configure_environment(args, workdir: str):
+    """Point server.py at the fakes; must run before server is imported."""
+    os.environ.update({
+        'STRANDS_MODEL_PROVIDER': 'fake',
+        'FAKE_MODEL_LATENCY': str(args.model_latency),
+        'FAKE_MODEL_TOKENS_PER_SECOND': str(args.tokens_per_second),
+        'FAKE_MODEL_OUTPUT_TOKENS': str(args.output_tokens),
+        'FAKE_MODEL_DOC_LOOKUPS': str(args.doc_lookups),
+        'STRANDS_MCP_COMMAND': sys.executable,
+        'STRANDS_MCP_ARGS': f"'{os.path.join(HERE, 'fake_mcp_server.py')}' --latency {args.mcp_latency}",
+        'STRANDS_STORAGE_BACKEND': 'sqlite',
+        'STRANDS_SQLITE_PATH': ':memory:',
+        'STRANDS_JOB_WORKERS': str(args.workers),
+        'STRANDS_POOL_MIN_SIZE': str(args.workers),
+        'STRANDS_POOL_MAX_SIZE': str(args.workers),
+        'STRANDS_GENERATION_CACHE': 'true' if args.generation_cache else 'false',
+        'STRANDS_GENERATION_CACHE_DIR': os.path.join(workdir, '.generation_cache'),
+        'STRANDS_JOB_MAX_QUEUED': str(max(100, args.requests))
+    })
+
+
+def start_server(args):
+    """Import server.py with the fakes configured and serve it on a free local port."""
+    from werkzeug.serving import make_server
+
+    sys.path.insert(0, HERE)
+    import server
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logging.getLogger("strands").setLevel(logging.WARNING)
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    if not server.warmup.wait(120):
+        raise RuntimeError(f"Server did not finish warming up: {server.warmup.last_error or server.warmup.status}")
+
+    http_server = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, name="benchmark-http", daemon=True).start()
+    return server, http_server, f"http://127.0.0.1:{http_server.server_port}"
+
+
+def rss_mb() -> float:
+    """Resident memory of this process in MB, or None where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB, or None on platforms without getrusage."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+_sessions = threading.local()
+
+
+def session() -> requests.Session:
+    """One HTTP session per client thread, so connections are reused without sharing a session across threads."""
+    if not hasattr(_sessions, 'session'):
+        _sessions.session = requests.Session()
+    return _sessions.session
+
+
+def create_agent(base_url: str, index: int, prefix: str, mode: str = 'llm'):
+    """Create one agent through the streaming endpoint and wait for its final event."""
+    response = session().post(f"{base_url}/api/create-agent/stream", json={
+        'name': f"{prefix} {index}",
+        'description': "Benchmark agent that answers questions about the weather",
+        'standardTools': ['http_request'],
+        'customTools': [{'name': 'Get Forecast', 'description': "Fetch the forecast for a city"}],
+        'mode': mode
+    }, stream=True, timeout=600)
+    with response:
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        for line in response.iter_lines(decode_unicode=True):
+            if line == 'event: done':
+                return
+            if line == 'event: failed':
+                raise RuntimeError("Generation failed")
+    raise RuntimeError("Stream ended without a final event")
+
+
+def list_agents(base_url: str, index: int, prefix: str, mode: str = 'llm'):
+    """Fetch one page of agents, cycling through a few query shapes."""
+    query = ('', '?limit=20', '?order=asc&limit=100', f"?name_prefix={prefix}")[index % 4]
+    response = session().get(f"{base_url}/api/agents{query}", timeout=60)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+
+def run_scenario(name: str, call, base_url: str, args, prefix: str) -> dict:
+    """Run one scenario with args.concurrency clients and summarize its latencies."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(index):
+        started = time.monotonic()
+        try:
+            call(base_url, index, prefix, args.mode)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        with lock:
+            latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix=f"benchmark-{name}") as executor:
+        list(executor.map(one, range(args.requests)))
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    to_ms = lambda seconds: round(seconds * 1000, 1) if seconds is not None else None
+    return {
+        'scenario': name,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'mode': args.mode if name == 'create' else None,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_ms': to_ms(percentile(latencies, 0.50)),
+        'p95_ms': to_ms(percentile(latencies, 0.95)),
+        'p99_ms': to_ms(percentile(latencies, 0.99)),
+        'max_ms': to_ms(latencies[-1] if latencies else None)
+    }
+
+
+def phase_means(base_url: str) -> dict:
+    """Mean seconds per generation phase, read from the server's /metrics endpoint."""
+    sums, counts = {}, {}
+    text = session().get(f"{base_url}/metrics", timeout=60).text
+    for line in text.splitlines():
+        for suffix, target in (('_sum', sums), ('_count', counts)):
+            prefix = f'strands_generation_phase_seconds{suffix}{{phase="'
+            if line.startswith(prefix):
+                phase, value = line[len(prefix):].split('"} ')
+                target[phase] = float(value)
+    return {phase: round(sums[phase] / counts[phase], 4) for phase in sums if counts.get(phase)}
+
+
+def print_report(report: dict):
+    """Print the benchmark results as a table."""
+    print(f"\n{'scenario':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for result in report['scenarios']:
+        print(f"{result['scenario']:<10}{result['requests']:>10}{result['errors']:>8}"
+              f"{str(result['requests_per_second']):>10}{str(result['p50_ms']):>10}{str(result['p95_ms']):>10}"
+              f"{str(result['p99_ms']):>10}{str(result['max_ms']):>10}")
+        if result['first_error']:
+            print(f"  first error: {result['first_error']}")
+    if report['phases']:
+        print("\nmean seconds per generation phase: " + ", ".join(f"{phase} {seconds}" for phase, seconds in report['phases'].items()))
+    memory = report['memory']
+    if memory['rss_start_mb'] is not None:
+        print(f"memory: {memory['rss_start_mb']} MB at start, {memory['rss_end_mb']} MB at end, {memory['peak_rss_mb']} MB peak")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    prefix = f"Bench {os.getpid()}"
+    workdir = None
+    server = http_server = None
+    previous_cwd = os.getcwd()
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            # Generated agent files and caches go to a scratch directory that is removed afterwards
+            workdir = tempfile.mkdtemp(prefix='strands-benchmark-')
+            os.chdir(workdir)
+            configure_environment(args, workdir)
+            server, http_server, base_url = start_server(args)
+            if 'list' in args.scenario and args.seed_agents:
+                server.agent_store.insert_agents([server.agent_document({
+                    'name': f"{prefix} seed {index}",
+                    'description': "Seeded benchmark agent",
+                    'tools': ['http_request']
+                }) for index in range(args.seed_agents)])
+
+        rss_start = rss_mb() if server is not None else None
+        scenarios = {'create': create_agent, 'list': list_agents}
+        results = [run_scenario(name, scenarios[name], base_url, args, prefix) for name in args.scenario]
+        report = {
+            'scenarios': results,
+            'phases': phase_means(base_url) if 'create' in args.scenario else {},
+            'memory': {
+                'rss_start_mb': round(rss_start, 1) if rss_start is not None else None,
+                'rss_end_mb': round(rss_mb(), 1) if rss_start is not None else None,
+                'peak_rss_mb': round(peak_rss_mb(), 1) if server is not None and peak_rss_mb() is not None else None
+            }
+        }
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+        return 1 if any(result['errors'] for result in results) else 0
+    finally:
+        if http_server is not None:
+            http_server.shutdown()
+        if server is not None:
+            server.shutdown()
+        os.chdir(previous_cwd)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
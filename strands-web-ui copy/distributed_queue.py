@@ -0,0 +1,587 @@
+import copy
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from job_queue import DeferredJob, Job, JobLostError, QueueFullError, run_job
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_distributed_queue")
+
+ACTIVE_STATES = (Job.QUEUED, Job.RUNNING)
+
+
+def job_document(job: Job) -> dict:
+    """Build the stored document for a job; lease fields are filled in by the store and the queue."""
+    return {
+        '_id': job.id,
+        'kind': job.kind,
+        'payload': job.payload,
+        'trace_id': job.trace_id,
+        'locks': job.locks,
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': None,
+        'finished_at': None,
+        'timings': {},
+        'result': None,
+        'error': None,
+        'events': [],
+        'owner': None,
+        'lease_expires': 0.0,
+        'not_before': 0.0,
+        'attempts': 0
+    }
+
+
+class MemoryJobStore:
+    """
+    In-process stand-in for MongoJobStore, for tests and for trying the distributed queue on one machine.
+
+    Documents are copied in and out, so callers see the same snapshot semantics as with MongoDB.
+    """
+
+    def __init__(self, max_history: int = 1000):
+        """
+        Initialize the store.
+
+        Args:
+            max_history (int): Finished jobs kept before the oldest are dropped
+        """
+        self.max_history = max_history
+        self._jobs = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def insert(self, document: dict):
+        with self._lock:
+            self._jobs[document['_id']] = copy.deepcopy(document)
+            finished = [job_id for job_id, job in self._jobs.items() if job['status'] not in ACTIVE_STATES]
+            for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+                del self._jobs[job_id]
+
+    def claim(self, owner: str, kinds: list, lease_seconds: float) -> dict:
+        now = time.time()
+        with self._lock:
+            for document in self._jobs.values():
+                if document['kind'] not in kinds:
+                    continue
+                if ((document['status'] == Job.QUEUED and document['not_before'] <= now)
+                        or (document['status'] == Job.RUNNING and document['lease_expires'] < now)):
+                    document.update(status=Job.RUNNING, owner=owner, lease_expires=now + lease_seconds)
+                    document['attempts'] += 1
+                    claimed = copy.deepcopy(document)
+                    claimed.pop('events')
+                    return claimed
+        return None
+
+    def update(self, job_id: str, owner: str, attempt: int, fields: dict, events: list = None) -> bool:
+        with self._lock:
+            document = self._jobs.get(job_id)
+            if document is None or document['owner'] != owner or document['attempts'] != attempt:
+                return False
+            document.update(copy.deepcopy(fields))
+            document['events'].extend(copy.deepcopy(events or []))
+            return True
+
+    def requeue(self, job_id: str, owner: str, attempt: int, delay: float) -> bool:
+        with self._lock:
+            document = self._jobs.get(job_id)
+            if document is None or document['owner'] != owner or document['attempts'] != attempt:
+                return False
+            document.update(status=Job.QUEUED, owner=None, not_before=time.time() + delay)
+            document['attempts'] -= 1
+            return True
+
+    def get(self, job_id: str, events_from: int = None) -> dict:
+        with self._lock:
+            document = self._jobs.get(job_id)
+            if document is None:
+                return None
+            events = document['events'][events_from:] if events_from is not None else []
+            document = copy.deepcopy({**document, 'events': events})
+        return document
+
+    def list(self, status: str = None, limit: int = 50) -> list:
+        with self._lock:
+            documents = [document for document in reversed(self._jobs.values())
+                         if status is None or document['status'] == status][:limit]
+            return [copy.deepcopy({**document, 'events': []}) for document in documents]
+
+    def counts(self) -> dict:
+        counts = {Job.QUEUED: 0, Job.RUNNING: 0, Job.DONE: 0, Job.FAILED: 0}
+        with self._lock:
+            for document in self._jobs.values():
+                counts[document['status']] += 1
+        return counts
+
+    def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder['owner'] != owner and holder['expires'] >= now:
+                return False
+            self._locks[name] = {'owner': owner, 'expires': now + ttl}
+            return True
+
+    def renew_locks(self, names: list, owner: str, ttl: float):
+        with self._lock:
+            for name in names:
+                if self._locks.get(name, {}).get('owner') == owner:
+                    self._locks[name]['expires'] = time.time() + ttl
+
+    def release_locks(self, names: list, owner: str):
+        with self._lock:
+            for name in names:
+                if self._locks.get(name, {}).get('owner') == owner:
+                    del self._locks[name]
+
+
+class MongoJobStore:
+    """Jobs and resource locks shared by every node through two MongoDB collections."""
+
+    def __init__(self, jobs, locks, history_seconds: float = 7 * 24 * 3600):
+        """
+        Initialize the store.
+
+        Args:
+            jobs: MongoDB collection holding one document per job
+            locks: MongoDB collection holding one document per held resource lock
+            history_seconds (float): Seconds finished jobs are kept before MongoDB expires them
+        """
+        self.jobs = jobs
+        self.locks = locks
+        self.history_seconds = history_seconds
+
+    def ensure_indexes(self):
+        """Create the indexes behind claiming, listing and expiring jobs."""
+        self.jobs.create_index([('status', ASCENDING), ('not_before', ASCENDING), ('created_at', ASCENDING)])
+        self.jobs.create_index([('status', ASCENDING), ('lease_expires', ASCENDING)])
+        self.jobs.create_index([('created_at', DESCENDING)])
+        self.jobs.create_index('finished_at', expireAfterSeconds=int(self.history_seconds))
+        logger.info("MongoDB indexes for the shared job queue are in place")
+
+    def insert(self, document: dict):
+        self.jobs.insert_one(document)
+
+    def claim(self, owner: str, kinds: list, lease_seconds: float) -> dict:
+        now = time.time()
+        return self.jobs.find_one_and_update(
+            {'kind': {'$in': list(kinds)}, '$or': [
+                {'status': Job.QUEUED, 'not_before': {'$lte': now}},
+                # A running job whose lease ran out lost its worker, e.g. to a crash or a network partition
+                {'status': Job.RUNNING, 'lease_expires': {'$lt': now}}
+            ]},
+            {'$set': {'status': Job.RUNNING, 'owner': owner, 'lease_expires': now + lease_seconds},
+             '$inc': {'attempts': 1}},
+            projection={'events': 0},
+            sort=[('created_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def update(self, job_id: str, owner: str, attempt: int, fields: dict, events: list = None) -> bool:
+        update = {'$set': fields}
+        if events:
+            update['$push'] = {'events': {'$each': events}}
+        # Conditional on the claim, so a node whose lease ran out cannot write over the node that took the job over
+        return bool(self.jobs.update_one({'_id': job_id, 'owner': owner, 'attempts': attempt}, update).matched_count)
+
+    def requeue(self, job_id: str, owner: str, attempt: int, delay: float) -> bool:
+        return bool(self.jobs.update_one(
+            {'_id': job_id, 'owner': owner, 'attempts': attempt},
+            {'$set': {'status': Job.QUEUED, 'owner': None, 'not_before': time.time() + delay}, '$inc': {'attempts': -1}}
+        ).matched_count)
+
+    def get(self, job_id: str, events_from: int = None) -> dict:
+        if events_from is None:
+            projection = {'events': 0}
+        else:
+            # Followers of a job only fetch the events they have not seen yet
+            projection = {'events': {'$slice': [events_from, Job.MAX_EVENTS * 2]}}
+        document = self.jobs.find_one({'_id': job_id}, projection)
+        if document is not None:
+            document.setdefault('events', [])
+        return document
+
+    def list(self, status: str = None, limit: int = 50) -> list:
+        documents = self.jobs.find({'status': status} if status else {}, {'events': 0}).sort('created_at', -1).limit(limit)
+        return [{**document, 'events': []} for document in documents]
+
+    def counts(self) -> dict:
+        counts = {Job.QUEUED: 0, Job.RUNNING: 0, Job.DONE: 0, Job.FAILED: 0}
+        for row in self.jobs.aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]):
+            counts[row['_id']] = row['count']
+        return counts
+
+    def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        try:
+            self.locks.insert_one({'_id': name, 'owner': owner, 'expires': now + ttl})
+            return True
+        except DuplicateKeyError:
+            # Held already: take it over only if it is ours or its holder stopped renewing it
+            return bool(self.locks.update_one(
+                {'_id': name, '$or': [{'owner': owner}, {'expires': {'$lt': now}}]},
+                {'$set': {'owner': owner, 'expires': now + ttl}}
+            ).matched_count)
+
+    def renew_locks(self, names: list, owner: str, ttl: float):
+        self.locks.update_many({'_id': {'$in': names}, 'owner': owner}, {'$set': {'expires': time.time() + ttl}})
+
+    def release_locks(self, names: list, owner: str):
+        self.locks.delete_many({'_id': {'$in': names}, 'owner': owner})
+
+
+class StoredJob:
+    """Read-only view of a job kept in the shared store, e.g. one queued here and running on another node."""
+
+    def __init__(self, store, document: dict, poll_interval: float = 0.5):
+        self.store = store
+        self.document = document
+        self.poll_interval = poll_interval
+
+    @property
+    def id(self) -> str:
+        return self.document['_id']
+
+    @property
+    def status(self) -> str:
+        return self.document['status']
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.DONE, Job.FAILED)
+
+    def iter_events(self, start: int = 0, heartbeat: float = 15.0):
+        """Yield progress events, polling the store, until the job has finished; see Job.iter_events."""
+        index = start
+        last_event = time.monotonic()
+        while True:
+            document = self.store.get(self.id, events_from=index)
+            if document is None:
+                return
+            self.document = document
+            for event in document['events']:
+                yield index, event
+                index += 1
+                last_event = time.monotonic()
+            if self.finished and not document['events']:
+                return
+            if not document['events']:
+                if time.monotonic() - last_event >= heartbeat:
+                    last_event = time.monotonic()
+                    yield None
+                time.sleep(self.poll_interval)
+
+    def to_dict(self) -> dict:
+        """Return the same JSON-serializable view as Job.to_dict()."""
+        document = self.document
+        created_at, started_at, finished_at = document['created_at'], document['started_at'], document['finished_at']
+        queue_wait = ((started_at or datetime.now()) - created_at).total_seconds()
+        run_seconds = ((finished_at or datetime.now()) - started_at).total_seconds() if started_at else None
+        return {
+            'id': document['_id'],
+            'trace_id': document['trace_id'],
+            'kind': document['kind'],
+            'status': document['status'],
+            'created_at': created_at.isoformat(),
+            'started_at': started_at.isoformat() if started_at else None,
+            'finished_at': finished_at.isoformat() if finished_at else None,
+            'queue_wait_seconds': round(queue_wait, 3),
+            'run_seconds': round(run_seconds, 3) if run_seconds is not None else None,
+            'timings': document['timings'],
+            'result': document['result'],
+            'error': document['error'],
+            'node': document.get('owner')
+        }
+
+
+class SharedJob(Job):
+    """A job running on this node whose state and events are mirrored to the shared store."""
+
+    def __init__(self, queue, document: dict):
+        super().__init__(document['kind'], document['payload'], document['trace_id'], document['locks'])
+        self.id = document['_id']
+        self.created_at = document['created_at']
+        # Time spent queued on any node, measured on this node's monotonic clock
+        self._created_monotonic = time.monotonic() - max(0.0, (datetime.now() - self.created_at).total_seconds())
+        self.queue = queue
+        # The claim this node holds: later claims of the same job by any node have a higher attempt number
+        self.attempt = document['attempts']
+        self.lock_owner = f"{self.id}:{self.attempt}"
+        self.lost = False
+        self._flushed = 0
+        # Serializes lease renewals with the final write, so a renewal can never mark a finished job running again
+        self.write_lock = threading.Lock()
+
+    def pending_events(self) -> list:
+        """Return the events not yet written to the store and mark them written."""
+        with self._events_condition:
+            events = self.events[self._flushed:]
+            self._flushed = len(self.events)
+        return events
+
+    def to_dict(self) -> dict:
+        return {**super().to_dict(), 'node': self.queue.node_id}
+
+    def ensure_owned(self):
+        """Renew the job's lease, raising JobLostError if another node has claimed it since."""
+        if not self.queue._write(self, {'lease_expires': time.time() + self.queue.lease_seconds}, renewal=True):
+            raise JobLostError(f"Job {self.id} was taken over by another node")
+
+    def _finish(self, status: str, result=None, error: str = None):
+        super()._finish(status, result, error)
+        self.queue._write(self, {
+            'status': self.status,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'timings': self.timings,
+            'result': self.result,
+            'error': self.error,
+            'lease_expires': 0.0
+        })
+
+
+class DistributedJobQueue:
+    """
+    Job queue shared by several server nodes through a job store.
+
+    Any node can queue jobs; nodes with workers claim the oldest runnable job with a lease that they keep
+    renewing while it runs. A job whose worker stops renewing (crash, network partition) is claimed again by
+    another node, up to max_attempts times. Jobs name the resources they use exclusively (the agent files they
+    write), and a job runs only while holding a lock on each, so two nodes never generate the same agent at once.
+    Job functions are looked up by kind, so every node registers the same ones.
+    """
+
+    def __init__(self, store, max_workers: int = 2, max_queued: int = 100, lease_seconds: float = 30.0,
+                 poll_interval: float = 0.5, max_attempts: int = 3, node_id: str = None):
+        """
+        Initialize the queue; workers start claiming jobs once start() is called.
+
+        Args:
+            store: MongoJobStore or MemoryJobStore
+            max_workers (int): Jobs this node runs at the same time (0 for a node that only queues jobs)
+            max_queued (int): Maximum number of jobs waiting across all nodes before submissions are rejected
+            lease_seconds (float): Seconds a claim stays valid without renewal; also the lifetime of resource locks
+            poll_interval (float): Seconds between claim attempts of an idle worker, and between event writes
+            max_attempts (int): Claims of a job, including ones lost with their worker, before it is failed
+            node_id (str, optional): Name of this node in job documents and logs
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._handlers = {}
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._workers = []
+        self._keeper = None
+        logger.info(f"Distributed job queue on node {self.node_id} with {max_workers} workers")
+
+    def register(self, kind: str, func):
+        """Name the function that runs jobs of a kind; jobs of kinds this node has not registered are left to others."""
+        self._handlers[kind] = func
+
+    def start(self):
+        """Start claiming jobs, and renewing the leases and locks of the ones running here."""
+        for index in range(self.max_workers):
+            worker = threading.Thread(target=self._work, name=f"strands-job-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self._keeper = threading.Thread(target=self._keep_leases, name="strands-job-leases", daemon=True)
+        self._keeper.start()
+
+    def submit(self, kind: str, func, payload: dict = None, trace_id: str = None, locks: list = None):
+        """
+        Queue a job for whichever node claims it first.
+
+        Args:
+            kind (str): The type of work; must be registered on the worker nodes
+            func (callable): The job function, registered for the kind if it is not yet
+            payload (dict, optional): The request data the job was created from; must be storable in MongoDB
+            trace_id (str, optional): Id of the request that created the job
+            locks (list, optional): Names of resources the job uses exclusively
+
+        Returns:
+            StoredJob: The queued job
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        self._handlers.setdefault(kind, func)
+        queued = self.store.counts()[Job.QUEUED]
+        if queued >= self.max_queued:
+            raise QueueFullError(f"Job queue is full ({queued} jobs waiting)")
+        document = job_document(Job(kind, payload, trace_id, locks))
+        self.store.insert(document)
+        self._wakeup.set()
+        logger.info(f"Queued {kind} job {document['_id']} [trace {document['trace_id']}]")
+        return StoredJob(self.store, document, self.poll_interval)
+
+    def run_inline(self, kind: str, func, payload: dict = None, trace_id: str = None, locks: list = None):
+        """
+        Run a job on the calling thread, recorded in the store like any other job.
+
+        If another node holds one of the job's locks, the job is queued instead of waiting for it; so is a job
+        whose function raises DeferredJob.
+
+        Returns:
+            Job: The finished job, or the queued job as a StoredJob
+        """
+        self._handlers.setdefault(kind, func)
+        document = job_document(Job(kind, payload, trace_id, locks))
+        document.update(status=Job.RUNNING, owner=self.node_id, lease_expires=time.time() + self.lease_seconds,
+                        attempts=1)
+        self.store.insert(document)
+        job = SharedJob(self, document)
+        if not self._acquire_locks(job):
+            logger.info(f"Resources of {kind} job {job.id} are busy, queuing it instead of running it inline")
+            return self._requeue_inline(job)
+        job.inline = True
+        try:
+            self._execute(job, func)
+        except DeferredJob as e:
+            logger.info(f"Queuing {kind} job {job.id} that cannot finish inline: {str(e)}")
+            job._requeue()
+            self._write(job, {'status': Job.QUEUED})
+            return self._requeue_inline(job)
+        return job
+
+    def _requeue_inline(self, job: SharedJob):
+        """Hand a job that was to run inline to whichever node claims it next."""
+        self.store.requeue(job.id, self.node_id, job.attempt, 0)
+        self._wakeup.set()
+        return StoredJob(self.store, self.store.get(job.id), self.poll_interval)
+
+    def _acquire_locks(self, job: SharedJob) -> bool:
+        """Lock every resource of a job, or none of them."""
+        acquired = []
+        for name in job.locks:
+            if not self.store.acquire_lock(name, job.lock_owner, self.lease_seconds):
+                self.store.release_locks(acquired, job.lock_owner)
+                return False
+            acquired.append(name)
+        return True
+
+    def _work(self):
+        """Worker thread: claim and run jobs until the queue shuts down."""
+        while not self._stopping.is_set():
+            try:
+                document = self.store.claim(self.node_id, list(self._handlers), self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Error claiming a job: {str(e)}")
+                document = None
+            if document is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job = SharedJob(self, document)
+            if document['attempts'] > self.max_attempts:
+                logger.error(f"Giving up on job {job.id} after {self.max_attempts} attempts")
+                job._finish(Job.FAILED, error=f"Job was abandoned by its worker {self.max_attempts} times")
+                continue
+            if document['attempts'] > 1:
+                logger.warning(f"Resuming job {job.id} (attempt {document['attempts']}) after its worker stopped renewing it")
+            if not self._acquire_locks(job):
+                # Another node is working on the same agent; try again once it is likely done
+                self.store.requeue(job.id, self.node_id, job.attempt, self.poll_interval * 2)
+                continue
+            self._execute(job, self._handlers[job.kind])
+
+    def _execute(self, job: SharedJob, func):
+        """Run a claimed job whose locks are held, then release them."""
+        with self._lock:
+            self._running[job.id] = job
+        try:
+            run_job(job, func)
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+            # Locks belong to the claim, so a node that lost the job cannot release the ones of the node that took it over
+            self.store.release_locks(job.locks, job.lock_owner)
+
+    def _write(self, job: SharedJob, fields: dict, renewal: bool = False) -> bool:
+        """Write job state and new events to the store, if this node still owns the job."""
+        with job.write_lock:
+            if job.lost or (renewal and job.finished):
+                return False
+            events = job.pending_events()
+            try:
+                owned = self.store.update(job.id, self.node_id, job.attempt, fields, events)
+            except Exception as e:
+                logger.error(f"Error writing job {job.id} to the store: {str(e)}")
+                # Sent again with the next write
+                with job._events_condition:
+                    job._flushed -= len(events)
+                return True
+            if not owned:
+                job.lost = True
+                logger.warning(f"Job {job.id} was taken over by another node; its results here are discarded")
+            return owned
+
+    def _keep_leases(self):
+        """Renew the leases and locks of running jobs, writing their new events at the same time."""
+        while not (self._stopping.is_set() and not self._running):
+            time.sleep(self.poll_interval)
+            with self._lock:
+                running = list(self._running.values())
+            for job in running:
+                if self._write(job, {'status': Job.RUNNING, 'started_at': job.started_at, 'timings': dict(job.timings),
+                                     'lease_expires': time.time() + self.lease_seconds}, renewal=True):
+                    try:
+                        self.store.renew_locks(job.locks, job.lock_owner, self.lease_seconds)
+                    except Exception as e:
+                        logger.error(f"Error renewing locks of job {job.id}: {str(e)}")
+
+    def get(self, job_id: str):
+        """Return the job with the given id, or None if it is unknown; jobs running here are returned live."""
+        with self._lock:
+            job = self._running.get(job_id)
+        if job is not None:
+            return job
+        document = self.store.get(job_id)
+        return StoredJob(self.store, document, self.poll_interval) if document is not None else None
+
+    def list(self, status: str = None, limit: int = 50) -> list:
+        """List jobs of every node, newest first."""
+        return [StoredJob(self.store, document, self.poll_interval) for document in self.store.list(status, limit)]
+
+    def stats(self) -> dict:
+        """Return the number of jobs in each state across every node."""
+        return self.store.counts()
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = None):
+        """
+        Stop claiming jobs. Queued jobs stay in the store for the other nodes.
+
+        Args:
+            wait (bool): Block until the jobs running here have finished
+            cancel_pending (bool, optional): Accepted for compatibility with JobQueue; queued jobs are never dropped
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+            if self._keeper is not None:
+                self._keeper.join(timeout=self.poll_interval * 4)
+        logger.info("Distributed job queue shut down")
@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_doc_prefetch")
+
+# Documentation tools the generator's system prompt asks the model to call before it writes any code
+DOC_TOOLS = ('quickstart', 'model_providers', 'agent_tools')
+
+
+class DocumentationPrefetcher:
+    """
+    Fetches the Strands documentation a generation starts with while the user is still filling in the form.
+
+    A client prepares a session when the user starts typing; the documentation lookups then run in the
+    background (through the MCP result cache, so they are shared by every session), and the generation for
+    that session starts with their results in its conversation instead of spending model turns on them.
+    """
+
+    def __init__(self, mcp_manager, tools: list = DOC_TOOLS, ttl: float = 300.0, max_sessions: int = 1000,
+                 wait: float = 10.0, ready=None, warm=None):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            mcp_manager (MCPServerManager): Runs the documentation tools
+            tools (list): Names of the tools to call; tools that are missing or need arguments are skipped
+            ttl (float): Seconds a session, and the documentation fetched for it, is kept
+            max_sessions (int): Sessions kept at once; the oldest are dropped first
+            wait (float): Seconds a generation waits for a fetch that is still running
+            ready (callable, optional): Called with a timeout before fetching; returns False while the MCP
+                servers are not up yet, e.g. WarmUp.wait
+            warm (callable, optional): Run on a thread of its own when new sessions are prepared, e.g. to have
+                a pooled agent ready; sessions prepared while a run is still waiting share it
+        """
+        self.mcp_manager = mcp_manager
+        self.tools = list(tools)
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.wait = wait
+        self.ready = ready
+        self.warm = warm
+        self._sessions = OrderedDict()
+        self._fetch = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        # One thread is enough: every session shares the same fetch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="doc-prefetch")
+        # Warming waits for warm-up and may create an agent, so it never holds up a fetch
+        self._warm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="doc-prefetch-warm")
+        self._warm_pending = False
+        self.prepared = 0
+        self.used = 0
+        self.missed = 0
+
+    def prepare(self, token: str) -> dict:
+        """
+        Start preparing a session, or extend one that was already prepared.
+
+        Args:
+            token (str): The client's session token
+
+        Returns:
+            dict: The session's token, status ('fetching' or 'ready') and seconds until it expires
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            new = token not in self._sessions
+            self._sessions[token] = now + self.ttl
+            self._sessions.move_to_end(token)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            fetch = self._current_fetch(now)
+            if new:
+                self.prepared += 1
+            warm = new and self.warm is not None and not self._warm_pending
+            if warm:
+                self._warm_pending = True
+        if warm:
+            self._warm_executor.submit(self._run_warm)
+        return {
+            'token': token,
+            'status': 'ready' if fetch.done() and not fetch.exception() else 'fetching',
+            'expiresIn': self.ttl
+        }
+
+    def documentation(self, token: str) -> list:
+        """
+        Return the documentation lookups for a generation and end its session.
+
+        A session that has expired or was prepared on another node gets a fresh fetch, which the MCP result
+        cache usually answers at once.
+
+        Args:
+            token (str): The session token sent with the create request
+
+        Returns:
+            list: Dicts with the 'name' of each documentation tool and its 'result', or an empty list if the
+                documentation could not be fetched in time and the model should look it up itself
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            prepared = self._sessions.pop(token, None) is not None
+            fetch = self._current_fetch(now)
+        try:
+            lookups = fetch.result(timeout=self.wait)
+        except FutureTimeoutError:
+            logger.warning(f"Documentation prefetch still running after {self.wait:.0f}s, leaving it to the model")
+            lookups = []
+        except Exception as e:
+            logger.error(f"Error prefetching documentation: {str(e)}")
+            lookups = []
+        with self._lock:
+            if prepared and lookups:
+                self.used += 1
+            else:
+                self.missed += 1
+        return lookups
+
+    def _expire(self, now: float):
+        """Drop expired sessions; called with the lock held."""
+        while self._sessions:
+            token, expires = next(iter(self._sessions.items()))
+            if expires > now:
+                break
+            del self._sessions[token]
+
+    def _current_fetch(self, now: float):
+        """Return the running or recent fetch, starting a new one if there is none; called with the lock held."""
+        fetch = self._fetch
+        stale = now - self._fetched_at > self.ttl
+        if fetch is None or (fetch.done() and (fetch.exception() is not None or stale)):
+            self._fetch = fetch = self._executor.submit(self._fetch_documentation)
+            self._fetched_at = now
+        return fetch
+
+    def _fetch_documentation(self) -> list:
+        """Call every documentation tool that takes no arguments."""
+        if self.ready is not None and not self.ready(self.wait):
+            raise RuntimeError("MCP servers are not ready yet")
+        started = time.monotonic()
+        available = {tool.tool_name: tool for tool in self.mcp_manager.list_tools()}
+        lookups = []
+        for name in self.tools:
+            tool = available.get(name)
+            if tool is None:
+                continue
+            if tool.tool_spec['inputSchema']['json'].get('required'):
+                logger.warning(f"Documentation tool {name} needs arguments, not prefetching it")
+                continue
+            result = self.mcp_manager.call_tool_sync(f"prefetch-{uuid.uuid4().hex}", tool.mcp_tool.name, {})
+            if result.get('status') != 'success':
+                logger.warning(f"Documentation tool {name} failed, not prefetching it")
+                continue
+            lookups.append({'name': name, 'result': {'status': 'success', 'content': result.get('content', [])}})
+        logger.info(f"Prefetched {len(lookups)} documentation lookup(s) in {time.monotonic() - started:.2f}s")
+        return lookups
+
+    def _run_warm(self):
+        with self._lock:
+            # Sessions prepared from now on need a run of their own
+            self._warm_pending = False
+        if self.ready is not None and not self.ready(self.wait):
+            return
+        try:
+            self.warm()
+        except Exception as e:
+            logger.error(f"Error warming up for a prepared session: {str(e)}")
+
+    def stats(self) -> dict:
+        """Return the number of open sessions and how many generations used prefetched documentation."""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'prepared': self.prepared,
+                'used': self.used,
+                'missed': self.missed
+            }
+
+    def close(self):
+        """Stop the prefetch threads; fetches and warm runs that have not started are dropped."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._warm_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,67 @@
+"""
+Fake Strands documentation MCP server for local testing.
+
+Serves canned answers for the documentation tools the generator prompt asks
+for, so the server can run without uvx or network access:
+
+    STRANDS_MCP_COMMAND=python STRANDS_MCP_ARGS=fake_mcp_server.py python server.py
+
+Pass --latency SECONDS to slow every tool call down; the MCP client starts
+servers with a minimal environment, so FAKE_MCP_LATENCY only applies when the
+server is run by hand.
+"""
+import argparse
+import os
+import time
+
+try:
+    from mcp.server.fastmcp import FastMCP as MCPServer
+except ImportError:
+    # mcp 2.x renamed FastMCP to MCPServer
+    from mcp.server.mcpserver import MCPServer
+
+# Optional artificial latency per tool call, in seconds
+LATENCY = float(os.environ.get('FAKE_MCP_LATENCY', '0'))
+
+server = MCPServer("fake-strands-agents")
+
+
+def _respond(text: str) -> str:
+    """Return a canned response after the configured latency."""
+    if LATENCY:
+        time.sleep(LATENCY)
+    return text
+
+
+@server.tool()
+def quickstart() -> str:
+    """Quickstart guide for the Strands Agents SDK."""
+    return _respond(
+        "Create an agent with `from strands import Agent` and `agent = Agent(tools=[...])`, "
+        "then call it with `agent(\"prompt\")`."
+    )
+
+
+@server.tool()
+def model_providers() -> str:
+    """Documentation about the model providers supported by Strands Agents."""
+    return _respond(
+        "Amazon Bedrock is the default provider. Pass `model=\"<model id>\"` or a "
+        "`BedrockModel(model_id=...)` instance to `Agent`."
+    )
+
+
+@server.tool()
+def agent_tools() -> str:
+    """Documentation about tools available to Strands agents."""
+    return _respond(
+        "Define tools with the `@tool` decorator from `strands`. Community tools such as "
+        "`http_request`, `file_read` and `file_write` live in `strands_tools`."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Strands documentation MCP server")
+    parser.add_argument('--latency', type=float, default=LATENCY, help="Seconds each tool call takes")
+    LATENCY = parser.parse_args().latency
+    server.run()
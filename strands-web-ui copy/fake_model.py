@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+
+from strands.models.model import Model
+from strands.types.exceptions import ModelThrottledException
+
+# Seconds each response takes; roughly the shape of a Bedrock generation, scaled down
+LATENCY = float(os.environ.get('FAKE_MODEL_LATENCY', '1.0'))
+# Calls per minute accepted across all instances before the fake provider starts throttling (0 for no limit)
+THROTTLE_RPM = int(os.environ.get('FAKE_MODEL_RPM', '0'))
+# Output tokens reported for the turn that writes the agent
+OUTPUT_TOKENS = int(os.environ.get('FAKE_MODEL_OUTPUT_TOKENS', '800'))
+# Output tokens generated per second after the first one (0 to return the whole output at once)
+TOKENS_PER_SECOND = float(os.environ.get('FAKE_MODEL_TOKENS_PER_SECOND', '0'))
+# Documentation tools called before writing the agent, like the real generator consulting the MCP server
+DOC_LOOKUPS = int(os.environ.get('FAKE_MODEL_DOC_LOOKUPS', '0'))
+# Output tokens of a documentation lookup or closing summary turn
+SHORT_TURN_TOKENS = 40
+# Start of the prompt StrandsAgent.generate_tool_bodies sends
+TOOL_BODIES_PROMPT = "Write the tool bodies"
+# Start of the prompt StrandsAgent.fix_agent_code sends
+FIX_PROMPT = "Fix the Strands agent"
+# Defect in the agent written by a generation, to exercise validation and fix-ups: 'syntax', 'import' or empty
+FAULT = os.environ.get('FAKE_MODEL_FAULT', '')
+# Lines added to the written agent for each fault; the fixed agent does without them
+FAULT_LINES = {'syntax': "def broken(:\n", 'import': "DEFAULT_SETTINGS = load_settings()\n"}
+
+AGENT_TEMPLATE = '''import logging
+from strands import Agent, tool
+
+logger = logging.getLogger(__name__)
+
+
+class {class_name}:
+    """Agent generated by the fake model provider."""
+
+    def __init__(self):
+        self.agent = Agent(system_prompt="You are {name}.")
+
+    def run(self, prompt: str) -> str:
+        """Run the agent on a prompt."""
+        return str(self.agent(prompt))
+
+
+def main():
+    print({class_name}().run("Hello"))
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+_calls = deque()
+_calls_lock = threading.Lock()
+# Prompt prefixes already written to the simulated provider-side prompt cache
+_cached_prefixes = set()
+
+
+def _admit():
+    """Apply the simulated provider-side rate limit."""
+    if THROTTLE_RPM <= 0:
+        return
+    now = time.monotonic()
+    with _calls_lock:
+        while _calls and now - _calls[0] > 60:
+            _calls.popleft()
+        if len(_calls) >= THROTTLE_RPM:
+            raise ModelThrottledException("Too many requests, please wait before trying again.")
+        _calls.append(now)
+
+
+class FakeModel(Model):
+    """
+    Local stand-in for the Bedrock model, for load tests and offline development.
+
+    A generation first calls up to DOC_LOOKUPS of the available MCP tools, then
+    calls file_write with a small agent module and finally answers with a short
+    summary; a request for tool bodies is answered with one JSON object and a
+    request for a fix-up with the agent module, without FAULT. Every turn
+    starts after LATENCY seconds and then produces its output at
+    TOKENS_PER_SECOND, so runs are deterministic apart from timing.
+    Prompt cache points on the tools and system prompt are honoured like
+    Bedrock does: the first call writes the prefix, later calls read it.
+    """
+
+    def __init__(self, **model_config):
+        self.config = {'model_id': 'fake', **model_config}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("The fake model does not support structured output")
+        yield
+
+    def _cached_prefix(self, tool_specs, system_prompt, system_prompt_content) -> str:
+        """Return the request prefix covered by prompt cache points, as configured for Bedrock."""
+        cache_config = self.config.get('cache_config')
+        prefix = ''
+        if self.config.get('cache_tools') or (cache_config is not None and cache_config.tools_ttl):
+            prefix = json.dumps(tool_specs or [])
+        if (any('cachePoint' in block for block in system_prompt_content or [])
+                or (cache_config is not None and cache_config.system_prompt_ttl)):
+            # A cache point covers everything before it, i.e. the tools as well
+            prefix = json.dumps(tool_specs or []) + (system_prompt or '')
+        return prefix
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        _admit()
+        input_tokens = (len(json.dumps(tool_specs or [])) + len(system_prompt or '')
+                        + sum(len(str(block)) for message in messages for block in message.get('content', []))) // 4
+        prefix = self._cached_prefix(tool_specs, system_prompt, kwargs.get('system_prompt_content'))
+        cache_read_tokens = cache_write_tokens = 0
+        if prefix:
+            with _calls_lock:
+                cache_hit = prefix in _cached_prefixes
+                _cached_prefixes.add(prefix)
+            if cache_hit:
+                cache_read_tokens = len(prefix) // 4
+            else:
+                cache_write_tokens = len(prefix) // 4
+            input_tokens -= len(prefix) // 4
+        # Only the turns since the latest prompt count; earlier generations may still be in the history
+        prompt_index = max((index for index, message in enumerate(messages) if message.get('role') == 'user'
+                            and any('text' in block for block in message.get('content', []))), default=0)
+        current = messages[prompt_index:]
+        prompt = ' '.join(block.get('text', '') for block in current[0].get('content', [])) if current else ''
+        tool_uses = [block['toolUse']['name'] for message in current if message.get('role') == 'assistant'
+                     for block in message.get('content', []) if 'toolUse' in block]
+        doc_tools = [spec['name'] for spec in tool_specs or [] if spec['name'] != 'file_write']
+        # Hybrid generations only ask for the bodies of the listed tool methods
+        tool_bodies = re.findall(r"^- (\w+):", prompt, re.MULTILINE) if prompt.startswith(TOOL_BODIES_PROMPT) else None
+        fix = re.match(FIX_PROMPT + r" '(.+?)'", prompt)
+        # Anything but a generation request (e.g. a request to summarize the conversation) gets a plain answer
+        if 'Agent Name:' not in prompt:
+            tool_uses = ['file_write']
+
+        yield {'messageStart': {'role': 'assistant'}}
+        await asyncio.sleep(LATENCY)
+        if tool_bodies is not None:
+            output_tokens = SHORT_TURN_TOKENS * max(1, len(tool_bodies))
+            await self._generate(output_tokens)
+            bodies = {name: f'return {{"success": True, "result": f"{name}: {{query}}"}}' for name in tool_bodies}
+            yield {'contentBlockDelta': {'delta': {'text': json.dumps(bodies)}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+        elif fix is not None:
+            output_tokens = OUTPUT_TOKENS
+            await self._generate(output_tokens)
+            code = AGENT_TEMPLATE.format(class_name=self._class_name(fix.group(1)), name=fix.group(1))
+            yield {'contentBlockDelta': {'delta': {'text': f"Here is the corrected module:\n```python\n{code}```"}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+        elif len(tool_uses) < DOC_LOOKUPS and doc_tools and 'file_write' not in tool_uses:
+            output_tokens = SHORT_TURN_TOKENS
+            await self._generate(output_tokens)
+            for event in self._tool_use(doc_tools[len(tool_uses) % len(doc_tools)], {}):
+                yield event
+        elif 'file_write' not in tool_uses:
+            output_tokens = OUTPUT_TOKENS
+            match = re.search(r"Agent Name: (.+)", prompt)
+            name = match.group(1).strip() if match else 'agent'
+            location = re.search(r"in the '([^']+)' directory with the name '([^' ]+\.py)", prompt)
+            path = (os.path.join(*location.groups()) if location
+                    else os.path.join('agents', name.lower().replace(' ', '_') + '.py'))
+            content = AGENT_TEMPLATE.format(class_name=self._class_name(name), name=name) + FAULT_LINES.get(FAULT, '')
+            await self._generate(output_tokens)
+            for event in self._tool_use('file_write', {'path': path, 'content': content}):
+                yield event
+        else:
+            output_tokens = SHORT_TURN_TOKENS
+            for chunk in ("The agent has been generated ", "and saved with file_write."):
+                await self._generate(output_tokens / 2)
+                yield {'contentBlockDelta': {'delta': {'text': chunk}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+        yield {'metadata': {
+            'usage': {'inputTokens': input_tokens, 'outputTokens': output_tokens,
+                      'totalTokens': input_tokens + cache_read_tokens + cache_write_tokens + output_tokens,
+                      'cacheReadInputTokens': cache_read_tokens, 'cacheWriteInputTokens': cache_write_tokens},
+            'metrics': {'latencyMs': int(LATENCY * 1000)}
+        }}
+
+    @staticmethod
+    def _class_name(name: str) -> str:
+        return ''.join(part.capitalize() for part in re.split(r'\W+', name) if part) or 'Agent'
+
+    @staticmethod
+    async def _generate(tokens: float):
+        """Wait as long as producing the given number of output tokens takes at TOKENS_PER_SECOND."""
+        if TOKENS_PER_SECOND > 0:
+            await asyncio.sleep(tokens / TOKENS_PER_SECOND)
+
+    @staticmethod
+    def _tool_use(name: str, tool_input: dict) -> list:
+        """Return the stream events of a turn that ends with a single tool call."""
+        return [
+            {'contentBlockStart': {'start': {'toolUse': {'toolUseId': uuid.uuid4().hex, 'name': name}}}},
+            {'contentBlockDelta': {'delta': {'toolUse': {'input': json.dumps(tool_input)}}}},
+            {'contentBlockStop': {}},
+            {'messageStop': {'stopReason': 'tool_use'}}
+        ]
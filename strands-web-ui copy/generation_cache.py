@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_generation_cache")
+
+
+def spec_key(agent_name: str, agent_purpose: str, required_tools: list, model_id: str, prompt_version: str) -> str:
+    """
+    Build the content address of an agent generation.
+
+    Args:
+        agent_name (str): The name of the agent
+        agent_purpose (str): The purpose and functionality of the agent
+        required_tools (list): Tools the agent should use; order and duplicates do not matter
+        model_id (str): The model that generates the code
+        prompt_version (str): Version of the generator system prompt
+
+    Returns:
+        str: Hex digest identifying the generation
+    """
+    canonical = json.dumps({
+        'name': agent_name.strip(),
+        'purpose': agent_purpose.strip(),
+        'tools': sorted(set(tool.strip() for tool in required_tools or [])),
+        'model_id': model_id,
+        'prompt_version': prompt_version
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    """Content-addressed cache of generated agent code, stored on disk and optionally in MongoDB."""
+
+    def __init__(self, cache_dir: str, collection=None, max_entries: int = 1000, max_bytes: int = 100 * 1024 * 1024,
+                 max_age: float = 7 * 24 * 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory holding one JSON file per cached generation
+            collection (pymongo.collection.Collection, optional): MongoDB collection shared by all servers
+            max_entries (int): Maximum number of generations kept on disk
+            max_bytes (int): Maximum total size of the on-disk cache
+            max_age (float): Seconds after which a cached generation expires
+        """
+        self.cache_dir = cache_dir
+        self.collection = collection
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def contains(self, key: str) -> bool:
+        """
+        Cheap check for a locally cached generation, without touching MongoDB or the hit counters.
+
+        Applies the same age and validity checks as get(), so an entry it reports can be read back.
+        """
+        return self._read_disk(key, touch=False) is not None
+
+    def get(self, key: str) -> dict:
+        """
+        Look up a cached generation.
+
+        Args:
+            key (str): The spec key from spec_key()
+
+        Returns:
+            dict: The entry with 'code', 'metadata' and 'created_at', or None on a miss
+        """
+        entry = self._read_disk(key)
+        if entry is None and self.collection is not None:
+            entry = self._read_mongo(key)
+            if entry is not None:
+                # Keep a local copy so the next hit does not need a database round-trip
+                self._write_disk(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key: str, code: str, metadata: dict = None):
+        """
+        Store generated code under its spec key.
+
+        Args:
+            key (str): The spec key from spec_key()
+            code (str): The generated agent code
+            metadata (dict, optional): Details about the generation, e.g. the spec and model id
+        """
+        entry = {
+            'code': code,
+            'metadata': metadata or {},
+            'created_at': time.time()
+        }
+        self._write_disk(key, entry)
+
+        if self.collection is not None:
+            try:
+                self._ensure_indexes()
+                self.collection.replace_one({'_id': key}, {
+                    '_id': key,
+                    'code': code,
+                    'metadata': metadata or {},
+                    'size': len(code.encode('utf-8')),
+                    'created_at': datetime.fromtimestamp(entry['created_at'])
+                }, upsert=True)
+            except Exception as e:
+                logger.warning(f"Failed to store generation {key} in MongoDB: {str(e)}")
+
+        self.evict()
+
+    def _read_disk(self, key: str, touch: bool = True) -> dict:
+        """Load an unexpired, well-formed entry from disk, by default refreshing its access time for LRU eviction."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached generation {path}: {str(e)}")
+            return None
+
+        if (not isinstance(entry, dict) or not isinstance(entry.get('code'), str)
+                or not isinstance(entry.get('created_at'), (int, float))):
+            logger.warning(f"Ignoring malformed cached generation {path}")
+            return None
+        if time.time() - entry['created_at'] > self.max_age:
+            self._remove(path)
+            return None
+        if touch:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return entry
+
+    def _read_mongo(self, key: str) -> dict:
+        """Load an unexpired entry from MongoDB."""
+        try:
+            document = self.collection.find_one({'_id': key})
+        except Exception as e:
+            logger.warning(f"Failed to read generation {key} from MongoDB: {str(e)}")
+            return None
+        if document is None:
+            return None
+
+        created_at = document['created_at'].timestamp()
+        if time.time() - created_at > self.max_age:
+            return None
+        return {
+            'code': document['code'],
+            'metadata': document.get('metadata', {}),
+            'created_at': created_at
+        }
+
+    def _write_disk(self, key: str, entry: dict):
+        """Write an entry atomically so concurrent readers never see a partial file."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write cached generation {path}: {str(e)}")
+            self._remove(tmp_path)
+
+    def _ensure_indexes(self):
+        """Create the MongoDB index used for age-based eviction once."""
+        if self._indexes_ready:
+            return
+        self.collection.create_index('created_at')
+        self._indexes_ready = True
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop expired generations, then the least recently used ones until the size limits hold."""
+        now = time.time()
+        files = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        # Least recently used first; a hit refreshes the file's modification time
+        files.sort()
+        total_bytes = sum(size for _, size, _ in files)
+        evicted = 0
+        for index, (mtime, size, path) in enumerate(files):
+            remaining = len(files) - index
+            if now - mtime <= self.max_age and remaining <= self.max_entries and total_bytes <= self.max_bytes:
+                continue
+            self._remove(path)
+            total_bytes -= size
+            evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} cached generation(s)")
+
+        if self.collection is not None:
+            try:
+                self.collection.delete_many({'created_at': {'$lt': datetime.now() - timedelta(seconds=self.max_age)}})
+            except Exception as e:
+                logger.warning(f"Failed to evict expired generations from MongoDB: {str(e)}")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,572 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from async_waiters import AsyncWaiters
+from metrics import PHASE_SECONDS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_job_queue")
+
+# Seconds between attempts of an async job to take resource locks held by other jobs
+ASYNC_LOCK_POLL_INTERVAL = 0.05
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot accept any more pending jobs."""
+
+
+class DeferredJob(Exception):
+    """Raised by a job function running inline (Job.inline) to have the job queued for a worker instead."""
+
+
+class JobLostError(Exception):
+    """Raised by Job.ensure_owned() when another worker has taken the job over; the job must stop its work."""
+
+
+class Job:
+    """A unit of background work tracked by the JobQueue."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    # Token events beyond this many are dropped so long generations cannot exhaust memory
+    MAX_EVENTS = 10000
+
+    def __init__(self, kind: str, payload: dict = None, trace_id: str = None, locks: list = None):
+        """
+        Initialize a job.
+
+        Args:
+            kind (str): The type of work, e.g. 'create-agent'
+            payload (dict, optional): The request data the job was created from
+            trace_id (str, optional): Id of the request that created the job, for correlating logs
+            locks (list, optional): Names of resources the job uses exclusively, e.g. agent files; jobs sharing
+                a name run one after the other
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.locks = sorted(set(locks or []))
+        self.payload = payload or {}
+        self.trace_id = trace_id or self.id
+        self.status = Job.QUEUED
+        # Set while the job runs on the thread of the request that created it (see JobQueue.run_inline)
+        self.inline = False
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        # Monotonic clocks for timings that are not affected by wall-clock changes
+        self._created_monotonic = time.monotonic()
+        self._started_monotonic = None
+        self._finished_monotonic = None
+        # Progress events (status changes, model tokens, tool calls) for streaming subscribers
+        self.events = []
+        self._events_condition = threading.Condition()
+        self._async_waiters = AsyncWaiters()
+        # Seconds spent in each phase of the work, filled in by the job function (from several threads for batches)
+        self.timings = {}
+        self._timings_lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        """True once the job is done or has failed."""
+        return self.status in (Job.DONE, Job.FAILED)
+
+    def emit(self, event_type: str, data: dict = None):
+        """
+        Record a progress event and wake up streaming subscribers.
+
+        Args:
+            event_type (str): The event name, e.g. 'token' or 'tool_start'
+            data (dict, optional): JSON-serializable event payload
+        """
+        with self._events_condition:
+            if event_type == 'token' and len(self.events) >= Job.MAX_EVENTS:
+                return
+            self.events.append({'type': event_type, 'data': data or {}})
+            self._events_condition.notify_all()
+            self._async_waiters.wake_all()
+
+    def record_timing(self, phase: str, seconds: float):
+        """
+        Add the duration of a phase to the job's timings and the phase histogram.
+
+        Args:
+            phase (str): The phase name, e.g. 'generation' or 'save'
+            seconds (float): Seconds the phase took
+        """
+        with self._timings_lock:
+            self.timings[phase] = round(self.timings.get(phase, 0.0) + seconds, 3)
+        PHASE_SECONDS.observe(seconds, phase=phase)
+
+    @contextmanager
+    def timed(self, phase: str):
+        """Context manager recording the duration of its block as a phase of the job."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_timing(phase, time.monotonic() - started)
+
+    def ensure_owned(self):
+        """
+        Check, before a side effect such as writing a file or saving the agent, that the job is still this
+        worker's to run.
+
+        Jobs of the local queue always are; shared jobs can be taken over by another node (see SharedJob).
+
+        Raises:
+            JobLostError: If another worker has taken the job over
+        """
+
+    def _finish(self, status: str, result=None, error: str = None):
+        """Set the final state and emit the final event atomically for subscribers."""
+        with self._events_condition:
+            self.result = result
+            self.error = error
+            self.finished_at = datetime.now()
+            self._finished_monotonic = time.monotonic()
+            self.status = status
+            if status == Job.DONE:
+                self.events.append({'type': 'done', 'data': {'result': result}})
+            else:
+                self.events.append({'type': 'failed', 'data': {'error': error}})
+            self._events_condition.notify_all()
+            self._async_waiters.wake_all()
+
+    def _requeue(self):
+        """Put a job that stopped running inline back into the queued state."""
+        self.inline = False
+        self.status = Job.QUEUED
+        self.started_at = None
+        self._started_monotonic = None
+        self.emit('status', {'status': Job.QUEUED})
+
+    def iter_events(self, start: int = 0, heartbeat: float = 15.0):
+        """
+        Yield progress events until the job has finished.
+
+        Args:
+            start (int): Index of the first event to yield, used to resume a stream
+            heartbeat (float): Seconds without events after which None is yielded as a keep-alive
+
+        Yields:
+            tuple: (index, event) pairs, or None as a keep-alive
+        """
+        index = start
+        while True:
+            with self._events_condition:
+                if index >= len(self.events) and not self.finished:
+                    self._events_condition.wait(heartbeat)
+                pending = self.events[index:]
+                finished = self.finished
+
+            if not pending and not finished:
+                yield None
+            for event in pending:
+                yield index, event
+                index += 1
+            if finished and not pending:
+                return
+
+    async def iter_events_async(self, start: int = 0, heartbeat: float = 15.0):
+        """Like iter_events(), as an async generator that waits without holding a thread."""
+        index = start
+        wakeup = self._async_waiters.register()
+        try:
+            while True:
+                with self._events_condition:
+                    wait = index >= len(self.events) and not self.finished
+                    if wait:
+                        wakeup.clear()
+                if wait:
+                    await self._async_waiters.wait(wakeup, heartbeat)
+                with self._events_condition:
+                    pending = self.events[index:]
+                    finished = self.finished
+
+                if not pending and not finished:
+                    yield None
+                for event in pending:
+                    yield index, event
+                    index += 1
+                if finished and not pending:
+                    return
+        finally:
+            self._async_waiters.unregister(wakeup)
+
+    @property
+    def queue_wait_seconds(self) -> float:
+        """Seconds the job spent waiting for a worker."""
+        end = self._started_monotonic or time.monotonic()
+        return end - self._created_monotonic
+
+    @property
+    def run_seconds(self) -> float:
+        """Seconds the job has spent running (None while still queued)."""
+        if self._started_monotonic is None:
+            return None
+        end = self._finished_monotonic or time.monotonic()
+        return end - self._started_monotonic
+
+    def to_dict(self) -> dict:
+        """Return a JSON-serializable view of the job."""
+        return {
+            'id': self.id,
+            'trace_id': self.trace_id,
+            'kind': self.kind,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'queue_wait_seconds': round(self.queue_wait_seconds, 3),
+            'run_seconds': round(self.run_seconds, 3) if self.run_seconds is not None else None,
+            'timings': self.timings,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+def _start_job(job: Job):
+    """Mark a job as running and record how long it waited."""
+    job.status = Job.RUNNING
+    job.started_at = datetime.now()
+    job._started_monotonic = time.monotonic()
+    job.record_timing('queue_wait', job.queue_wait_seconds)
+    job.emit('status', {'status': Job.RUNNING, 'queue_wait_seconds': round(job.queue_wait_seconds, 3)})
+    logger.info(f"Running {job.kind} job {job.id} [trace {job.trace_id}] after {job.queue_wait_seconds:.2f}s in queue")
+
+
+def run_job(job: Job, func):
+    """Run a job on the calling thread and record its outcome; DeferredJob is passed on to the caller."""
+    _start_job(job)
+    try:
+        job._finish(Job.DONE, result=func(job))
+    except DeferredJob:
+        raise
+    except JobLostError as e:
+        logger.warning(f"Job {job.id} stopped: {str(e)}")
+        job._finish(Job.FAILED, error=str(e))
+    except Exception as e:
+        logger.error(f"Job {job.id} failed: {str(e)}")
+        job._finish(Job.FAILED, error=str(e))
+    logger.info(f"Job {job.id} [trace {job.trace_id}] {job.status} in {job.run_seconds:.2f}s: {job.timings}")
+
+
+async def run_job_async(job: Job, func):
+    """Run a job whose function is a coroutine on the calling event loop and record its outcome."""
+    _start_job(job)
+    try:
+        job._finish(Job.DONE, result=await func(job))
+    except asyncio.CancelledError:
+        job._finish(Job.FAILED, error="Job was cancelled")
+        raise
+    except Exception as e:
+        logger.error(f"Job {job.id} failed: {str(e)}")
+        job._finish(Job.FAILED, error=str(e))
+    logger.info(f"Job {job.id} [trace {job.trace_id}] {job.status} in {job.run_seconds:.2f}s: {job.timings}")
+
+
+class JobQueue:
+    """Bounded worker pool that runs jobs in the background and keeps their state."""
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 100, max_history: int = 1000,
+                 max_async_jobs: int = 256):
+        """
+        Initialize the job queue.
+
+        Args:
+            max_workers (int): Number of worker threads running jobs concurrently
+            max_queued (int): Maximum number of jobs waiting for a worker before submissions are rejected
+            max_history (int): Maximum number of finished jobs kept for status lookups
+            max_async_jobs (int): Number of jobs submitted with submit_async() running concurrently
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self.max_async_jobs = max_async_jobs
+        # Created on first use, on the event loop that runs the async jobs
+        self._async_slots = None
+        self._async_tasks = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="strands-job")
+        self._jobs = OrderedDict()
+        # Reentrant: a future cancelled at shutdown runs its callback on the thread that is dispatching it
+        self._lock = threading.RLock()
+        # Names of the resources held by running jobs, and by name the jobs waiting for one of them; a job is
+        # handed to a worker only once all of its resources are free, so waiting jobs hold no thread
+        self._held = set()
+        self._parked = {}
+        self._released = threading.Condition(self._lock)
+        logger.info(f"Job queue started with {max_workers} workers (max {max_queued} queued jobs)")
+
+    def submit(self, kind: str, func, payload: dict = None, trace_id: str = None, locks: list = None) -> Job:
+        """
+        Queue a job for execution on the worker pool.
+
+        Args:
+            kind (str): The type of work
+            func (callable): Called with the Job on a worker thread; its return value becomes the job result
+            payload (dict, optional): The request data the job was created from
+            trace_id (str, optional): Id of the request that created the job
+            locks (list, optional): Names of resources the job uses exclusively
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting for a worker
+        """
+        job = self._add(kind, payload, trace_id, locks)
+        self._queue(job, func)
+        logger.info(f"Queued {kind} job {job.id} [trace {job.trace_id}]")
+        return job
+
+    def _queue(self, job: Job, func):
+        """Hand a registered job to the worker pool, or park it until its resources are free."""
+        with self._lock:
+            self._dispatch(job, func)
+
+    def _dispatch(self, job: Job, func):
+        """Submit a job whose resources are free, taking them, or park it on a held one; called with the lock held."""
+        busy = next((name for name in job.locks if name in self._held), None)
+        if busy is not None:
+            self._parked.setdefault(busy, []).append((job, func))
+            return
+        self._held.update(job.locks)
+        try:
+            future = self._executor.submit(self._run, job, func)
+        except RuntimeError:
+            # The worker pool has shut down
+            self._held.difference_update(job.locks)
+            job._finish(Job.FAILED, error="Server shutting down")
+            return
+        future.add_done_callback(lambda done: self._fail_cancelled(job, done))
+
+    def _acquire(self, job: Job) -> bool:
+        """Take every resource of a job if all of them are free, without parking it."""
+        with self._lock:
+            if any(name in self._held for name in job.locks):
+                return False
+            self._held.update(job.locks)
+            return True
+
+    def _release(self, job: Job):
+        """Free the resources of a job and dispatch the jobs parked on them, oldest first."""
+        with self._lock:
+            self._held.difference_update(job.locks)
+            waiting = []
+            for name in job.locks:
+                waiting.extend(self._parked.pop(name, []))
+            for parked, func in waiting:
+                self._dispatch(parked, func)
+            self._released.notify_all()
+
+    def _fail_cancelled(self, job: Job, future):
+        """Finish a job whose run was dropped at shutdown, so its clients are not left waiting."""
+        if future.cancelled():
+            self._release(job)
+            if not job.finished:
+                job._finish(Job.FAILED, error="Server shutting down")
+
+    def submit_async(self, kind: str, func, payload: dict = None, trace_id: str = None, locks: list = None) -> Job:
+        """
+        Queue a job whose function is a coroutine, to run as a task on the calling event loop.
+
+        Up to max_async_jobs of these run at once, independent of the worker threads; a job that mostly waits
+        on the model holds no thread while it does. Must be called from a coroutine.
+
+        Args:
+            kind (str): The type of work
+            func (callable): Coroutine function called with the Job; its return value becomes the job result
+            payload (dict, optional): The request data the job was created from
+            trace_id (str, optional): Id of the request that created the job
+            locks (list, optional): Names of resources the job uses exclusively, shared with threaded jobs
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting to run
+        """
+        job = self._add(kind, payload, trace_id, locks)
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_async_jobs)
+        task = asyncio.get_running_loop().create_task(self._run_async(job, func), name=f"strands-job-{job.id}")
+        # The loop only keeps weak references to tasks
+        self._async_tasks[task] = job
+        task.add_done_callback(lambda done: self._async_tasks.pop(done, None))
+        logger.info(f"Queued async {kind} job {job.id} [trace {job.trace_id}]")
+        return job
+
+    def _add(self, kind: str, payload: dict, trace_id: str, locks: list) -> Job:
+        """Create and register a queued job, unless too many are waiting already."""
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == Job.QUEUED)
+            if queued >= self.max_queued:
+                raise QueueFullError(f"Job queue is full ({queued} jobs waiting)")
+
+            job = Job(kind, payload, trace_id, locks)
+            self._jobs[job.id] = job
+            self._prune_history()
+        return job
+
+    def run_inline(self, kind: str, func, payload: dict = None, trace_id: str = None, locks: list = None) -> Job:
+        """
+        Run a job synchronously on the calling thread, for work too cheap to queue behind slow jobs.
+
+        If another job holds one of the job's locks, the job is queued instead of waiting for it; so is a job
+        whose function raises DeferredJob.
+
+        Args:
+            kind (str): The type of work
+            func (callable): Called with the Job; its return value becomes the job result
+            payload (dict, optional): The request data the job was created from
+            trace_id (str, optional): Id of the request that created the job
+            locks (list, optional): Names of resources the job uses exclusively
+
+        Returns:
+            Job: The finished job, or the queued job
+        """
+        job = Job(kind, payload, trace_id, locks)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune_history()
+        if not self._acquire(job):
+            logger.info(f"Resources of {kind} job {job.id} are busy, queuing it instead of running it inline")
+            self._queue(job, func)
+            return job
+        job.inline = True
+        try:
+            run_job(job, func)
+        except DeferredJob as e:
+            logger.info(f"Queuing {kind} job {job.id} that cannot finish inline: {str(e)}")
+            job._requeue()
+        finally:
+            self._release(job)
+        if not job.finished:
+            self._queue(job, func)
+        return job
+
+    def _run(self, job: Job, func):
+        """Run a job on a worker thread, with its resources taken by _dispatch, and record its outcome."""
+        try:
+            run_job(job, func)
+        finally:
+            self._release(job)
+
+    async def _run_async(self, job: Job, func):
+        """Run an async job once a slot and its resources are free, and record its outcome."""
+        try:
+            async with self._async_slots:
+                # Polled rather than waited for, since threaded jobs hold the same resources
+                while not self._acquire(job):
+                    await asyncio.sleep(ASYNC_LOCK_POLL_INTERVAL)
+                try:
+                    await run_job_async(job, func)
+                finally:
+                    self._release(job)
+        except asyncio.CancelledError:
+            # Jobs cancelled before they started are still waiting for their outcome
+            if not job.finished:
+                job._finish(Job.FAILED, error="Job was cancelled")
+
+    async def drain_async(self, timeout: float = None):
+        """
+        Cancel async jobs that have not started and wait for the running ones, e.g. before the event loop stops.
+
+        Args:
+            timeout (float, optional): Seconds to wait; jobs still running then are cancelled
+        """
+        tasks = dict(self._async_tasks)
+        for task, job in tasks.items():
+            if job.status == Job.QUEUED:
+                task.cancel()
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            logger.warning(f"Cancelling async job {tasks[task].id} at shutdown")
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    def _prune_history(self):
+        """Drop the oldest finished jobs once the history limit is exceeded."""
+        excess = len(self._jobs) - self.max_history
+        if excess <= 0:
+            return
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].status in (Job.DONE, Job.FAILED):
+                del self._jobs[job_id]
+                excess -= 1
+
+    def get(self, job_id: str) -> Job:
+        """Return the job with the given id, or None if it is unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, status: str = None, limit: int = 50) -> list:
+        """
+        List jobs, newest first.
+
+        Args:
+            status (str, optional): Only return jobs in this state
+            limit (int): Maximum number of jobs to return
+
+        Returns:
+            list: Matching jobs
+        """
+        with self._lock:
+            jobs = list(reversed(self._jobs.values()))
+        if status:
+            jobs = [job for job in jobs if job.status == status]
+        return jobs[:limit]
+
+    def stats(self) -> dict:
+        """Return the number of jobs in each state."""
+        counts = {Job.QUEUED: 0, Job.RUNNING: 0, Job.DONE: 0, Job.FAILED: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = None):
+        """
+        Stop accepting work.
+
+        Args:
+            wait (bool): Block until running jobs have finished
+            cancel_pending (bool, optional): Drop jobs still waiting for a worker, failing them; defaults to not wait
+        """
+        if cancel_pending is None:
+            cancel_pending = not wait
+        dropped = []
+        with self._lock:
+            if cancel_pending:
+                dropped = [job for waiting in self._parked.values() for job, _ in waiting]
+                self._parked.clear()
+            elif wait:
+                # Parked jobs are handed to the workers as the jobs ahead of them finish
+                while self._parked:
+                    self._released.wait()
+        for job in dropped:
+            job._finish(Job.FAILED, error="Server shutting down")
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+        logger.info("Job queue shut down")
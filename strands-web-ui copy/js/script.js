@@ -42,12 +42,19 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Counter for custom tool IDs
     let customToolCounter = 0;
+    
+    // Session prepared on the server while the form is being filled in (null until the user starts typing)
+    let prepareToken = null;
+    
+    // Cursor of the next page of agents, null once the whole list is shown
+    let agentsCursor = null;
 
     // Event Listeners
     createAgentBtn.addEventListener('click', showFormSection);
     cancelBtn.addEventListener('click', showWelcomeSection);
     addCustomToolBtn.addEventListener('click', addCustomTool);
     agentForm.addEventListener('submit', handleFormSubmit);
+    agentForm.addEventListener('input', prepareSession);
     createAnotherBtn.addEventListener('click', function() {
         showWelcomeSection();
         fetchAgents(); // Refresh the agents list
@@ -62,6 +69,7 @@ document.addEventListener('DOMContentLoaded', function() {
         agentForm.reset();
         customToolsContainer.innerHTML = '';
         customToolCounter = 0;
+        prepareToken = null;
     }
 
     function showFormSection() {
@@ -77,6 +85,30 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log('After: formSection hidden:', formSection.classList.contains('hidden'));
     }
 
+    async function prepareSession() {
+        // Let the server fetch the documentation the generation needs while the user is still typing
+        if (prepareToken !== null) {
+            return;
+        }
+        prepareToken = '';
+        try {
+            const response = await fetch('/api/prepare', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({})
+            });
+            if (response.ok) {
+                const data = await response.json();
+                prepareToken = data.session.token;
+            }
+        } catch (error) {
+            // Only an optimization; the agent is still created without it
+            console.warn('Could not prepare session:', error);
+        }
+    }
+
     function showSuccessSection(agentData) {
         welcomeSection.classList.add('hidden');
         formSection.classList.add('hidden');
@@ -145,6 +177,9 @@ document.addEventListener('DOMContentLoaded', function() {
             standardTools: standardTools,
             customTools: customTools
         };
+        if (prepareToken) {
+            agentData.prepareToken = prepareToken;
+        }
         
         try {
             // Call the backend API
@@ -182,19 +217,69 @@ document.addEventListener('DOMContentLoaded', function() {
             throw new Error('Network response was not ok');
         }
         
-        return response.json();
+        // Generation runs as a background job; wait for it to finish
+        const data = await response.json();
+        return waitForJob(data.job.id);
+    }
+    
+    function waitForJob(jobId) {
+        // Follow the job's progress events until it is done or failed
+        const loadingMessage = document.getElementById('loading-message');
+        const loadingProgress = document.getElementById('loading-progress');
+        let tokenCount = 0;
+        loadingMessage.textContent = 'Creating your agent...';
+        loadingProgress.textContent = '';
+        
+        return new Promise((resolve, reject) => {
+            const events = new EventSource(`/api/jobs/${jobId}/events`);
+            
+            events.onerror = () => {
+                // EventSource reconnects on its own unless the server rejected the stream
+                if (events.readyState === EventSource.CLOSED) {
+                    reject(new Error('Lost connection to the server'));
+                }
+            };
+            
+            events.addEventListener('phase', event => {
+                const phase = JSON.parse(event.data).name;
+                loadingMessage.textContent = {
+                    warming_up: 'Waiting for the server to finish starting...',
+                    generating: 'Generating your agent...',
+                    post_processing: 'Adding custom tools...',
+                    saving: 'Saving your agent...'
+                }[phase] || 'Creating your agent...';
+            });
+            events.addEventListener('tool_start', event => {
+                loadingProgress.textContent = `Running tool: ${JSON.parse(event.data).name}`;
+            });
+            events.addEventListener('token', () => {
+                tokenCount++;
+                loadingProgress.textContent = `Received ${tokenCount} chunks from the model`;
+            });
+            events.addEventListener('done', event => {
+                events.close();
+                resolve(JSON.parse(event.data).result);
+            });
+            events.addEventListener('failed', event => {
+                events.close();
+                reject(new Error(JSON.parse(event.data).error || 'Agent creation failed'));
+            });
+        });
     }
     
-    async function fetchAgents() {
+    async function fetchAgents(after = null) {
         try {
-            const response = await fetch('/api/agents');
+            // The listing is paginated: the first page, or the page after the agents shown already
+            const url = after ? `/api/agents?after=${encodeURIComponent(after)}` : '/api/agents';
+            const response = await fetch(url);
             if (!response.ok) {
                 throw new Error('Failed to fetch agents');
             }
             
             const data = await response.json();
-            if (data.success && data.agents && data.agents.length > 0) {
-                displayAgents(data.agents);
+            if (data.success && data.agents && (data.agents.length > 0 || after)) {
+                agentsCursor = data.has_more ? data.next_cursor : null;
+                displayAgents(data.agents, Boolean(after));
             } else {
                 console.log('No agents found or empty response');
             }
@@ -203,7 +288,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    function displayAgents(agents) {
+    function displayAgents(agents, append = false) {
         // Create agents container if it doesn't exist
         let agentsContainer = document.querySelector('.agents-container');
         if (!agentsContainer) {
@@ -215,13 +300,21 @@ document.addEventListener('DOMContentLoaded', function() {
             heading.textContent = 'Your Agents';
             heading.className = 'agents-heading';
             
-            // Insert the heading and container before the create button
+            // Button fetching the next page of agents, shown while there is one
+            const loadMoreBtn = document.createElement('button');
+            loadMoreBtn.textContent = 'Load more agents';
+            loadMoreBtn.className = 'load-more-btn';
+            loadMoreBtn.addEventListener('click', () => fetchAgents(agentsCursor));
+            
+            // Insert the heading, container and button before the create button
             welcomeSection.insertBefore(heading, createAgentBtn);
             welcomeSection.insertBefore(agentsContainer, createAgentBtn);
-        } else {
+            welcomeSection.insertBefore(loadMoreBtn, createAgentBtn);
+        } else if (!append) {
             // Clear existing agents
             agentsContainer.innerHTML = '';
         }
+        document.querySelector('.load-more-btn').classList.toggle('hidden', !agentsCursor);
         
         // Create agent widgets
         agents.forEach(agent => {
@@ -244,15 +337,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 </div>
             `;
             
-            agentsContainer.appendChild(agentWidget);
-        });
-        
-        // Add event listeners to the "Use Agent" buttons
-        document.querySelectorAll('.use-agent-btn').forEach(button => {
-            button.addEventListener('click', function() {
+            // Add an event listener to the "Use Agent" button
+            agentWidget.querySelector('.use-agent-btn').addEventListener('click', function() {
                 const agentName = this.getAttribute('data-agent-name');
                 alert(`Using agent: ${agentName} - This functionality is not implemented yet.`);
             });
+            
+            agentsContainer.appendChild(agentWidget);
         });
     }
 });
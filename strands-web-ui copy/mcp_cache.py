@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_mcp_cache")
+
+
+def _normalize(value):
+    """Normalize tool arguments so equivalent calls share a cache key."""
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+class ToolResultCache:
+    """TTL/LRU cache for MCP tool results, optionally persisted to disk."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0, cache_dir: str = None, tools: list = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of results kept in memory
+            ttl (float): Seconds a cached result stays valid
+            cache_dir (str, optional): Directory for the on-disk store; memory only when omitted
+            tools (list, optional): Names of the tools whose results may be cached; all tools when omitted
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.tools = set(tools) if tools else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def is_cacheable(self, name: str) -> bool:
+        """Check whether results of the given tool may be cached."""
+        return self.tools is None or name in self.tools
+
+    @staticmethod
+    def key(name: str, arguments: dict = None) -> str:
+        """Build the cache key for a tool name and its arguments."""
+        canonical = json.dumps(
+            {'name': name, 'arguments': _normalize(arguments or {})},
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, name: str, arguments: dict, tool_use_id: str):
+        """
+        Look up a cached tool result.
+
+        Args:
+            name (str): The MCP tool name
+            arguments (dict): The tool arguments
+            tool_use_id (str): Tool use id of the current call, stamped on the returned result
+
+        Returns:
+            dict: The cached tool result, or None on a miss
+        """
+        key = self.key(name, arguments)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            entry = self._read_disk(key, now)
+            if entry is not None:
+                self._store(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return dict(entry[1], toolUseId=tool_use_id)
+
+    def put(self, name: str, arguments: dict, result: dict):
+        """
+        Cache a successful tool result.
+
+        Args:
+            name (str): The MCP tool name
+            arguments (dict): The tool arguments
+            result (dict): The tool result returned by the MCP client
+        """
+        if result.get('status') != 'success':
+            return
+        key = self.key(name, arguments)
+        entry = (time.time() + self.ttl, result)
+        self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def _store(self, key: str, entry: tuple):
+        """Insert an entry in memory and evict the least recently used ones over the limit."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _read_disk(self, key: str, now: float):
+        """Load an unexpired entry from the on-disk store."""
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, key + '.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable MCP cache entry {path}: {str(e)}")
+            return None
+        if data['expires_at'] <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return (data['expires_at'], data['result'])
+
+    def _write_disk(self, key: str, entry: tuple):
+        """Persist an entry to the on-disk store."""
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, key + '.json')
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'expires_at': entry[0], 'result': entry[1]}, f, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write MCP cache entry {path}: {str(e)}")
+
+    def clear(self):
+        """Drop every cached entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries)
+            }
@@ -0,0 +1,285 @@
+import itertools
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from metrics import MCP_CALL_SECONDS
+
+if TYPE_CHECKING:
+    from strands.tools.mcp import MCPClient
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_mcp_manager")
+
+
+class _MultiplexedMCPClient:
+    """Stands in for an MCPClient on shared MCP tools and routes every call through the manager."""
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def call_tool_sync(self, tool_use_id, name, arguments=None, **kwargs):
+        return self._manager.call_tool_sync(tool_use_id, name, arguments, **kwargs)
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, **kwargs):
+        return await self._manager.call_tool_async(tool_use_id, name, arguments, **kwargs)
+
+    def __getattr__(self, name):
+        # Anything else (e.g. listing prompts) goes to whichever server is next in line
+        return getattr(self._manager.next_client(), name)
+
+
+class MCPServerManager:
+    """Runs a small set of long-lived MCP server processes shared by every StrandsAgent."""
+
+    def __init__(self, command: str = "uvx", args: list = None, size: int = 1, health_check_interval: float = 30.0,
+                 cache=None, max_result_chars: int = 0):
+        """
+        Initialize the manager.
+
+        Args:
+            command (str): Executable that starts the MCP server
+            args (list, optional): Arguments for the MCP server command
+            size (int): Number of MCP server processes to run
+            health_check_interval (float): Seconds between background health checks, 0 to disable
+            cache (ToolResultCache, optional): Cache for tool results such as documentation lookups
+            max_result_chars (int): Text longer than this in a tool result is cut off before it reaches
+                the model, 0 for no limit
+        """
+        self.command = command
+        self.args = args if args is not None else ["strands-agents-mcp-server"]
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.cache = cache
+        self.max_result_chars = max_result_chars
+        self._clients = []
+        self._tools = None
+        self._round_robin = itertools.count()
+        self._restarts = 0
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._monitor = None
+        self._proxy = _MultiplexedMCPClient(self)
+
+    def _new_client(self) -> "MCPClient":
+        """Start a new MCP server process and client session."""
+        # Imported lazily so that creating the manager does not load the MCP libraries
+        from mcp import stdio_client, StdioServerParameters
+        from strands.tools.mcp import MCPClient
+
+        client = MCPClient(lambda: stdio_client(
+            StdioServerParameters(
+                command=self.command,
+                args=self.args
+            )
+        ))
+        client.start()
+        return client
+
+    def start(self):
+        """Start the MCP server processes and the background health monitor."""
+        with self._lock:
+            if self._clients:
+                return
+            self._stopped.clear()
+            self._clients = [self._new_client() for _ in range(self.size)]
+        logger.info(f"Started {self.size} shared MCP server(s): {self.command} {' '.join(self.args)}")
+
+        if self.health_check_interval > 0:
+            self._monitor = threading.Thread(target=self._monitor_loop, name="mcp-health-monitor", daemon=True)
+            self._monitor.start()
+
+    def list_tools(self) -> list:
+        """
+        Return the MCP tools, bound to the shared connection layer.
+
+        The tool list is fetched once and reused by every agent, so building an
+        agent no longer costs an MCP round-trip.
+
+        Returns:
+            list: MCP tools ready to be passed to a strands Agent
+        """
+        with self._lock:
+            if self._tools is not None:
+                return list(self._tools)
+
+        tools = list(self.next_client().list_tools_sync())
+        for tool in tools:
+            tool.mcp_client = self._proxy
+
+        with self._lock:
+            self._tools = tools
+        logger.info(f"MCP tools loaded: {len(tools)} tools available")
+        return list(tools)
+
+    def next_client(self) -> "MCPClient":
+        """Pick the next MCP client in round-robin order."""
+        with self._lock:
+            return self._pick_client()
+
+    def _pick_client(self) -> "MCPClient":
+        """Pick the next MCP client; called with the lock held."""
+        if self._stopped.is_set() or not self._clients:
+            raise RuntimeError("MCP server manager is not running")
+        return self._clients[next(self._round_robin) % len(self._clients)]
+
+    def call_tool_sync(self, tool_use_id, name, arguments=None, **kwargs):
+        """Call an MCP tool, answering from the cache when possible."""
+        started = time.monotonic()
+        cacheable = self.cache is not None and self.cache.is_cacheable(name)
+        if cacheable:
+            cached = self.cache.get(name, arguments, tool_use_id)
+            if cached is not None:
+                MCP_CALL_SECONDS.observe(time.monotonic() - started, tool=name, cache='hit')
+                return cached
+        result = self._truncate(self._call_tool_sync(tool_use_id, name, arguments, **kwargs))
+        if cacheable:
+            self.cache.put(name, arguments, result)
+        MCP_CALL_SECONDS.observe(time.monotonic() - started, tool=name, cache='miss' if cacheable else 'none')
+        return result
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, **kwargs):
+        """Async variant of call_tool_sync used by strands MCP tools."""
+        started = time.monotonic()
+        cacheable = self.cache is not None and self.cache.is_cacheable(name)
+        if cacheable:
+            cached = self.cache.get(name, arguments, tool_use_id)
+            if cached is not None:
+                MCP_CALL_SECONDS.observe(time.monotonic() - started, tool=name, cache='hit')
+                return cached
+        result = self._truncate(await self._call_tool_async(tool_use_id, name, arguments, **kwargs))
+        if cacheable:
+            self.cache.put(name, arguments, result)
+        MCP_CALL_SECONDS.observe(time.monotonic() - started, tool=name, cache='miss' if cacheable else 'none')
+        return result
+
+    def _truncate(self, result: dict) -> dict:
+        """Cut long text blocks of a tool result down to max_result_chars."""
+        if not self.max_result_chars or not isinstance(result, dict):
+            return result
+        content = []
+        truncated = False
+        for block in result.get('content', []):
+            text = block.get('text')
+            if text is not None and len(text) > self.max_result_chars:
+                omitted = len(text) - self.max_result_chars
+                block = {**block, 'text': f"{text[:self.max_result_chars]}\n[... {omitted} more characters omitted]"}
+                truncated = True
+            content.append(block)
+        if not truncated:
+            return result
+        # Structured content duplicates the text and would bring the full size back
+        return {**{key: value for key, value in result.items() if key != 'structuredContent'}, 'content': content}
+
+    def _call_tool_sync(self, tool_use_id, name, arguments=None, **kwargs):
+        """Call an MCP tool on one of the shared servers, restarting it and retrying once if it has died."""
+        client = self.next_client()
+        try:
+            result = client.call_tool_sync(tool_use_id=tool_use_id, name=name, arguments=arguments, **kwargs)
+            if result.get('status') != 'error' or self._is_alive(client):
+                return result
+        except Exception as e:
+            if self._is_alive(client):
+                raise
+            logger.warning(f"MCP call to {name} failed on a dead server: {str(e)}")
+        client = self._restart(client)
+        return client.call_tool_sync(tool_use_id=tool_use_id, name=name, arguments=arguments, **kwargs)
+
+    async def _call_tool_async(self, tool_use_id, name, arguments=None, **kwargs):
+        """Async variant of _call_tool_sync."""
+        client = self.next_client()
+        try:
+            result = await client.call_tool_async(tool_use_id=tool_use_id, name=name, arguments=arguments, **kwargs)
+            if result.get('status') != 'error' or self._is_alive(client):
+                return result
+        except Exception as e:
+            if self._is_alive(client):
+                raise
+            logger.warning(f"MCP call to {name} failed on a dead server: {str(e)}")
+        client = self._restart(client)
+        return await client.call_tool_async(tool_use_id=tool_use_id, name=name, arguments=arguments, **kwargs)
+
+    def _is_alive(self, client: "MCPClient") -> bool:
+        """Probe an MCP client session with a cheap request."""
+        try:
+            client.list_tools_sync()
+            return True
+        except Exception as e:
+            logger.warning(f"MCP server health check failed: {str(e)}")
+            return False
+
+    def _restart(self, client: "MCPClient") -> "MCPClient":
+        """Replace a dead MCP client with a fresh server process."""
+        # Serialize restarts so concurrent failures on one server only spawn one replacement,
+        # while other calls keep using the healthy servers
+        with self._restart_lock:
+            with self._lock:
+                if client not in self._clients:
+                    # Another thread already replaced it, or the manager has been stopped
+                    return self._pick_client()
+                index = self._clients.index(client)
+
+            logger.warning(f"Restarting MCP server {index}")
+            try:
+                client.stop(None, None, None)
+            except Exception as e:
+                logger.error(f"Error stopping dead MCP client: {str(e)}")
+
+            replacement = self._new_client()
+            with self._lock:
+                stopped = self._stopped.is_set() or self._clients[index:index + 1] != [client]
+                if not stopped:
+                    self._clients[index] = replacement
+                    self._restarts += 1
+            if stopped:
+                # stop() ran while the replacement was starting; do not leave its process behind
+                try:
+                    replacement.stop(None, None, None)
+                except Exception as e:
+                    logger.error(f"Error closing MCP client: {str(e)}")
+                raise RuntimeError("MCP server manager is not running")
+            return replacement
+
+    def _monitor_loop(self):
+        """Periodically restart MCP servers that have crashed."""
+        while not self._stopped.wait(self.health_check_interval):
+            with self._lock:
+                clients = list(self._clients)
+            for client in clients:
+                if self._stopped.is_set():
+                    return
+                if not self._is_alive(client):
+                    try:
+                        self._restart(client)
+                    except Exception as e:
+                        logger.error(f"Failed to restart MCP server: {str(e)}")
+
+    def stats(self) -> dict:
+        """Return the number of running servers and restarts so far."""
+        with self._lock:
+            return {
+                'servers': len(self._clients),
+                'restarts': self._restarts,
+                'tools': len(self._tools) if self._tools is not None else None,
+                'cache': self.cache.stats() if self.cache is not None else None
+            }
+
+    def stop(self):
+        """Stop the health monitor and every MCP server process."""
+        self._stopped.set()
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.stop(None, None, None)
+            except Exception as e:
+                logger.error(f"Error closing MCP client: {str(e)}")
+        if clients:
+            logger.info(f"Stopped {len(clients)} shared MCP server(s)")
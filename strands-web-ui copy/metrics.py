@@ -0,0 +1,234 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; generations take minutes, documentation lookups milliseconds
+DEFAULT_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """Add to the counter for the given label values."""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list:
+        with self._lock:
+            return [(self.name, _format_labels(self.labelnames, key), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets, optionally split by labels."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Record one observation for the given label values."""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager observing the seconds its block took."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def samples(self) -> list:
+        samples = []
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                samples.append((self.name + '_bucket', _format_labels(self.labelnames, key, le), cumulative))
+            samples.append((self.name + '_sum', _format_labels(self.labelnames, key), total))
+            samples.append((self.name + '_count', _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+
+class Gauge:
+    """Values read from a callback when metrics are collected, e.g. counters kept by another component."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), callback=None, metric_type: str = 'gauge'):
+        """
+        Initialize the gauge.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Label names
+            callback (callable): Returns a number, or a dict mapping tuples of label values to numbers
+            metric_type (str): 'gauge', or 'counter' when the callback reports a running total
+        """
+        self.type = metric_type
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self) -> list:
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [(self.name, _format_labels(self.labelnames, key), value)
+                for key, value in sorted(values.items()) if value is not None]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric, replacing any earlier one with the same name, and return it."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback, labelnames: tuple = (), metric_type: str = 'gauge') -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback, metric_type))
+
+    def render(self) -> str:
+        """Render every metric; a gauge whose callback fails is skipped."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry and the metrics recorded by the generation pipeline
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'strands_http_request_duration_seconds', "Time to produce an HTTP response (streams: until headers)",
+    ('method', 'route', 'status'))
+PHASE_SECONDS = REGISTRY.histogram(
+    'strands_generation_phase_seconds', "Time spent in each phase of agent creation", ('phase',))
+MODEL_TURN_SECONDS = REGISTRY.histogram(
+    'strands_model_turn_duration_seconds', "Duration of each model turn of a generation")
+MODEL_TOKENS = REGISTRY.counter(
+    'strands_model_tokens_total', "Tokens consumed by model turns (input excludes prompt cache reads and writes)",
+    ('direction',))
+TOOL_CALL_SECONDS = REGISTRY.histogram(
+    'strands_tool_call_duration_seconds', "Duration of tool calls made by the generating agent", ('tool', 'status'))
+MCP_CALL_SECONDS = REGISTRY.histogram(
+    'strands_mcp_call_duration_seconds', "Duration of MCP documentation lookups", ('tool', 'cache'))
+GENERATIONS = REGISTRY.counter(
+    'strands_generations_total', "Finished agent generations", ('status',))
+
+
+class GenerationTimer:
+    """Collects the model turn, token and tool call timings of one generation from its progress events."""
+
+    def __init__(self):
+        self.model_turns = 0
+        self.model_seconds = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.tool_seconds = {}
+        self._turn_started = None
+        self._tool_starts = {}
+
+    def on_event(self, event_type: str, data: dict):
+        """Receive an event from a GenerationEventHandler."""
+        now = time.monotonic()
+        if event_type == 'model_start':
+            self._turn_started = now
+        elif event_type == 'model_end':
+            if self._turn_started is not None:
+                seconds = now - self._turn_started
+                self._turn_started = None
+                self.model_turns += 1
+                self.model_seconds += seconds
+                MODEL_TURN_SECONDS.observe(seconds)
+            for direction in ('input', 'output', 'cache_read', 'cache_write'):
+                tokens = data.get(f'{direction}_tokens', 0)
+                setattr(self, f'{direction}_tokens', getattr(self, f'{direction}_tokens') + tokens)
+                MODEL_TOKENS.inc(tokens, direction=direction)
+        elif event_type == 'tool_start':
+            self._tool_starts[data['id']] = now
+        elif event_type == 'tool_end':
+            started = self._tool_starts.pop(data['id'], None)
+            if started is not None:
+                name = data.get('name') or 'unknown'
+                seconds = now - started
+                self.tool_seconds[name] = self.tool_seconds.get(name, 0.0) + seconds
+                TOOL_CALL_SECONDS.observe(seconds, tool=name, status=data.get('status') or 'unknown')
+
+    def summary(self) -> dict:
+        """Return the collected timings as a JSON-serializable dict."""
+        return {
+            'model_turns': self.model_turns,
+            'model_seconds': round(self.model_seconds, 3),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'cache_read_tokens': self.cache_read_tokens,
+            'cache_write_tokens': self.cache_write_tokens,
+            'tool_seconds': {name: round(seconds, 3) for name, seconds in self.tool_seconds.items()}
+        }
@@ -0,0 +1,104 @@
+import logging
+import textwrap
+
+from agent_editor import AgentEditError, AgentModule
+from agent_templates import escape_docstring, function_names, python_identifier
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_postprocess")
+
+
+class PostProcessError(Exception):
+    """Raised when generated agent code cannot be completed, e.g. because it does not compile."""
+
+
+def generate_custom_tool_code(tool_name, tool_description, body=None, function_name=None):
+    """
+    Generate code for a custom tool using the @tool decorator; body replaces the placeholder implementation.
+
+    The tool's name and description are user text: they are written as string literals with repr() and as
+    escaped docstring text, never pasted into the source as they are. function_name overrides the method name
+    derived from the tool name, e.g. one made distinct with function_names().
+    """
+    # Convert tool name to a snake_case function name
+    function_name = function_name or python_identifier(tool_name)
+    # Continuation lines of the description keep the docstring's indentation, so the method still dedents
+    description = textwrap.indent(escape_docstring(tool_description), ' ' * 8).lstrip()
+
+    if body is None:
+        body = f"""try:
+    # Implement the tool functionality here
+    result = f"Processed query: {{query}}"
+
+    return {{
+        "success": True,
+        "result": result,
+        "message": {repr(f"Successfully executed {tool_name}")}
+    }}
+except Exception as e:
+    return {{
+        "success": False,
+        "error": str(e),
+        "message": {repr(f"Failed to execute {tool_name}: ")} + str(e)
+    }}"""
+
+    # Generate the tool code
+    tool_code = f"""
+    @tool
+    def {function_name}(self, query: str) -> Dict[str, Any]:
+        \"\"\"
+        {description}
+
+        Args:
+            query (str): The input query for the tool
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the result of the operation
+        \"\"\"
+{textwrap.indent(body, ' ' * 8)}
+    """
+
+    return tool_code
+
+
+def process_agent_code(code: str, custom_tools: list = None, filename: str = '<agent>') -> str:
+    """
+    Complete generated agent code in a single pass before it is written and stored.
+
+    The module is parsed once; placeholder methods are added for custom tools it does not implement yet,
+    together with any imports they need (strands.tool, typing.Dict and Any), and the result must compile.
+
+    Args:
+        code (str): The agent module as written by the model, the cache or a template
+        custom_tools (list, optional): Dicts with 'name' and 'description'
+        filename (str, optional): Shown in error messages
+
+    Returns:
+        str: The completed code
+
+    Raises:
+        PostProcessError: If the code or the completed code does not compile
+    """
+    try:
+        module = AgentModule(code, filename)
+        if custom_tools:
+            try:
+                existing = set(module.tool_methods())
+            except AgentEditError as e:
+                # Nothing to attach methods to; the code is still validated below
+                logger.warning(f"Not adding custom tools to {filename}: {str(e)}")
+                custom_tools = []
+            # Tools whose names map to the same method get distinct ones, as in templates; tools the model
+            # already implemented keep its implementation
+            for tool, function_name in zip(custom_tools, function_names([tool['name'] for tool in custom_tools])):
+                if function_name not in existing:
+                    module.add_method(generate_custom_tool_code(tool['name'], tool['description'],
+                                                                function_name=function_name))
+        return module.render()
+    except AgentEditError as e:
+        raise PostProcessError(f"Generated code for {filename} is invalid: {str(e)}")
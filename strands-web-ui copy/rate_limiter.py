@@ -0,0 +1,262 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+from async_waiters import AsyncWaiters
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_rate_limiter")
+
+# Priority lanes, highest priority first
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+LANES = (INTERACTIVE, BATCH)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate, holding at most one minute of tokens."""
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize the bucket, initially full.
+
+        Args:
+            per_minute (float): Tokens added per minute
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """
+        Take tokens, sleeping until the bucket holds enough of them.
+
+        Args:
+            amount (float): Tokens to take; requests larger than the capacity wait for a full bucket
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1.0):
+        """Like acquire(), but sleeps without blocking the event loop."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def adjust(self, amount: float):
+        """Take (or, if negative, return) tokens without waiting, e.g. to settle an estimate against actual usage."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class ModelScheduler:
+    """
+    Client-side scheduler for model calls shared by every agent in the process.
+
+    Calls are admitted in priority order, limited by requests-per-minute and
+    tokens-per-minute buckets and by a concurrency limit that halves when the
+    provider throttles and grows back by one per window of successful calls.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, max_concurrency: int = 8,
+                 min_concurrency: int = 1, max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 30.0,
+                 decrease_cooldown: float = 2.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute (float): Model calls allowed per minute (0 for no limit)
+            tokens_per_minute (float): Model tokens allowed per minute (0 for no limit)
+            max_concurrency (int): Upper bound for concurrent model calls
+            min_concurrency (int): Lower bound the concurrency limit backs off to
+            max_retries (int): Retries of a throttled call before the error is raised
+            base_delay (float): Retry delay scale in seconds; delays are drawn uniformly up to base * 2^attempt
+            max_delay (float): Upper bound for a retry delay
+            decrease_cooldown (float): Seconds during which further throttles do not lower the limit again
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.decrease_cooldown = decrease_cooldown
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._async_waiters = AsyncWaiters()
+        self.calls = 0
+        self.throttles = 0
+        self.retries = 0
+
+    @property
+    def limit(self) -> int:
+        """The current concurrency limit."""
+        return max(self.min_concurrency, int(self._limit))
+
+    def acquire(self, priority: str = INTERACTIVE, tokens: float = 0):
+        """
+        Block until a model call may start.
+
+        Args:
+            priority (str): INTERACTIVE or BATCH; waiting interactive calls are always admitted first
+            tokens (float): Estimated tokens the call will consume
+        """
+        rank = LANES.index(priority) if priority in LANES else len(LANES)
+        entry = (rank, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            while self._waiting[0] != entry or self._in_flight >= self.limit:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            self._notify()
+
+        # The slot is held while waiting for rate budget, so budget is handed out in priority order as well
+        try:
+            if self.requests is not None:
+                self.requests.acquire(1)
+            if self.tokens is not None and tokens:
+                self.tokens.acquire(tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    async def acquire_async(self, priority: str = INTERACTIVE, tokens: float = 0):
+        """
+        Wait until a model call may start, without holding a thread; admission order is shared with acquire().
+
+        Args:
+            priority (str): INTERACTIVE or BATCH; waiting interactive calls are always admitted first
+            tokens (float): Estimated tokens the call will consume
+        """
+        rank = LANES.index(priority) if priority in LANES else len(LANES)
+        entry = (rank, next(self._sequence))
+        wakeup = self._async_waiters.register()
+        try:
+            with self._condition:
+                heapq.heappush(self._waiting, entry)
+            while True:
+                with self._condition:
+                    if self._waiting[0] == entry and self._in_flight < self.limit:
+                        heapq.heappop(self._waiting)
+                        self._in_flight += 1
+                        self._notify()
+                        break
+                    wakeup.clear()
+                await wakeup.wait()
+        except BaseException:
+            # Cancelled while waiting: give up the place in line so the calls behind it are not stuck
+            with self._condition:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._notify()
+            raise
+        finally:
+            self._async_waiters.unregister(wakeup)
+
+        try:
+            if self.requests is not None:
+                await self.requests.acquire_async(1)
+            if self.tokens is not None and tokens:
+                await self.tokens.acquire_async(tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    def _notify(self):
+        """Wake waiting threads and coroutines after the admission state changed; called with the lock held."""
+        self._condition.notify_all()
+        self._async_waiters.wake_all()
+
+    def release(self, throttled: bool = False, estimated_tokens: float = 0, used_tokens: float = None):
+        """
+        Finish a model call admitted by acquire().
+
+        Args:
+            throttled (bool): The provider rejected the call for exceeding its limits
+            estimated_tokens (float): Tokens reserved by acquire()
+            used_tokens (float, optional): Tokens the call actually consumed, to correct the estimate
+        """
+        if self.tokens is not None and used_tokens is not None:
+            self.tokens.adjust(used_tokens - estimated_tokens)
+        with self._condition:
+            self._in_flight -= 1
+            self.calls += 1
+            if throttled:
+                self.throttles += 1
+                now = time.monotonic()
+                # A burst of throttles caused by one overload halves the limit once
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._limit = max(float(self.min_concurrency), self._limit / 2)
+                    self._last_decrease = now
+                    logger.warning(f"Model throttled, lowering concurrency limit to {self.limit}")
+            else:
+                self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+            self._notify()
+
+    def retry_delay(self, attempt: int) -> float:
+        """
+        Return a jittered delay before retrying a throttled call, so concurrent retries spread out.
+
+        Args:
+            attempt (int): Number of throttled attempts so far, starting at 1
+        """
+        self.retries += 1
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def stats(self) -> dict:
+        """Return the scheduler state."""
+        with self._condition:
+            return {
+                'concurrency_limit': self.limit,
+                'in_flight': self._in_flight,
+                'waiting': len(self._waiting),
+                'calls': self.calls,
+                'throttles': self.throttles,
+                'retries': self.retries,
+                'requests_available': round(self.requests.available, 1) if self.requests is not None else None,
+                'tokens_available': round(self.tokens.available) if self.tokens is not None else None
+            }
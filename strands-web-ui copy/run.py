@@ -1,10 +1,12 @@
 import os
 import sys
+import argparse
 import subprocess
 import webbrowser
 import time
 import signal
 import logging
+import urllib.request
 
 # Configure logging
 logging.basicConfig(
@@ -33,25 +35,36 @@ def check_dependencies():
             logger.error("Failed to install dependencies. Please install them manually.")
             return False
 
-def run_server():
-    """Run the Flask server."""
-    logger.info("Starting Flask server...")
-    server_process = subprocess.Popen(
-        [sys.executable, "server.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    logger.info("Flask server started.")
+def run_server(production=False):
+    """Run the Flask server, or the production WSGI server when production is True."""
+    script = "serve.py" if production else "server.py"
+    logger.info(f"Starting {'production' if production else 'Flask'} server...")
+    # Server output goes straight to this console; an unread pipe would block the server once it fills up
+    server_process = subprocess.Popen([sys.executable, script])
+    logger.info("Server started.")
     return server_process
 
+def wait_for_server(url, timeout=30):
+    """Poll the server's liveness endpoint until it answers or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/healthz", timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.1)
+    return False
+
 def open_browser():
     """Open the web application in the default browser."""
-    url = "http://localhost:5000"
-    logger.info(f"Opening {url} in the default browser...")
+    url = f"http://localhost:{os.environ.get('STRANDS_PORT', '5000')}"
     
-    # Wait a moment for the server to start
-    time.sleep(2)
+    # Wait until the server accepts requests; agents keep warming up in the background
+    if not wait_for_server(url):
+        logger.warning("Server did not respond on /healthz yet; opening the browser anyway")
+    logger.info(f"Opening {url} in the default browser...")
     
     try:
         webbrowser.open(url)
@@ -60,7 +73,7 @@ def open_browser():
         logger.error(f"Failed to open browser: {e}")
         logger.info(f"Please open {url} manually in your browser.")
 
-def handle_shutdown(server_process):
+def handle_shutdown(server_process, timeout=5):
     """Handle graceful shutdown of the server."""
     logger.info("Shutting down...")
     
@@ -68,7 +81,7 @@ def handle_shutdown(server_process):
         logger.info("Stopping Flask server...")
         server_process.terminate()
         try:
-            server_process.wait(timeout=5)
+            server_process.wait(timeout=timeout)
             logger.info("Flask server stopped.")
         except subprocess.TimeoutExpired:
             logger.warning("Flask server did not terminate gracefully. Forcing shutdown...")
@@ -78,6 +91,11 @@ def handle_shutdown(server_process):
 
 def main():
     """Main entry point for the Strands Web UI runner."""
+    parser = argparse.ArgumentParser(description="Run the Strands Agent Creator web UI")
+    parser.add_argument('--production', action='store_true',
+                        help="Serve with the multi-threaded production server (serve.py) instead of the Flask dev server")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Strands Agent Creator - Web UI")
     print("=" * 60)
@@ -96,7 +114,7 @@ def main():
     # Start the server
     server_process = None
     try:
-        server_process = run_server()
+        server_process = run_server(production=args.production)
         
         # Open the browser
         open_browser()
@@ -109,12 +127,7 @@ def main():
         while True:
             # Check if the server is still running
             if server_process.poll() is not None:
-                stdout, stderr = server_process.communicate()
-                print("Server stopped unexpectedly.")
-                if stdout:
-                    print("Server output:", stdout)
-                if stderr:
-                    print("Server error:", stderr)
+                print("Server stopped unexpectedly; see the output above.")
                 break
             
             # Sleep to reduce CPU usage
@@ -123,7 +136,9 @@ def main():
     except KeyboardInterrupt:
         print("\nReceived interrupt signal. Shutting down...")
     finally:
-        handle_shutdown(server_process)
+        # Give running agent generations the production server's graceful shutdown window
+        timeout = int(os.environ.get('STRANDS_GRACEFUL_TIMEOUT', '30')) + 5 if args.production else 5
+        handle_shutdown(server_process, timeout=timeout)
         print("Strands Agent Creator has been stopped.")
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+
+from strands.models.model import Model
+from strands.types.exceptions import ModelThrottledException
+
+from rate_limiter import INTERACTIVE, ModelScheduler
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_scheduled_model")
+
+
+def estimate_tokens(messages: list, system_prompt: str = None) -> int:
+    """Roughly estimate the input tokens of a model call at four characters per token."""
+    characters = len(system_prompt or '')
+    for message in messages:
+        for block in message.get('content', []):
+            characters += len(str(block))
+    return characters // 4 + 1
+
+
+class RateLimitedModel(Model):
+    """Wraps a strands model so that every call goes through a shared ModelScheduler."""
+
+    def __init__(self, model: Model, scheduler: ModelScheduler):
+        """
+        Initialize the wrapper.
+
+        Args:
+            model (Model): The model that actually serves the calls
+            scheduler (ModelScheduler): Scheduler shared by all agents in the process
+        """
+        self.model = model
+        self.scheduler = scheduler
+        # Lane for the next calls; set by the owning StrandsAgent before each generation
+        self.priority = INTERACTIVE
+
+    def update_config(self, **model_config):
+        self.model.update_config(**model_config)
+
+    def get_config(self):
+        return self.model.get_config()
+
+    @property
+    def config(self):
+        return getattr(self.model, 'config', {})
+
+    @property
+    def stateful(self) -> bool:
+        return self.model.stateful
+
+    @property
+    def context_window_limit(self):
+        return self.model.context_window_limit
+
+    async def count_tokens(self, *args, **kwargs):
+        return await self.model.count_tokens(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # Anything else the agent reads (e.g. model-specific settings) comes from the wrapped model
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        call = lambda: self.model.stream(messages, tool_specs, system_prompt, **kwargs)
+        async for event in self._scheduled(call, estimate_tokens(messages, system_prompt)):
+            yield event
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        call = lambda: self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+        async for event in self._scheduled(call, estimate_tokens(prompt, system_prompt)):
+            yield event
+
+    async def _scheduled(self, call, estimated_tokens: int):
+        """
+        Run a model call once admitted by the scheduler, retrying throttled calls with jittered backoff.
+
+        Args:
+            call (callable): Starts the call and returns its async event stream; called again for each retry
+            estimated_tokens (int): Tokens reserved from the tokens-per-minute budget
+        """
+        attempt = 0
+        while True:
+            # Waits on the agent's event loop without holding a thread, however many calls are waiting
+            await self.scheduler.acquire_async(self.priority, estimated_tokens)
+            yielded = False
+            used_tokens = None
+            try:
+                async for event in call():
+                    yielded = True
+                    usage = event.get('metadata', {}).get('usage') if isinstance(event, dict) else None
+                    if usage:
+                        used_tokens = usage.get('totalTokens')
+                    yield event
+            except ModelThrottledException:
+                self.scheduler.release(throttled=True, estimated_tokens=estimated_tokens)
+                attempt += 1
+                # Output already streamed to the agent cannot be taken back, so only untouched calls are retried
+                if yielded or attempt > self.scheduler.max_retries:
+                    raise
+                delay = self.scheduler.retry_delay(attempt)
+                logger.warning(f"Model throttled, retrying in {delay:.1f}s (attempt {attempt})")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.scheduler.release(estimated_tokens=estimated_tokens, used_tokens=used_tokens)
+                raise
+            self.scheduler.release(estimated_tokens=estimated_tokens, used_tokens=used_tokens)
+            return
@@ -0,0 +1,123 @@
+import argparse
+import logging
+import os
+import signal
+import sys
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_serve")
+
+
+def parse_args(argv=None):
+    """Parse command line options; every option defaults to its STRANDS_* environment variable."""
+    parser = argparse.ArgumentParser(description="Serve the Strands Agent Creator with a production WSGI server")
+    parser.add_argument('--server', choices=['gunicorn', 'waitress', 'uvicorn'], default=os.environ.get('STRANDS_SERVER'),
+                        help="WSGI server, or uvicorn for the asyncio serving mode "
+                             "(default: gunicorn where available, otherwise waitress)")
+    parser.add_argument('--host', default=os.environ.get('STRANDS_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('STRANDS_PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('STRANDS_WORKERS', '1')),
+                        help="Worker processes (gunicorn and uvicorn)")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('STRANDS_THREADS', '32')),
+                        help="Request threads per worker; each open progress stream holds one")
+    parser.add_argument('--keepalive', type=int, default=int(os.environ.get('STRANDS_KEEPALIVE', '5')),
+                        help="Seconds an idle keep-alive connection is held open")
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.environ.get('STRANDS_GRACEFUL_TIMEOUT', '30')),
+                        help="Seconds running requests get to finish on shutdown")
+    args = parser.parse_args(argv)
+    if args.server is None:
+        args.server = 'gunicorn' if _gunicorn_available() else 'waitress'
+    return args
+
+
+def _gunicorn_available() -> bool:
+    if sys.platform == 'win32':
+        return False
+    try:
+        import gunicorn  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def serve_gunicorn(args):
+    """Run the app under gunicorn with threaded workers, each owning its own agents and MCP servers."""
+    from gunicorn.app.base import BaseApplication
+
+    class StrandsApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{args.host}:{args.port}")
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('keepalive', args.keepalive)
+            self.cfg.set('graceful_timeout', args.graceful_timeout)
+            self.cfg.set('worker_exit', _worker_exit)
+
+        def load(self):
+            # Imported in each worker after forking, so background threads and MCP processes are not shared
+            from server import app
+            return app
+
+    StrandsApplication().run()
+
+
+def _worker_exit(arbiter, worker):
+    """Stop a gunicorn worker's jobs, agents and MCP servers before it exits."""
+    server = sys.modules.get('server')
+    if server is not None:
+        server.shutdown()
+
+
+def serve_waitress(args):
+    """Run the app under waitress in a single process."""
+    from waitress import serve
+    from server import app, shutdown
+
+    def handle_sigterm(signum, frame):
+        # Turn SIGTERM into a normal exit so the shutdown hooks run
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    try:
+        serve(app, host=args.host, port=args.port, threads=args.threads, channel_timeout=max(args.keepalive, 1),
+              ident='strands')
+    finally:
+        shutdown()
+
+
+def serve_uvicorn(args):
+    """Run the asyncio app under uvicorn; generations and progress streams are served without a thread each."""
+    import uvicorn
+
+    # Threads left for the routes still answered by the Flask app, read by async_server in each worker
+    os.environ['STRANDS_THREADS'] = str(args.threads)
+    uvicorn.run('async_server:app', host=args.host, port=args.port, workers=args.workers,
+                timeout_keep_alive=args.keepalive, timeout_graceful_shutdown=args.graceful_timeout, lifespan='on',
+                app_dir=os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    """Entry point for production serving."""
+    args = parse_args(argv)
+    os.makedirs(os.environ.get('STRANDS_AGENTS_DIR', 'agents'), exist_ok=True)
+    if args.server == 'waitress' and args.workers > 1:
+        logger.warning("waitress runs a single process; ignoring --workers")
+        args.workers = 1
+    logger.info(f"Serving on {args.host}:{args.port} with {args.server} "
+                f"({args.workers} worker(s), {args.threads} thread(s) each)")
+    if args.server == 'gunicorn':
+        serve_gunicorn(args)
+    elif args.server == 'uvicorn':
+        serve_uvicorn(args)
+    else:
+        serve_waitress(args)
+
+
+if __name__ == '__main__':
+    main()
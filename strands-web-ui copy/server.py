@@ -1,15 +1,42 @@
 import os
 import json
 import logging
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
 from flask_cors import CORS
 import sys
-from pymongo import MongoClient
-from datetime import datetime
+import atexit
+import hashlib
+import re
+import shlex
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 # Add the parent directory to the path so we can import the strands_agent module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from strands_agent import StrandsAgent
+from strands_agent import (StrandsAgent, GenerationEventHandler, agent_file_path, AGENTS_DIR, CONTEXT_MODES, MODEL_ID,
+                           PROMPT_CACHE_BLOCKS, SYSTEM_PROMPT_VERSION)
+from agent_pool import StrandsAgentPool
+from mcp_manager import MCPServerManager
+from mcp_cache import ToolResultCache
+from generation_cache import GenerationCache, spec_key
+from job_queue import DeferredJob, JobQueue, QueueFullError
+from distributed_queue import DistributedJobQueue, MemoryJobStore, MongoJobStore
+from agent_listing import InvalidListingRequest, parse_listing_args, shape_page
+from agents_cache import AgentListCache, ChangeStreamInvalidator
+from storage import MongoAgentStore, SQLiteAgentStore
+from warmup import WarmUp
+from rate_limiter import ModelScheduler
+from metrics import REGISTRY, HTTP_REQUEST_SECONDS
+from agent_templates import GENERATION_MODES, TemplateLibrary, python_identifier, tool_specs
+from agent_editor import splice_tool_methods
+from postprocess import PostProcessError, generate_custom_tool_code, process_agent_code
+from validation import ValidationPool
+from artifact_store import ArtifactError, ArtifactStore
+from doc_prefetch import DOC_TOOLS, DocumentationPrefetcher
 
 # Configure logging
 logging.basicConfig(
@@ -23,13 +50,318 @@ logger = logging.getLogger("strands_web_server")
 app = Flask(__name__, static_folder='.', static_url_path='')
 CORS(app)  # Enable CORS for all routes
 
-# Initialize MongoDB client
-mongo_client = MongoClient('MongoDBURI')
-db = mongo_client['digital_clean_core']
-agents_collection = db['ktern_agentic_layer']
+# Initialize agent storage: MongoDB by default, or an embedded SQLite file for running without a database server
+storage_backend = os.environ.get('STRANDS_STORAGE_BACKEND', 'mongo').lower()
+if storage_backend == 'sqlite':
+    agent_store = SQLiteAgentStore(
+        path=os.environ.get('STRANDS_SQLITE_PATH', 'strands.db'),
+        synchronous=os.environ.get('STRANDS_SQLITE_SYNCHRONOUS', 'NORMAL')
+    )
+else:
+    agent_store = MongoAgentStore(
+        uri=os.environ.get('MONGO_CONNECTION_STRING', 'MongoDBURI'),
+        database=os.environ.get('STRANDS_MONGO_DATABASE', 'digital_clean_core'),
+        collection=os.environ.get('STRANDS_MONGO_COLLECTION', 'ktern_agentic_layer'),
+        max_pool_size=int(os.environ.get('STRANDS_MONGO_POOL_SIZE', '50')),
+        min_pool_size=int(os.environ.get('STRANDS_MONGO_MIN_POOL_SIZE', '0')),
+        timeout_ms=int(os.environ.get('STRANDS_MONGO_TIMEOUT_MS', '5000')),
+        write_concern=os.environ.get('STRANDS_MONGO_WRITE_CONCERN', '1'),
+        buffer_writes=os.environ.get('STRANDS_MONGO_BUFFER_WRITES', 'false').lower() == 'true',
+        flush_interval=float(os.environ.get('STRANDS_MONGO_FLUSH_INTERVAL', '0.5'))
+    )
 
-# Initialize Strands Agent
-strands_agent = StrandsAgent()
+def ensure_agent_indexes():
+    """Create the indexes backing the agents listing if they do not exist yet."""
+    try:
+        agent_store.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Error creating agent indexes: {str(e)}")
+
+# Build indexes in the background so an unreachable database does not delay startup
+threading.Thread(target=ensure_agent_indexes, name="agent-indexes", daemon=True).start()
+
+# Initialize the cache of agent listing pages, invalidated on writes and by a change stream when the server supports it
+agents_cache = AgentListCache(
+    ttl=float(os.environ.get('STRANDS_AGENTS_CACHE_TTL', '60')),
+    max_entries=int(os.environ.get('STRANDS_AGENTS_CACHE_SIZE', '256'))
+)
+agent_store.add_write_listener(agents_cache.invalidate)
+agents_change_stream = None
+if isinstance(agent_store, MongoAgentStore) and os.environ.get('STRANDS_AGENTS_CHANGE_STREAM', 'true').lower() == 'true':
+    agents_change_stream = ChangeStreamInvalidator(agent_store.agents, agents_cache)
+    agents_change_stream.start()
+
+# Initialize the cache for MCP documentation lookups, which return the same content on every generation
+mcp_cache_ttl = float(os.environ.get('STRANDS_MCP_CACHE_TTL', '3600'))
+mcp_cache_tools = os.environ.get('STRANDS_MCP_CACHE_TOOLS', '')
+mcp_cache = ToolResultCache(
+    max_entries=int(os.environ.get('STRANDS_MCP_CACHE_SIZE', '256')),
+    ttl=mcp_cache_ttl,
+    cache_dir=os.environ.get('STRANDS_MCP_CACHE_DIR') or None,
+    tools=[name.strip() for name in mcp_cache_tools.split(',') if name.strip()]
+) if mcp_cache_ttl > 0 else None
+
+# Initialize the shared MCP server processes used by every Strands Agent
+mcp_manager = MCPServerManager(
+    command=os.environ.get('STRANDS_MCP_COMMAND', 'uvx'),
+    args=shlex.split(os.environ.get('STRANDS_MCP_ARGS', 'strands-agents-mcp-server')),
+    size=int(os.environ.get('STRANDS_MCP_SERVERS', '1')),
+    health_check_interval=float(os.environ.get('STRANDS_MCP_HEALTH_INTERVAL', '30')),
+    cache=mcp_cache,
+    max_result_chars=int(os.environ.get('STRANDS_MCP_MAX_RESULT_CHARS', '20000'))
+)
+
+# Initialize the pool of Strands Agents, one instance per concurrent generation: a worker thread runs each
+# generation, except under async_server.py, where generations run as tasks on its event loop
+job_workers = int(os.environ.get('STRANDS_JOB_WORKERS', '2'))
+async_serving = os.environ.get('STRANDS_ASYNC', 'false').lower() == 'true'
+async_max_jobs = int(os.environ.get('STRANDS_ASYNC_MAX_JOBS', '256'))
+pool_max_size = int(os.environ.get('STRANDS_POOL_MAX_SIZE', str(async_max_jobs if async_serving else max(job_workers, 1))))
+
+# Initialize the scheduler shared by all model calls: rate limits, adaptive concurrency and throttling retries
+model_scheduler = ModelScheduler(
+    requests_per_minute=float(os.environ.get('STRANDS_MODEL_RPM', '0')),
+    tokens_per_minute=float(os.environ.get('STRANDS_MODEL_TPM', '0')),
+    max_concurrency=int(os.environ.get('STRANDS_MODEL_MAX_CONCURRENCY', str(pool_max_size))),
+    max_retries=int(os.environ.get('STRANDS_MODEL_MAX_RETRIES', '4')),
+    base_delay=float(os.environ.get('STRANDS_MODEL_RETRY_BASE_DELAY', '1')),
+    max_delay=float(os.environ.get('STRANDS_MODEL_RETRY_MAX_DELAY', '30'))
+) if os.environ.get('STRANDS_RATE_LIMIT', 'true').lower() == 'true' else None
+model_provider = os.environ.get('STRANDS_MODEL_PROVIDER', 'bedrock')
+
+# How much conversation each pooled instance carries between generations (see CONTEXT_MODES in strands_agent.py)
+context_mode = os.environ.get('STRANDS_CONTEXT_MODE', 'reset').lower()
+context_window = int(os.environ.get('STRANDS_CONTEXT_WINDOW', '20'))
+if context_mode not in CONTEXT_MODES:
+    raise ValueError(f"STRANDS_CONTEXT_MODE must be one of {', '.join(CONTEXT_MODES)}, not '{context_mode}'")
+
+# Blocks of every model request that get a Bedrock prompt cache point ('none' disables prompt caching)
+prompt_cache = tuple(block.strip().lower() for block in os.environ.get('STRANDS_PROMPT_CACHE', 'tools,system').split(',')
+                     if block.strip() and block.strip().lower() != 'none')
+if set(prompt_cache) - set(PROMPT_CACHE_BLOCKS):
+    raise ValueError(f"STRANDS_PROMPT_CACHE may only list {', '.join(PROMPT_CACHE_BLOCKS)} or be 'none'")
+
+agent_pool = StrandsAgentPool(
+    factory=lambda: StrandsAgent(mcp_manager=mcp_manager, scheduler=model_scheduler, model_provider=model_provider,
+                                 context_mode=context_mode, context_window=context_window, prompt_cache=prompt_cache),
+    min_size=int(os.environ.get('STRANDS_POOL_MIN_SIZE', '1')),
+    max_size=pool_max_size,
+    checkout_timeout=float(os.environ.get('STRANDS_POOL_CHECKOUT_TIMEOUT', '300')),
+    idle_timeout=float(os.environ.get('STRANDS_POOL_IDLE_TIMEOUT', '300'))
+)
+
+# Initialize the cache of generated agent code, keyed on the agent spec, model and system prompt version
+generation_cache = GenerationCache(
+    cache_dir=os.environ.get('STRANDS_GENERATION_CACHE_DIR', '.generation_cache'),
+    collection=agent_store.collection('generation_cache'),
+    max_entries=int(os.environ.get('STRANDS_GENERATION_CACHE_MAX_ENTRIES', '1000')),
+    max_bytes=int(os.environ.get('STRANDS_GENERATION_CACHE_MAX_MB', '100')) * 1024 * 1024,
+    max_age=float(os.environ.get('STRANDS_GENERATION_CACHE_MAX_AGE', str(7 * 24 * 3600)))
+) if os.environ.get('STRANDS_GENERATION_CACHE', 'true').lower() == 'true' else None
+
+# Default generation mode and the agent templates used by 'template' and 'hybrid' generations
+generation_mode = os.environ.get('STRANDS_GENERATION_MODE', 'llm').lower()
+if generation_mode not in GENERATION_MODES:
+    raise ValueError(f"STRANDS_GENERATION_MODE must be one of {', '.join(GENERATION_MODES)}, not '{generation_mode}'")
+template_library = TemplateLibrary(os.environ.get('STRANDS_TEMPLATE_DIRS', '').split(os.pathsep))
+template_library.precompile()
+default_template = os.environ.get('STRANDS_DEFAULT_TEMPLATE', 'default')
+if not template_library.has(default_template):
+    raise ValueError(f"STRANDS_DEFAULT_TEMPLATE '{default_template}' is not one of {', '.join(template_library.names())}")
+
+# Keep every version of every agent's code, compressed and deduplicated by content, next to the agents; the
+# default template rendered for a sample agent primes the compressor with the code generated agents share
+artifact_store = ArtifactStore(
+    agent_store,
+    codec=os.environ.get('STRANDS_ARTIFACT_CODEC', 'zlib').lower(),
+    level=int(os.environ['STRANDS_ARTIFACT_LEVEL']) if os.environ.get('STRANDS_ARTIFACT_LEVEL') else None,
+    dictionary=template_library.render(default_template, 'example_agent', 'An example Strands agent',
+                                       ['http_request', 'file_read'], [{'name': 'example tool', 'description': ''}]),
+    cache_size=int(os.environ.get('STRANDS_ARTIFACT_CACHE_SIZE', '256'))
+)
+
+# Compile, lint and smoke-import every generated agent in long-lived worker processes before it is stored
+validation_pool = ValidationPool(
+    size=int(os.environ.get('STRANDS_VALIDATION_WORKERS', '2')),
+    timeout=float(os.environ.get('STRANDS_VALIDATION_TIMEOUT', '30')),
+    smoke_import=os.environ.get('STRANDS_VALIDATION_IMPORT', 'true').lower() == 'true'
+) if os.environ.get('STRANDS_VALIDATION', 'true').lower() == 'true' else None
+# Targeted model calls allowed to repair code that fails validation before it is rejected
+validation_fixups = int(os.environ.get('STRANDS_VALIDATION_FIXUPS', '1'))
+
+# Initialize the background job queue for agent generation: 'local' runs jobs in this process, 'mongo' shares
+# them between every node using the same database ('memory' is an in-process stand-in for it)
+job_backend = os.environ.get('STRANDS_JOB_BACKEND', 'local').lower()
+job_max_queued = int(os.environ.get('STRANDS_JOB_MAX_QUEUED', '100'))
+job_history = int(os.environ.get('STRANDS_JOB_HISTORY', '1000'))
+if job_backend == 'local':
+    job_queue = JobQueue(max_workers=job_workers, max_queued=job_max_queued, max_history=job_history,
+                         max_async_jobs=async_max_jobs)
+elif job_backend in ('mongo', 'memory'):
+    if job_backend == 'mongo':
+        if not isinstance(agent_store, MongoAgentStore):
+            raise ValueError("STRANDS_JOB_BACKEND=mongo needs STRANDS_STORAGE_BACKEND=mongo")
+        job_store = MongoJobStore(agent_store.collection('jobs'), agent_store.collection('job_locks'),
+                                  history_seconds=float(os.environ.get('STRANDS_JOB_HISTORY_SECONDS', str(7 * 24 * 3600))))
+        threading.Thread(target=job_store.ensure_indexes, name="job-indexes", daemon=True).start()
+    else:
+        job_store = MemoryJobStore(max_history=job_history)
+    job_queue = DistributedJobQueue(
+        job_store,
+        max_workers=job_workers,
+        max_queued=job_max_queued,
+        lease_seconds=float(os.environ.get('STRANDS_JOB_LEASE', '30')),
+        poll_interval=float(os.environ.get('STRANDS_JOB_POLL_INTERVAL', '0.5')),
+        max_attempts=int(os.environ.get('STRANDS_JOB_MAX_ATTEMPTS', '3')),
+        node_id=os.environ.get('STRANDS_NODE_ID') or None
+    )
+else:
+    raise ValueError(f"STRANDS_JOB_BACKEND must be 'local', 'mongo' or 'memory', not '{job_backend}'")
+if async_serving and job_backend != 'local':
+    raise ValueError("async_server.py runs generations on its own event loop and needs STRANDS_JOB_BACKEND=local")
+
+def load_mcp_tools():
+    """Discover the MCP tools once; failing here keeps the server unready instead of building agents without tools."""
+    tools = mcp_manager.list_tools()
+    if not tools:
+        raise RuntimeError("The MCP server reported no tools")
+
+def prewarm_agent_pool():
+    """Create the pool's initial StrandsAgent instances."""
+    agent_pool.prewarm()
+    if agent_pool.stats()['size'] < agent_pool.min_size:
+        raise RuntimeError("Could not create the initial StrandsAgent instances")
+
+# Start the MCP servers and build agents in the background so the HTTP server comes up immediately; a node
+# without job workers only queues generations for other nodes and needs neither
+warmup = WarmUp(([
+    ('mcp_servers', mcp_manager.start),
+    ('mcp_tools', load_mcp_tools),
+    ('agent_pool', prewarm_agent_pool)
+] if job_workers > 0 else []) + ([('validation_workers', validation_pool.prewarm)] if validation_pool is not None else []))
+warmup.start()
+
+# Fetch the documentation a generation starts with while the user is still filling in the form (POST /api/prepare);
+# only nodes that run generations have the MCP servers to fetch it with
+doc_prefetch_tools = os.environ.get('STRANDS_PREPARE_DOC_TOOLS', ','.join(DOC_TOOLS))
+doc_prefetcher = DocumentationPrefetcher(
+    mcp_manager,
+    tools=[name.strip() for name in doc_prefetch_tools.split(',') if name.strip()],
+    ttl=float(os.environ.get('STRANDS_PREPARE_TTL', '300')),
+    max_sessions=int(os.environ.get('STRANDS_PREPARE_MAX_SESSIONS', '1000')),
+    wait=float(os.environ.get('STRANDS_PREPARE_WAIT', '10')),
+    ready=warmup.wait,
+    warm=agent_pool.ensure_idle
+) if job_workers > 0 and os.environ.get('STRANDS_PREPARE', 'true').lower() == 'true' else None
+
+# Limits for POST /api/agents/batch; batch generations share the agent pool with single ones
+batch_max_size = int(os.environ.get('STRANDS_BATCH_MAX_SIZE', '100'))
+batch_max_concurrency = int(os.environ.get('STRANDS_BATCH_MAX_CONCURRENCY', str(agent_pool.max_size)))
+batch_item_timeout = float(os.environ.get('STRANDS_BATCH_ITEM_TIMEOUT', '600'))
+batch_retries = int(os.environ.get('STRANDS_BATCH_RETRIES', '1'))
+
+# Point-in-time values exported on /metrics next to the counters and histograms recorded by the pipeline
+REGISTRY.gauge('strands_cache_hit_ratio', "Hit ratio of each cache since startup", lambda: {
+    ('generation',): generation_cache.stats()['hit_rate'] if generation_cache is not None else None,
+    ('mcp',): mcp_cache.stats()['hit_rate'] if mcp_cache is not None else None,
+    ('agents_listing',): agents_cache.stats()['hit_rate']
+}, ('cache',))
+REGISTRY.gauge('strands_cache_lookups_total', "Cache lookups since startup", lambda: {
+    (name, result): stats[result + 's']
+    for name, stats in (('generation', generation_cache.stats() if generation_cache is not None else None),
+                        ('mcp', mcp_cache.stats() if mcp_cache is not None else None),
+                        ('agents_listing', agents_cache.stats()))
+    if stats is not None
+    for result in ('hit', 'miss')
+}, ('cache', 'result'), metric_type='counter')
+REGISTRY.gauge('strands_jobs', "Jobs currently kept by the job queue, by state",
+               lambda: {(status,): count for status, count in job_queue.stats().items()}, ('status',))
+REGISTRY.gauge('strands_agent_pool_instances', "StrandsAgent instances in the pool",
+               lambda: {(state,): agent_pool.stats()[state] for state in ('idle', 'in_use')}, ('state',))
+REGISTRY.gauge('strands_model_concurrency_limit', "Current adaptive limit for concurrent model calls",
+               lambda: model_scheduler.limit if model_scheduler is not None else None)
+REGISTRY.gauge('strands_model_calls_in_flight', "Model calls currently running",
+               lambda: model_scheduler.stats()['in_flight'] if model_scheduler is not None else None)
+REGISTRY.gauge('strands_model_throttles_total', "Model calls rejected by the provider for exceeding its limits",
+               lambda: model_scheduler.throttles if model_scheduler is not None else None, metric_type='counter')
+REGISTRY.gauge('strands_agent_validations_total', "Validations of generated agent code since startup, by outcome",
+               lambda: {(status,): validation_pool.stats()[status] for status in ('passed', 'failed', 'error')}
+               if validation_pool is not None else None, ('status',), metric_type='counter')
+REGISTRY.gauge('strands_artifact_bytes_total', "Bytes of agent code stored since startup, before and after compression",
+               lambda: {('code',): artifact_store.stats()['bytes_in'], ('stored',): artifact_store.stats()['bytes_stored']},
+               ('kind',), metric_type='counter')
+REGISTRY.gauge('strands_ready', "1 once warm-up has completed", lambda: 1 if warmup.ready else 0)
+
+# Client-supplied request ids are reused as trace ids if they look like ids rather than arbitrary text
+TRACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+@app.before_request
+def start_request_trace():
+    """Assign the request a trace id and start timing it."""
+    trace_id = request.headers.get('X-Request-ID', '')
+    g.trace_id = trace_id if TRACE_ID_PATTERN.match(trace_id) else uuid.uuid4().hex
+    g.request_started = time.monotonic()
+
+@app.after_request
+def finish_request_trace(response):
+    """Return the trace id to the client and record the request duration."""
+    response.headers['X-Request-ID'] = g.trace_id
+    # Labelled by route pattern rather than path so agent names and job ids do not create new series
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUEST_SECONDS.observe(time.monotonic() - g.request_started, method=request.method, route=route,
+                                 status=response.status_code)
+    return response
+
+_shutdown_lock = threading.Lock()
+_shutdown_done = False
+
+def shutdown():
+    """Finish running jobs, then stop the agents, MCP server processes and storage. Safe to call more than once."""
+    global _shutdown_done
+    with _shutdown_lock:
+        if _shutdown_done:
+            return
+        _shutdown_done = True
+    logger.info("Shutting down the Strands web server...")
+    warmup.stop()
+    # Jobs still waiting for a worker are dropped; running generations are allowed to finish
+    job_queue.shutdown(wait=True, cancel_pending=True)
+    if doc_prefetcher is not None:
+        doc_prefetcher.close()
+    agent_pool.close()
+    if validation_pool is not None:
+        validation_pool.close()
+    mcp_manager.stop()
+    if agents_change_stream is not None:
+        agents_change_stream.stop()
+    agent_store.close()
+
+atexit.register(shutdown)
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe: the process is up and serving requests, even while still warming up."""
+    return jsonify({
+        'status': 'ok',
+        'warmup': warmup.status
+    })
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe: 200 once agents can be generated, 503 while warming up or shutting down."""
+    ready = warmup.ready and not _shutdown_done
+    return jsonify({
+        'ready': ready,
+        'shutting_down': _shutdown_done,
+        'warmup': warmup.to_dict(),
+        'pool': agent_pool.stats(),
+        'validation': validation_pool.stats() if validation_pool is not None else None
+    }), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint with request, phase, model, tool and cache metrics."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/')
 def index():
@@ -41,37 +373,63 @@ def serve_static(path):
     """Serve static files."""
     return send_from_directory('.', path)
 
-def save_agent_to_mongodb(agent_data):
-    """Save agent details to MongoDB."""
+def agent_document(agent_data):
+    """Build the stored document for an agent."""
+    return {
+        'name': agent_data['name'],
+        'description': agent_data['description'],
+        'tools': agent_data['tools'],
+        # Custom tool specs, kept so later updates can tell which tool methods changed
+        'custom_tools': agent_data.get('custom_tools', []),
+        # Outcome of the compile, lint and smoke-import checks the code passed before it was stored
+        'validation': agent_data.get('validation'),
+        # Version and content hash of the code in the artifact store
+        'artifact': agent_data.get('artifact'),
+        'status': 'active',
+        'created_at': datetime.now(),
+        'updated_at': datetime.now()
+    }
+
+def save_agent(agent_data):
+    """Save agent details to the configured agent store."""
     try:
-        # Prepare document for MongoDB
-        agent_document = {
-            'name': agent_data['name'],
-            'description': agent_data['description'],
-            'tools': agent_data['tools'],
-            'status': 'active',
-            'created_at': datetime.now(),
-            'updated_at': datetime.now()
-        }
-        
-        # Insert into MongoDB
-        result = agents_collection.insert_one(agent_document)
-        logger.info(f"Agent saved to MongoDB with ID: {result.inserted_id}")
-        return str(result.inserted_id)
+        agent_id = agent_store.insert_agent(agent_document(agent_data))
+        logger.info(f"Agent saved with ID: {agent_id}")
+        return agent_id
     except Exception as e:
-        logger.error(f"Error saving agent to MongoDB: {str(e)}")
+        logger.error(f"Error saving agent: {str(e)}")
         raise
 
 @app.route('/api/agents', methods=['GET'])
 def get_agents():
-    """API endpoint to get all agents."""
+    """API endpoint to get a page of agents, newest first by default."""
     try:
-        # Retrieve all agents from MongoDB
-        agents = list(agents_collection.find({}, {'_id': 0}))
+        # Repeated identical queries are answered from memory; unchanged pages cost only a 304
+        cache_key = json.dumps(sorted(request.args.items(multi=True)))
+        cached = agents_cache.get(cache_key)
+        if cached is not None:
+            body, etag = cached
+        else:
+            listing = parse_listing_args(request.args)
+            generation = agents_cache.generation()
+            documents = agent_store.list_agents(listing)
+            page = shape_page(documents, listing)
+            body = app.json.dumps({
+                'success': True,
+                **page
+            })
+            etag = agents_cache.put(cache_key, body, generation)
+        
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        # Browsers must revalidate every time, which is what keeps newly created agents visible
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    except InvalidListingRequest as e:
         return jsonify({
-            'success': True,
-            'agents': agents
-        })
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error retrieving agents: {str(e)}")
         return jsonify({
@@ -79,143 +437,959 @@ def get_agents():
             'message': f"Error retrieving agents: {str(e)}"
         }), 500
 
+@app.route('/api/prepare', methods=['POST'])
+def prepare_session():
+    """API endpoint the UI calls while the user is filling in the form, to fetch the documentation ahead of time."""
+    data = request.get_json(silent=True) or {}
+    token = str(data.get('sessionToken') or '')
+    if token and not TRACE_ID_PATTERN.match(token):
+        return jsonify({
+            'success': False,
+            'message': "'sessionToken' may only contain letters, digits and . _ : -"
+        }), 400
+    token = token or uuid.uuid4().hex
+    if doc_prefetcher is None:
+        # The create request may still be generated on a node that prefetches, so the token is worth sending
+        return jsonify({
+            'success': True,
+            'message': "Nothing to prepare on this node",
+            'session': {'token': token, 'status': 'skipped', 'expiresIn': 0}
+        })
+    session = doc_prefetcher.prepare(token)
+    return jsonify({
+        'success': True,
+        'message': "Session prepared" if session['status'] == 'ready' else "Preparing session",
+        'session': session
+    }), 200 if session['status'] == 'ready' else 202
+
 @app.route('/api/create-agent', methods=['POST'])
 def create_agent():
-    """API endpoint to create a Strands agent."""
+    """API endpoint to queue the creation of a Strands agent."""
     try:
         # Get data from request
         data = request.json
+        if not data or not data.get('name') or not data.get('description'):
+            return jsonify({
+                'success': False,
+                'message': "Agent name and description are required"
+            }), 400
+        error = apply_generation_options(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'message': error
+            }), 400
         logger.info(f"Received request to create agent: {data['name']}")
         
-        # Extract agent details
-        agent_name = data['name']
-        agent_description = data['description']
-        standard_tools = data.get('standardTools', [])
-        custom_tools = data.get('customTools', [])
+        # Template renders and identical specs (from the generation cache) finish right away instead of queuing
+        if data['mode'] == 'template' or is_cached_generation(data):
+            job = job_queue.run_inline('create-agent', run_create_agent_job, data, trace_id=g.trace_id,
+                                       locks=agent_locks([data['name']]))
+            # Queued instead when another job is working on the same agent
+            if job.finished:
+                message = f"Agent '{data['name']}' created from {'template' if data['mode'] == 'template' else 'cache'}"
+            else:
+                message = f"Agent '{data['name']}' queued for creation"
+            return jsonify({
+                'success': True,
+                'message': message,
+                'job': job.to_dict()
+            }), 200 if job.finished else 202
         
-        # Combine all tools
-        all_tools = standard_tools.copy()
+        # Queue the generation and return immediately with the job id
+        job = job_queue.submit('create-agent', run_create_agent_job, data, trace_id=g.trace_id,
+                               locks=agent_locks([data['name']]))
         
-        # Process custom tools
-        custom_tool_code = []
-        for tool in custom_tools:
-            all_tools.append(tool['name'])
-            # Generate code for custom tools
-            tool_code = generate_custom_tool_code(tool['name'], tool['description'])
-            custom_tool_code.append(tool_code)
+        return jsonify({
+            'success': True,
+            'message': f"Agent '{data['name']}' queued for creation",
+            'job': job.to_dict()
+        }), 202
         
-        # Create the agent
-        result = strands_agent.create_strands_agent(agent_name, agent_description, all_tools)
+    except QueueFullError as e:
+        logger.warning(f"Rejected agent creation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429
+    except Exception as e:
+        logger.error(f"Error queuing agent creation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f"Error creating agent: {str(e)}"
+        }), 500
+
+@app.route('/api/create-agent/stream', methods=['POST'])
+def create_agent_stream():
+    """API endpoint to create a Strands agent and stream its progress as Server-Sent Events."""
+    try:
+        data = request.json
+        if not data or not data.get('name') or not data.get('description'):
+            return jsonify({
+                'success': False,
+                'message': "Agent name and description are required"
+            }), 400
+        error = apply_generation_options(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'message': error
+            }), 400
+        logger.info(f"Received streaming request to create agent: {data['name']}")
         
-        # If custom tools were provided, update the agent file to include them
-        if custom_tool_code:
-            update_agent_with_custom_tools(agent_name, custom_tool_code)
+        if data['mode'] == 'template' or is_cached_generation(data):
+            job = job_queue.run_inline('create-agent', run_create_agent_job, data, trace_id=g.trace_id,
+                                       locks=agent_locks([data['name']]))
+        else:
+            job = job_queue.submit('create-agent', run_create_agent_job, data, trace_id=g.trace_id,
+                                   locks=agent_locks([data['name']]))
+        return job_event_stream(job)
         
-        # Save agent to MongoDB
-        agent_data = {
-            'name': agent_name,
-            'description': agent_description,
-            'tools': all_tools
-        }
-        mongo_id = save_agent_to_mongodb(agent_data)
+    except QueueFullError as e:
+        logger.warning(f"Rejected agent creation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429
+    except Exception as e:
+        logger.error(f"Error queuing agent creation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f"Error creating agent: {str(e)}"
+        }), 500
+
+@app.route('/api/agents/batch', methods=['POST'])
+def create_agents_batch():
+    """API endpoint to queue the creation of many Strands agents, generated in parallel."""
+    try:
+        data = request.json or {}
+        specs = data.get('agents')
+        if not isinstance(specs, list) or not specs:
+            return jsonify({
+                'success': False,
+                'message': "'agents' must be a non-empty list of agent specs"
+            }), 400
+        if len(specs) > batch_max_size:
+            return jsonify({
+                'success': False,
+                'message': f"A batch may contain at most {batch_max_size} agents"
+            }), 400
+        names = set()
+        for index, spec in enumerate(specs):
+            if not isinstance(spec, dict) or not spec.get('name') or not spec.get('description'):
+                return jsonify({
+                    'success': False,
+                    'message': f"Agent {index}: name and description are required"
+                }), 400
+            # Each agent is written to a file named after it, so names must be unique within a batch
+            if agent_file_path(spec['name']) in names:
+                return jsonify({
+                    'success': False,
+                    'message': f"Agent {index}: duplicate agent name '{spec['name']}'"
+                }), 400
+            names.add(agent_file_path(spec['name']))
+            error = apply_generation_options(spec)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'message': f"Agent {index}: {error}"
+                }), 400
+            # Batches share the pool through create_strands_agents_batch, which only runs full generations
+            if spec['mode'] == 'hybrid':
+                return jsonify({
+                    'success': False,
+                    'message': f"Agent {index}: 'hybrid' mode is not supported in batches"
+                }), 400
         
-        logger.info(f"Agent created successfully: {agent_name}")
+        try:
+            options = {
+                'concurrency': max(1, min(int(data.get('concurrency', batch_max_concurrency)), batch_max_concurrency)),
+                'timeout': float(data.get('timeout', batch_item_timeout)),
+                'retries': max(0, int(data.get('retries', batch_retries)))
+            }
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'message': "'concurrency', 'timeout' and 'retries' must be numbers"
+            }), 400
+        logger.info(f"Received request to create {len(specs)} agents")
         
-        # Return success response
+        job = job_queue.submit('create-agents-batch', run_create_agents_batch_job, {'agents': specs, 'options': options},
+                               trace_id=g.trace_id, locks=agent_locks([spec['name'] for spec in specs]))
         return jsonify({
             'success': True,
-            'message': f"Agent '{agent_name}' created successfully",
-            'agent': {
-                'name': agent_name,
-                'description': agent_description,
-                'tools': all_tools,
-                'mongo_id': mongo_id
-            }
-        })
+            'message': f"{len(specs)} agents queued for creation",
+            'job': job.to_dict()
+        }), 202
         
+    except QueueFullError as e:
+        logger.warning(f"Rejected batch agent creation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429
     except Exception as e:
-        logger.error(f"Error creating agent: {str(e)}")
+        logger.error(f"Error queuing batch agent creation: {str(e)}")
         return jsonify({
             'success': False,
-            'message': f"Error creating agent: {str(e)}"
+            'message': f"Error creating agents: {str(e)}"
         }), 500
 
-def generate_custom_tool_code(tool_name, tool_description):
-    """Generate code for a custom tool using the @tool decorator."""
-    # Convert tool name to snake_case for function name
-    function_name = tool_name.lower().replace(' ', '_')
-    
-    # Generate the tool code
-    tool_code = f"""
-    @tool
-    def {function_name}(self, query: str) -> Dict[str, Any]:
-        \"\"\"
-        {tool_description}
+@app.route('/api/agents/<name>', methods=['PATCH'])
+def update_agent(name):
+    """API endpoint to change an agent's description or tools, regenerating only the tool methods that changed."""
+    try:
+        data = request.json or {}
+        custom_tools = data.get('customTools')
+        if custom_tools is not None and (not isinstance(custom_tools, list) or any(
+                not isinstance(tool, dict) or not tool.get('name') for tool in custom_tools)):
+            return jsonify({
+                'success': False,
+                'message': "'customTools' must be a list of tools with a name"
+            }), 400
+        mode = str(data.get('mode') or generation_mode).lower()
+        if mode not in GENERATION_MODES:
+            return jsonify({
+                'success': False,
+                'message': f"'mode' must be one of {', '.join(GENERATION_MODES)}"
+            }), 400
         
-        Args:
-            query (str): The input query for the tool
-            
-        Returns:
-            Dict[str, Any]: A dictionary containing the result of the operation
-        \"\"\"
+        stored = agent_store.get_agent(name)
+        if stored is None:
+            return jsonify({
+                'success': False,
+                'message': f"Agent '{name}' not found"
+            }), 404
+        if artifact_store.backend.get_version(name) is None and not os.path.exists(agent_file_path(name)):
+            return jsonify({
+                'success': False,
+                'message': f"Code file of agent '{name}' not found"
+            }), 404
+        
+        payload = plan_agent_update(stored, data)
+        payload['mode'] = mode
+        logger.info(f"Received request to update agent {name}: {len(payload['added'])} tools added, "
+                    f"{len(payload['changed'])} changed, {len(payload['removed'])} removed")
+        
+        # Without tool methods for the model to write, the edit finishes right away
+        if mode == 'template' or not (payload['added'] or payload['changed']):
+            job = job_queue.run_inline('update-agent', run_update_agent_job, payload, trace_id=g.trace_id,
+                                       locks=agent_locks([name]))
+            return jsonify({
+                'success': True,
+                'message': f"Agent '{name}' updated" if job.finished else f"Agent '{name}' queued for update",
+                'job': job.to_dict()
+            }), 200 if job.finished else 202
+        
+        job = job_queue.submit('update-agent', run_update_agent_job, payload, trace_id=g.trace_id,
+                               locks=agent_locks([name]))
+        return jsonify({
+            'success': True,
+            'message': f"Agent '{name}' queued for update",
+            'job': job.to_dict()
+        }), 202
+        
+    except QueueFullError as e:
+        logger.warning(f"Rejected agent update: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429
+    except Exception as e:
+        logger.error(f"Error updating agent: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f"Error updating agent: {str(e)}"
+        }), 500
+
+@app.route('/api/agents/<name>/code', methods=['GET'])
+def get_agent_code(name):
+    """API endpoint serving an agent's code, with ETag, Last-Modified and Range support."""
+    try:
+        version = request.args.get('version')
+        if version is not None and not version.isdigit():
+            return jsonify({
+                'success': False,
+                'message': "'version' must be a positive integer"
+            }), 400
+        record, code = artifact_store.get(name, int(version) if version is not None else None)
+        if record is None and version is None:
+            # Agents created before the artifact store existed only have their file
+            record, code = read_legacy_agent_code(name)
+        if record is None:
+            return jsonify({
+                'success': False,
+                'message': f"Code of agent '{name}'{f' version {version}' if version else ''} not found"
+            }), 404
+        
+        response = Response(code, mimetype='text/x-python')
+        # The content hash is a strong validator, so byte ranges of one version are never mixed with another
+        response.set_etag(record['sha256'])
+        response.last_modified = record['created_at']
+        response.headers['X-Agent-Version'] = str(record['version'])
+        response.headers['Content-Disposition'] = f"inline; filename=\"{os.path.basename(agent_file_path(name))}\""
+        # A numbered version never changes; the latest one must be revalidated
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable' if version else 'no-cache'
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(code))
+    except RequestedRangeNotSatisfiable:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving code of agent {name}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f"Error retrieving agent code: {str(e)}"
+        }), 500
+
+@app.route('/api/agents/<name>/versions', methods=['GET'])
+def list_agent_versions(name):
+    """API endpoint listing the stored versions of an agent's code, newest first."""
+    try:
         try:
-            # Implement the tool functionality here
-            result = f"Processed query: {{query}}"
-            
-            return {{
-                "success": True,
-                "result": result,
-                "message": f"Successfully executed {tool_name}"
-            }}
-        except Exception as e:
-            return {{
-                "success": False,
-                "error": str(e),
-                "message": f"Failed to execute {tool_name}: {{str(e)}}"
-            }}
-    """
+            limit = int(request.args.get('limit', 100))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return jsonify({
+                'success': False,
+                'message': "'limit' must be a positive integer"
+            }), 400
+        versions = artifact_store.versions(name, min(limit, 1000))
+        return jsonify({
+            'success': True,
+            'name': name,
+            'versions': [{**record, 'created_at': record['created_at'].isoformat() + 'Z'} for record in versions]
+        })
+    except Exception as e:
+        logger.error(f"Error listing versions of agent {name}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f"Error listing agent versions: {str(e)}"
+        }), 500
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """API endpoint to list recent jobs."""
+    try:
+        status = request.args.get('status')
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return jsonify({
+                'success': False,
+                'message': "'limit' must be a positive integer"
+            }), 400
+        jobs = job_queue.list(status=status, limit=min(limit, 500))
+        return jsonify({
+            'success': True,
+            'jobs': [job.to_dict() for job in jobs],
+            'stats': job_queue.stats(),
+            'pool': agent_pool.stats(),
+            'mcp': mcp_manager.stats(),
+            'model_scheduler': model_scheduler.stats() if model_scheduler is not None else None,
+            'generation_cache': generation_cache.stats() if generation_cache is not None else None,
+            'artifacts': artifact_store.stats(),
+            'prepare': doc_prefetcher.stats() if doc_prefetcher is not None else None,
+            'agents_cache': {**agents_cache.stats(), 'change_stream': agents_change_stream is not None and agents_change_stream.active}
+        })
+    except Exception as e:
+        logger.error(f"Error listing jobs: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f"Error listing jobs: {str(e)}"
+        }), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """API endpoint to get the state of a single job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f"Job '{job_id}' not found"
+        }), 404
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def get_job_events(job_id):
+    """API endpoint streaming the progress events of a job as Server-Sent Events."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f"Job '{job_id}' not found"
+        }), 404
     
-    return tool_code
+    # Resume after the last event the client saw when EventSource reconnects
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('after'))
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    return job_event_stream(job, start)
 
-def update_agent_with_custom_tools(agent_name, custom_tool_code):
-    """Update the generated agent file to include custom tools."""
-    # Convert agent name to snake_case for filename
-    filename = agent_name.lower().replace(' ', '_') + '.py'
-    file_path = os.path.join('agents', filename)
+def job_event_stream(job, start=0):
+    """Build a Server-Sent Events response that follows a job until it finishes."""
+    def generate():
+        yield f"event: job\ndata: {json.dumps(job.to_dict())}\n\n"
+        for item in job.iter_events(start):
+            if item is None:
+                # Comment line keeps proxies and browsers from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            index, event = item
+            yield f"id: {index}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
     
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/templates', methods=['GET'])
+def list_templates():
+    """API endpoint to list the agent templates and the default generation mode."""
+    return jsonify({
+        'success': True,
+        'templates': template_library.names(),
+        'defaultTemplate': default_template,
+        'modes': list(GENERATION_MODES),
+        'defaultMode': generation_mode
+    })
+
+def apply_generation_options(data):
+    """Fill in the generation mode and template of a create-agent request; return an error message if invalid."""
+    data['mode'] = str(data.get('mode') or generation_mode).lower()
+    if data['mode'] not in GENERATION_MODES:
+        return f"'mode' must be one of {', '.join(GENERATION_MODES)}"
+    data['template'] = data.get('template') or default_template
+    if data['mode'] != 'llm' and not template_library.has(data['template']):
+        return f"Unknown template '{data['template']}', expected one of {', '.join(template_library.names())}"
+    return None
+
+def agent_locks(names):
+    """Return the job lock names for the agent files a job writes, so no two jobs write the same file at once."""
+    return [f"agent:{os.path.basename(agent_file_path(name))}" for name in names]
+
+def combine_tools(data):
+    """Return the names of all standard and custom tools requested for an agent."""
+    return data.get('standardTools', []) + [tool['name'] for tool in data.get('customTools', [])]
+
+def custom_tool_specs(data):
+    """Return the name and description of each custom tool requested for an agent, as stored with it."""
+    return [{'name': tool['name'], 'description': tool.get('description') or ''} for tool in data.get('customTools', [])]
+
+def generation_key(data):
+    """Return the generation cache key for a create-agent request."""
+    return spec_key(data['name'], data['description'], combine_tools(data), MODEL_ID, SYSTEM_PROMPT_VERSION)
+
+def is_cached_generation(data):
+    """Check whether a create-agent request can be answered from the generation cache."""
+    return (
+        generation_cache is not None
+        and data.get('mode', 'llm') == 'llm'
+        and not data.get('forceRegenerate')
+        and generation_cache.contains(generation_key(data))
+    )
+
+def write_agent_file(agent_name, code):
+    """Write agent code atomically so readers never see a partially written file."""
+    file_path = agent_file_path(agent_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    # Unique across hosts, for agents directories on shared storage
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(code)
+    os.replace(tmp_path, file_path)
+
+def read_legacy_agent_code(agent_name):
+    """Return a version record and the code of an agent that only exists as a file, or (None, None)."""
+    file_path = agent_file_path(agent_name)
     try:
-        # Read the existing file
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Find the class definition
-        class_def_index = content.find('class ')
-        if class_def_index == -1:
-            logger.error(f"Could not find class definition in {file_path}")
-            return
-        
-        # Find a good place to insert the custom tools (after the class definition)
-        # Look for the first method definition after the class
-        method_index = content.find('def ', class_def_index)
-        if method_index == -1:
-            logger.error(f"Could not find method definition in {file_path}")
-            return
-        
-        # Insert the custom tools before the first method
-        new_content = content[:method_index] + '\n'.join(custom_tool_code) + '\n\n' + content[method_index:]
+        with open(file_path, 'rb') as f:
+            code = f.read()
+        modified = os.path.getmtime(file_path)
+    except FileNotFoundError:
+        return None, None
+    return {
+        'agent': agent_name,
+        'version': 0,
+        'sha256': hashlib.sha256(code).hexdigest(),
+        'size': len(code),
+        'source': 'file',
+        'created_at': datetime.fromtimestamp(modified, timezone.utc).replace(tzinfo=None)
+    }, code
+
+def load_agent_code(agent_name):
+    """Return the latest code of an agent from the artifact store, falling back to its file."""
+    try:
+        _, code = artifact_store.get(agent_name)
+    except ArtifactError as e:
+        logger.warning(f"Reading {agent_name} from its file: {str(e)}")
+        code = None
+    if code is None:
+        _, code = read_legacy_agent_code(agent_name)
+    if code is None:
+        raise PostProcessError(f"Code of agent {agent_name} not found")
+    return code.decode('utf-8')
+
+def store_artifact(job, agent_name, code, source):
+    """Store a version of an agent's code in the artifact store and return its reference for the agent document."""
+    job.ensure_owned()
+    with job.timed('artifact'):
+        record = artifact_store.put(agent_name, code, source=source, trace_id=job.trace_id)
+    return {'version': record['version'], 'sha256': record['sha256'], 'size': record['size']}
+
+def read_agent_file(agent_name):
+    """Return the code the model wrote for an agent with file_write."""
+    try:
+        with open(agent_file_path(agent_name), 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise PostProcessError(f"Model did not write {agent_file_path(agent_name)}")
+
+def complete_agent_code(job, agent_name, code, custom_tools, on_disk=False, fixups=0, priority='interactive',
+                        callback_handler=None):
+    """
+    Complete agent code with the post-processing pipeline, validate it, and write it atomically.
+    
+    Code that fails post-processing or validation goes back to the model with its errors, up to `fixups`
+    times, instead of being generated again. Code already on disk (written by the model) is only rewritten
+    if it changed; code that is still invalid raises PostProcessError before anything is stored, and a
+    rejected file is renamed to <name>.py.rejected.
+    
+    Returns:
+        tuple: (the completed code, the code it was completed from, e.g. for the generation cache,
+            the validation report or None when validation is disabled)
+    """
+    file_path = agent_file_path(agent_name)
+    original = code
+    attempts = 0
+    while True:
+        report = None
+        try:
+            with job.timed('post_processing'):
+                final = process_agent_code(code, custom_tools, file_path)
+            if validation_pool is not None:
+                job.emit('phase', {'name': 'validating'})
+                with job.timed('validation'):
+                    report = validation_pool.validate(final, file_path)
+                if report['status'] == 'error':
+                    # The checks could not run; that says nothing about the code, so it is not held back
+                    logger.warning(f"Could not validate {file_path}: {'; '.join(report['errors'])}")
+            if report is None or report['status'] != 'failed':
+                break
+            errors, failed_code = report['errors'], final
+            failure = f"Generated code for {file_path} failed validation: {'; '.join(errors)}"
+        except PostProcessError as e:
+            errors, failed_code, failure = [str(e)], code, str(e)
         
-        # Write the updated content back to the file
-        with open(file_path, 'w') as f:
-            f.write(new_content)
+        fixed = None
+        if attempts < fixups:
+            attempts += 1
+            job.emit('phase', {'name': 'fixing', 'errors': errors})
+            fixed = request_fixup(job, agent_name, failed_code, errors, priority, callback_handler)
+        if fixed is None:
+            if on_disk:
+                # Keep the model's output for inspection, but not where it would be picked up as an agent
+                job.ensure_owned()
+                os.replace(file_path, f"{file_path}.rejected")
+            raise PostProcessError(failure)
+        code = fixed
+    
+    if report is not None:
+        report['fixups'] = attempts
+    if not on_disk or final != original:
+        job.ensure_owned()
+        write_agent_file(agent_name, final)
+    return final, code, report
+
+def request_fixup(job, agent_name, code, errors, priority='interactive', callback_handler=None):
+    """Have a pooled StrandsAgent repair invalid agent code in one model turn; returns None if it could not."""
+    with job.timed('pool_checkout'):
+        strands_agent = agent_pool.checkout()
+    try:
+        with job.timed('fixup'):
+            return strands_agent.fix_agent_code(agent_name, code, errors, callback_handler=callback_handler,
+                                                priority=priority)
+    except Exception as e:
+        logger.error(f"Error fixing {agent_name}: {str(e)}")
+        return None
+    finally:
+        job.timings['fixup_model'] = strands_agent.last_timings
+        agent_pool.checkin(strands_agent)
+
+def lookup_generation(data):
+    """Return the cached generation for a create-agent request, unless the client asks for a fresh one."""
+    if generation_cache is None or data.get('forceRegenerate') or data.get('mode', 'llm') != 'llm':
+        return None
+    return generation_cache.get(generation_key(data))
+
+def prepared_documentation(job):
+    """Return the documentation prefetched for a create-agent request's session, or None to let the model look it up."""
+    token = job.payload.get('prepareToken')
+    if doc_prefetcher is None or not token:
+        return None
+    with job.timed('documentation'):
+        documentation = doc_prefetcher.documentation(str(token))
+    if documentation:
+        job.emit('phase', {'name': 'documentation_ready', 'tools': [lookup['name'] for lookup in documentation]})
+    return documentation
+
+def wait_for_warmup(job):
+    """Block a job until the MCP servers and first agents are up."""
+    if warmup.ready:
+        return
+    job.emit('phase', {'name': 'warming_up'})
+    if not warmup.wait(agent_pool.checkout_timeout):
+        raise RuntimeError(f"Server is still warming up: {warmup.last_error or warmup.status}")
+
+def run_create_agent_job(job):
+    """Generate an agent for a queued create-agent job and return the agent details."""
+    data = job.payload
+    
+    # Extract agent details
+    agent_name = data['name']
+    agent_description = data['description']
+    
+    # Combine all tools
+    all_tools = combine_tools(data)
+    
+    # Templates write the custom tool methods themselves
+    mode = data.get('mode', 'llm')
+    
+    cached = None
+    if mode != 'llm':
+        code = render_agent(job, data)
+    else:
+        # Reuse the code generated for an identical spec unless the client asks for a fresh generation
+        with job.timed('cache_lookup'):
+            cached = lookup_generation(data)
+    
+        if cached is not None:
+            job.emit('phase', {'name': 'cached'})
+            code = cached['code']
+        else:
+            # The cached generation expected by the request thread is gone; generate on a worker, not inline
+            if job.inline:
+                raise DeferredJob("cached generation is no longer available")
+            
+            # Jobs submitted right after startup wait for the MCP servers and first agents to come up
+            with job.timed('warmup_wait'):
+                wait_for_warmup(job)
         
-        logger.info(f"Updated {file_path} with custom tools")
+            # Documentation prefetched while the user filled in the form saves the model its lookups
+            documentation = prepared_documentation(job)
         
-    except Exception as e:
-        logger.error(f"Error updating agent file with custom tools: {str(e)}")
+            # Create the agent on a pooled instance with a fresh conversation
+            job.emit('phase', {'name': 'generating'})
+            with job.timed('pool_checkout'):
+                strands_agent = agent_pool.checkout()
+            try:
+                with job.timed('generation'):
+                    strands_agent.create_strands_agent(agent_name, agent_description, all_tools, raise_errors=True,
+                                                       callback_handler=GenerationEventHandler(job.emit),
+                                                       documentation=documentation)
+            finally:
+                job.timings['model'] = strands_agent.last_timings
+                agent_pool.checkin(strands_agent)
+            code = read_agent_file(agent_name)
+    
+    return finish_create_agent_job(job, code, cached)
+
+def finish_create_agent_job(job, code, cached=None):
+    """Complete, validate, cache and save the code of a create-agent job, and return the agent details."""
+    data = job.payload
+    agent_name = data['name']
+    agent_description = data['description']
+    custom_tools = data.get('customTools', [])
+    all_tools = combine_tools(data)
+    mode = data.get('mode', 'llm')
+    
+    # Add custom tools and missing imports, then validate; code the model wrote gets targeted fix-ups if it
+    # fails, and broken code is never stored
+    job.emit('phase', {'name': 'post_processing'})
+    generated = mode == 'hybrid' or (mode == 'llm' and cached is None)
+    final, code, validation = complete_agent_code(job, agent_name, code, custom_tools if mode == 'llm' else [],
+                                                  on_disk=mode == 'llm' and cached is None,
+                                                  fixups=validation_fixups if generated else 0,
+                                                  callback_handler=GenerationEventHandler(job.emit))
+    if mode == 'llm' and cached is None:
+        job.ensure_owned()
+        with job.timed('cache_store'):
+            cache_generation(generation_key(data), agent_name, agent_description, all_tools, code)
+    
+    # Save the code and the agent to the agent store
+    job.emit('phase', {'name': 'saving'})
+    artifact = store_artifact(job, agent_name, final, 'create')
+    agent_data = {
+        'name': agent_name,
+        'description': agent_description,
+        'tools': all_tools,
+        'custom_tools': custom_tool_specs(data),
+        'validation': validation,
+        'artifact': artifact
+    }
+    # A job taken over by another node while it ran leaves the saving to that node
+    job.ensure_owned()
+    with job.timed('save'):
+        agent_id = save_agent(agent_data)
+    
+    logger.info(f"Agent created successfully: {agent_name} [trace {job.trace_id}]")
+    
+    return {
+        'name': agent_name,
+        'description': agent_description,
+        'tools': all_tools,
+        # Kept under its original name for existing clients, whichever backend stored the agent
+        'mongo_id': agent_id,
+        'file_path': agent_file_path(agent_name),
+        'cached': cached is not None,
+        'mode': mode,
+        'validation': validation,
+        'artifact': artifact
+    }
+
+def render_agent(job, data):
+    """Render an agent from the template library; in 'hybrid' mode the model first writes the tool method bodies."""
+    tool_bodies = None
+    if data['mode'] == 'hybrid':
+        _, methods = tool_specs(data.get('standardTools', []), data.get('customTools', []))
+        if methods:
+            with job.timed('warmup_wait'):
+                wait_for_warmup(job)
+            job.emit('phase', {'name': 'generating'})
+            with job.timed('pool_checkout'):
+                strands_agent = agent_pool.checkout()
+            try:
+                with job.timed('generation'):
+                    tool_bodies = strands_agent.generate_tool_bodies(data['name'], data['description'], methods,
+                                                                     callback_handler=GenerationEventHandler(job.emit))
+            finally:
+                job.timings['model'] = strands_agent.last_timings
+                agent_pool.checkin(strands_agent)
+    
+    job.emit('phase', {'name': 'rendering'})
+    with job.timed('render'):
+        return template_library.render(data['template'], data['name'], data['description'],
+                                       data.get('standardTools', []), data.get('customTools', []), tool_bodies)
+
+def plan_agent_update(stored, data):
+    """Diff an update request against the stored agent and return the payload of its update job."""
+    old_tools = {tool['name']: tool.get('description') or '' for tool in stored.get('custom_tools', [])}
+    if data.get('customTools') is None:
+        new_tools = dict(old_tools)
+    else:
+        new_tools = {tool['name']: tool.get('description') or '' for tool in data['customTools']}
+    # Agents stored before custom tool specs were kept have none on record, so every requested tool is
+    # (re)generated and nothing is known to be removed
+    standard_tools = data.get('standardTools')
+    if standard_tools is None:
+        standard_tools = [tool for tool in stored.get('tools', []) if tool not in old_tools]
+    return {
+        'name': stored['name'],
+        'agent_id': str(stored['_id']),
+        'description': data.get('description') or stored['description'],
+        'standard_tools': standard_tools,
+        'custom_tools': [{'name': name, 'description': description} for name, description in new_tools.items()],
+        'added': [name for name in new_tools if name not in old_tools],
+        'changed': [name for name in new_tools if name in old_tools and new_tools[name] != old_tools[name]],
+        'removed': [name for name in old_tools if name not in new_tools]
+    }
+
+def run_update_agent_job(job):
+    """Regenerate the changed tool methods of an agent, splice them into its file and update its stored document."""
+    update = job.payload
+    agent_name = update['name']
+    descriptions = {tool['name']: tool['description'] for tool in update['custom_tools']}
+    regenerate = [{'name': name, 'function_name': python_identifier(name), 'description': descriptions[name]}
+                  for name in update['added'] + update['changed']]
+    
+    # One short model turn writes the new method bodies; the rest of the file is kept as it is
+    tool_bodies = {}
+    if regenerate and update['mode'] != 'template':
+        with job.timed('warmup_wait'):
+            wait_for_warmup(job)
+        job.emit('phase', {'name': 'generating'})
+        with job.timed('pool_checkout'):
+            strands_agent = agent_pool.checkout()
+        try:
+            with job.timed('generation'):
+                tool_bodies = strands_agent.generate_tool_bodies(agent_name, update['description'], regenerate,
+                                                                 callback_handler=GenerationEventHandler(job.emit))
+        finally:
+            job.timings['model'] = strands_agent.last_timings
+            agent_pool.checkin(strands_agent)
+    
+    fields = {}
+    if regenerate or update['removed']:
+        job.emit('phase', {'name': 'post_processing'})
+        with job.timed('post_processing'):
+            # The stored code rather than the local file, which may be missing or stale on this node
+            content = load_agent_code(agent_name)
+            content = splice_tool_methods(content, replace={
+                tool['function_name']: generate_custom_tool_code(tool['name'], tool['description'],
+                                                                 tool_bodies.get(tool['function_name']))
+                for tool in regenerate
+            }, remove=[python_identifier(name) for name in update['removed']])
+        # The edited file replaces the current one only once it passes validation
+        content, _, fields['validation'] = complete_agent_code(job, agent_name, content, update['custom_tools'],
+                                                               fixups=validation_fixups if tool_bodies else 0,
+                                                               callback_handler=GenerationEventHandler(job.emit))
+    
+    # Update the stored agent in place so it keeps its id and creation time
+    job.emit('phase', {'name': 'saving'})
+    if 'validation' in fields:
+        fields['artifact'] = store_artifact(job, agent_name, content, 'update')
+    all_tools = update['standard_tools'] + [tool['name'] for tool in update['custom_tools']]
+    job.ensure_owned()
+    with job.timed('save'):
+        agent_store.update_agent(update['agent_id'], {
+            'description': update['description'],
+            'tools': all_tools,
+            'custom_tools': update['custom_tools'],
+            **fields,
+            'updated_at': datetime.now()
+        })
+    
+    logger.info(f"Agent updated successfully: {agent_name} [trace {job.trace_id}]")
+    return {
+        'name': agent_name,
+        'description': update['description'],
+        'tools': all_tools,
+        'mongo_id': update['agent_id'],
+        'file_path': agent_file_path(agent_name),
+        'added': update['added'],
+        'changed': update['changed'],
+        'removed': update['removed'],
+        'mode': update['mode'],
+        'validation': fields.get('validation'),
+        'artifact': fields.get('artifact')
+    }
+
+def run_create_agents_batch_job(job):
+    """Generate every agent of a batch job in parallel, then save the successful ones with one bulk write."""
+    specs = job.payload['agents']
+    options = job.payload['options']
+    results = [None] * len(specs)
+    
+    # Template and cached specs have their code right away; only the rest go to the model
+    pending = []
+    codes = {}
+    for index, data in enumerate(specs):
+        if data.get('mode', 'llm') == 'template':
+            codes[index] = render_agent(job, data)
+            cached = False
+        else:
+            with job.timed('cache_lookup'):
+                cached = lookup_generation(data)
+            if cached is None:
+                pending.append(index)
+                continue
+            codes[index] = cached['code']
+            cached = True
+        results[index] = {'name': data['name'], 'success': True, 'attempts': 0, 'seconds': 0.0, 'error': None,
+                          'cached': cached}
+        job.emit('item', {'index': index, **results[index]})
+    
+    if pending:
+        with job.timed('warmup_wait'):
+            wait_for_warmup(job)
+        job.emit('phase', {'name': 'generating'})
+        with job.timed('generation'):
+            generated = StrandsAgent.create_strands_agents_batch(
+                [{'name': specs[index]['name'], 'purpose': specs[index]['description'], 'tools': combine_tools(specs[index])}
+                 for index in pending],
+                max_concurrency=options['concurrency'],
+                timeout=options['timeout'],
+                retries=options['retries'],
+                pool=agent_pool,
+                on_result=lambda position, result: job.emit('item', {'index': pending[position], **result, 'cached': False})
+            )
+        for index, result in zip(pending, generated):
+            results[index] = {**result, 'cached': False}
+    
+    # Complete and validate the files in parallel, one per validation worker; code the model just wrote gets
+    # targeted fix-ups, and agents whose code stays broken are reported as failed, not stored
+    job.emit('phase', {'name': 'post_processing'})
+    validations = {}
+    artifacts = {}
+    
+    def complete(index):
+        data = specs[index]
+        generated_now = index in pending
+        try:
+            code = codes[index] if not generated_now else read_agent_file(data['name'])
+            final, code, validations[index] = complete_agent_code(
+                job, data['name'], code, data.get('customTools', []) if data.get('mode', 'llm') == 'llm' else [],
+                on_disk=generated_now, fixups=validation_fixups if generated_now else 0, priority='batch')
+            artifacts[index] = store_artifact(job, data['name'], final, 'create')
+        except PostProcessError as e:
+            logger.error(str(e))
+            results[index] = {**results[index], 'success': False, 'error': str(e)}
+            job.emit('item', {'index': index, **results[index]})
+            return
+        if generated_now:
+            job.ensure_owned()
+            with job.timed('cache_store'):
+                cache_generation(generation_key(data), data['name'], data['description'], combine_tools(data), code)
+    
+    completing = [index for index, result in enumerate(results) if result['success']]
+    workers = validation_pool.size if validation_pool is not None else 1
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(completing))), thread_name_prefix='batch-validate') as executor:
+        list(executor.map(complete, completing))
+    
+    # Store all successful agents in one round-trip
+    job.emit('phase', {'name': 'saving'})
+    saved = [index for index, result in enumerate(results) if result['success']]
+    documents = [agent_document({
+        'name': specs[index]['name'],
+        'description': specs[index]['description'],
+        'tools': combine_tools(specs[index]),
+        'custom_tools': custom_tool_specs(specs[index]),
+        'validation': validations.get(index),
+        'artifact': artifacts.get(index)
+    }) for index in saved]
+    job.ensure_owned()
+    with job.timed('save'):
+        agent_ids = agent_store.insert_agents(documents) if documents else []
+    for index, agent_id in zip(saved, agent_ids):
+        results[index]['mongo_id'] = agent_id
+        results[index]['file_path'] = agent_file_path(specs[index]['name'])
+        results[index]['validation'] = validations.get(index)
+        results[index]['artifact'] = artifacts.get(index)
+    
+    logger.info(f"Batch created {len(saved)} of {len(specs)} agents")
+    return {
+        'total': len(specs),
+        'succeeded': len(saved),
+        'failed': len(specs) - len(saved),
+        'agents': results
+    }
+
+def cache_generation(cache_key, agent_name, agent_description, all_tools, code):
+    """Store the code the model wrote for an agent in the generation cache."""
+    if generation_cache is None:
+        return
+    generation_cache.put(cache_key, code, {
+        'name': agent_name,
+        'description': agent_description,
+        'tools': all_tools,
+        'model_id': MODEL_ID,
+        'prompt_version': SYSTEM_PROMPT_VERSION
+    })
+
+# Job functions by kind; nodes sharing a distributed queue run jobs queued by any of them
+if isinstance(job_queue, DistributedJobQueue):
+    job_queue.register('create-agent', run_create_agent_job)
+    job_queue.register('create-agents-batch', run_create_agents_batch_job)
+    job_queue.register('update-agent', run_update_agent_job)
+    job_queue.start()
 
 if __name__ == '__main__':
     # Ensure the agents directory exists
-    os.makedirs('agents', exist_ok=True)
+    os.makedirs(AGENTS_DIR, exist_ok=True)
     
-    # Run the Flask app
-    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
+    # Run the Flask development server; use serve.py for production
+    app.run(host=os.environ.get('STRANDS_HOST', '0.0.0.0'), port=int(os.environ.get('STRANDS_PORT', '5000')),
+            debug=os.environ.get('STRANDS_DEBUG', 'false').lower() == 'true', use_reloader=False, threaded=True)
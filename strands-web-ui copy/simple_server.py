@@ -176,4 +176,5 @@ if __name__ == '__main__':
     print("=" * 60)
     
     # Run the Flask app
-    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
\ No newline at end of file
+    app.run(host=os.environ.get('STRANDS_HOST', '0.0.0.0'), port=int(os.environ.get('STRANDS_PORT', '5000')),
+            debug=os.environ.get('STRANDS_DEBUG', 'false').lower() == 'true', use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,526 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, MongoClient, WriteConcern
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from agent_listing import AGENT_INDEXES, build_mongo_query
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_storage")
+
+# Attempts at numbering a new artifact version before giving up, when other writers keep taking the number
+VERSION_INSERT_ATTEMPTS = 5
+
+
+class AgentStore:
+    """Persistence for agent documents; subclasses implement one backend each."""
+
+    def __init__(self):
+        self._write_listeners = []
+
+    def add_write_listener(self, callback):
+        """
+        Register a callback run after agents become visible to list_agents(), e.g. to clear a listing cache.
+
+        Args:
+            callback (callable): Called without arguments
+        """
+        self._write_listeners.append(callback)
+
+    def _notify_write(self):
+        for callback in self._write_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in storage write listener: {str(e)}")
+
+    def insert_agent(self, document: dict) -> str:
+        """
+        Store a new agent document.
+
+        Args:
+            document (dict): name, description, tools, custom_tools, validation, artifact, status, created_at and
+                updated_at
+
+        Returns:
+            str: The id of the stored agent
+        """
+        return self.insert_agents([document])[0]
+
+    def insert_agents(self, documents: list) -> list:
+        """Store several agent documents in one round-trip and return their ids."""
+        raise NotImplementedError
+
+    def list_agents(self, listing: dict) -> list:
+        """
+        Fetch a page of agents.
+
+        Args:
+            listing (dict): Parameters from agent_listing.parse_listing_args()
+
+        Returns:
+            list: Up to limit + 1 documents including '_id' and 'created_at', in listing order
+        """
+        raise NotImplementedError
+
+    def get_agent(self, name: str) -> dict:
+        """
+        Fetch the most recently created agent with a name.
+
+        Args:
+            name (str): The agent's name
+
+        Returns:
+            dict: The full document including '_id', or None if there is no such agent
+        """
+        raise NotImplementedError
+
+    def update_agent(self, agent_id, fields: dict) -> bool:
+        """
+        Update fields of a stored agent in place.
+
+        Args:
+            agent_id: The agent's '_id'
+            fields (dict): Any of description, tools, custom_tools, validation, artifact, status and updated_at
+
+        Returns:
+            bool: True if the agent exists
+        """
+        raise NotImplementedError
+
+    def put_blob(self, document: dict) -> bool:
+        """
+        Store a content-addressed blob unless one with the same '_id' (its hash) exists already.
+
+        Args:
+            document (dict): _id, codec, dictionary, data, size, stored_size and created_at
+
+        Returns:
+            bool: True if the blob was new
+        """
+        raise NotImplementedError
+
+    def get_blob(self, blob_id: str) -> dict:
+        """Fetch a blob stored with put_blob(), or None."""
+        raise NotImplementedError
+
+    def insert_version(self, document: dict) -> int:
+        """
+        Record a new version of an agent's code, numbered one above the agent's latest version.
+
+        Args:
+            document (dict): agent, sha256, size, source, trace_id and created_at
+
+        Returns:
+            int: The version number, starting at 1
+        """
+        raise NotImplementedError
+
+    def get_version(self, agent: str, version: int = None) -> dict:
+        """Fetch one version record of an agent's code, the latest if version is None, or None."""
+        raise NotImplementedError
+
+    def list_versions(self, agent: str, limit: int = 100) -> list:
+        """Return an agent's version records, newest first."""
+        raise NotImplementedError
+
+    def collection(self, name: str):
+        """Return a raw MongoDB collection for auxiliary data, or None when the backend has none."""
+        return None
+
+    def ensure_indexes(self):
+        """Create the indexes backing list_agents() if they do not exist yet."""
+
+    def close(self):
+        """Flush pending writes and release connections."""
+
+
+class MongoAgentStore(AgentStore):
+    """Agent storage in MongoDB with a tuned connection pool and optional write buffering."""
+
+    def __init__(self, uri: str, database: str, collection: str, max_pool_size: int = 50, min_pool_size: int = 0,
+                 timeout_ms: int = 5000, write_concern: str = '1', buffer_writes: bool = False,
+                 flush_interval: float = 0.5, batch_size: int = 100):
+        """
+        Initialize the store. Connections are opened lazily, so an unreachable server does not block startup.
+
+        Args:
+            uri (str): MongoDB connection string
+            database (str): Database name
+            collection (str): Collection holding the agent documents
+            max_pool_size (int): Maximum pooled connections per server
+            min_pool_size (int): Connections kept open while idle
+            timeout_ms (int): Connect, server selection and socket timeout in milliseconds
+            write_concern (str): 'majority', or the number of nodes that must acknowledge a write (0 for none)
+            buffer_writes (bool): Acknowledge inserts immediately and write them in batches in the background
+            flush_interval (float): Seconds between background flushes when buffering
+            batch_size (int): Buffered documents that trigger an immediate flush
+        """
+        super().__init__()
+        self.client = MongoClient(
+            uri,
+            maxPoolSize=max_pool_size,
+            minPoolSize=min_pool_size,
+            connectTimeoutMS=timeout_ms,
+            serverSelectionTimeoutMS=timeout_ms,
+            socketTimeoutMS=timeout_ms
+        )
+        self.db = self.client[database]
+        w = write_concern if write_concern == 'majority' else int(write_concern)
+        self.agents = self.db.get_collection(collection, write_concern=WriteConcern(w=w))
+        self.artifact_blobs = self.db.get_collection('artifact_blobs', write_concern=WriteConcern(w=w))
+        self.artifact_versions = self.db.get_collection('artifact_versions', write_concern=WriteConcern(w=w))
+        self.buffer_writes = buffer_writes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher = None
+        if buffer_writes:
+            self._flusher = threading.Thread(target=self._flush_loop, name="mongo-write-buffer", daemon=True)
+            self._flusher.start()
+
+    def insert_agents(self, documents: list) -> list:
+        for document in documents:
+            # Ids are assigned locally so buffered inserts can report them before reaching the server
+            document.setdefault('_id', ObjectId())
+        ids = [str(document['_id']) for document in documents]
+
+        if self.buffer_writes:
+            with self._buffer_lock:
+                self._buffer.extend(documents)
+                if len(self._buffer) >= self.batch_size:
+                    self._flush_requested.set()
+            return ids
+
+        if len(documents) == 1:
+            self.agents.insert_one(documents[0])
+        else:
+            self.agents.insert_many(documents, ordered=False)
+        self._notify_write()
+        return ids
+
+    def _flush_loop(self):
+        while not self._stopped.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+
+    def flush(self):
+        """Write buffered documents; failed batches are kept and retried on the next flush."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                pending, self._buffer = self._buffer, []
+            if not pending:
+                return
+            try:
+                self.agents.insert_many(pending, ordered=False)
+                logger.info(f"Flushed {len(pending)} buffered agent(s) to MongoDB")
+            except BulkWriteError as e:
+                # Unordered inserts write every document without an error; duplicate keys were written by an
+                # earlier attempt, so only the remaining failures are retried
+                retry = {error['index'] for error in e.details.get('writeErrors', []) if error.get('code') != 11000}
+                logger.error(f"Error flushing {len(retry)} buffered agent(s) to MongoDB, will retry")
+                with self._buffer_lock:
+                    self._buffer = [pending[index] for index in sorted(retry)] + self._buffer
+            except Exception as e:
+                logger.error(f"Error flushing buffered agents to MongoDB, will retry: {str(e)}")
+                with self._buffer_lock:
+                    self._buffer = pending + self._buffer
+                return
+        self._notify_write()
+
+    def list_agents(self, listing: dict) -> list:
+        query, projection, sort = build_mongo_query(listing)
+        return list(self.agents.find(query, projection).sort(sort).limit(listing['limit'] + 1))
+
+    def get_agent(self, name: str) -> dict:
+        if self.buffer_writes:
+            # The agent may still be waiting in the write buffer
+            self.flush()
+        return self.agents.find_one({'name': name}, sort=[('created_at', -1), ('_id', -1)])
+
+    def update_agent(self, agent_id, fields: dict) -> bool:
+        result = self.agents.update_one({'_id': ObjectId(str(agent_id))}, {'$set': fields})
+        if result.matched_count:
+            self._notify_write()
+        return bool(result.matched_count)
+
+    def put_blob(self, document: dict) -> bool:
+        try:
+            self.artifact_blobs.insert_one(document)
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def get_blob(self, blob_id: str) -> dict:
+        return self.artifact_blobs.find_one({'_id': blob_id})
+
+    def insert_version(self, document: dict) -> int:
+        # The unique index on (agent, version) turns a concurrent insert of the same number into a retry
+        for _ in range(VERSION_INSERT_ATTEMPTS):
+            latest = self.get_version(document['agent'])
+            version = latest['version'] + 1 if latest is not None else 1
+            try:
+                self.artifact_versions.insert_one({**document, 'version': version})
+                return version
+            except DuplicateKeyError:
+                continue
+        raise RuntimeError(f"Could not number a new version of {document['agent']}")
+
+    def get_version(self, agent: str, version: int = None) -> dict:
+        query = {'agent': agent}
+        if version is not None:
+            query['version'] = version
+        return self.artifact_versions.find_one(query, {'_id': 0}, sort=[('version', DESCENDING)])
+
+    def list_versions(self, agent: str, limit: int = 100) -> list:
+        return list(self.artifact_versions.find({'agent': agent}, {'_id': 0}).sort('version', DESCENDING).limit(limit))
+
+    def collection(self, name: str):
+        return self.db[name]
+
+    def ensure_indexes(self):
+        for keys in AGENT_INDEXES:
+            self.agents.create_index(keys)
+        self.artifact_versions.create_index([('agent', ASCENDING), ('version', DESCENDING)], unique=True)
+        logger.info("MongoDB indexes for the agents listing and artifact versions are in place")
+
+    def close(self):
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flush_requested.set()
+            self._flusher.join(timeout=5)
+            self.flush()
+        self.client.close()
+
+
+class SQLiteAgentStore(AgentStore):
+    """Embedded agent storage in a local SQLite file, for running without a MongoDB server."""
+
+    # Fixed-width timestamps so text comparison matches chronological order
+    TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+    # Columns update_agent() may set; field names end up in the SQL text
+    UPDATABLE_FIELDS = ('description', 'tools', 'custom_tools', 'validation', 'artifact', 'status', 'updated_at')
+    # Columns holding JSON documents
+    JSON_FIELDS = ('tools', 'custom_tools', 'validation', 'artifact')
+
+    def __init__(self, path: str = 'strands.db', synchronous: str = 'NORMAL'):
+        """
+        Initialize the store and create its schema.
+
+        Args:
+            path (str): Database file, or ':memory:' for a throwaway store
+            synchronous (str): SQLite synchronous pragma; NORMAL skips an fsync per commit in WAL mode
+        """
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"PRAGMA synchronous={synchronous}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS agents ("
+                "id TEXT PRIMARY KEY, name TEXT NOT NULL, description TEXT, tools TEXT NOT NULL, "
+                "status TEXT, created_at TEXT NOT NULL, updated_at TEXT, custom_tools TEXT, validation TEXT, artifact TEXT)"
+            )
+            # Databases created before custom tool specs, validation results and artifacts were stored lack the columns
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(agents)")}
+            for column in ('custom_tools', 'validation', 'artifact'):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE agents ADD COLUMN {column} TEXT")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifact_blobs ("
+                "id TEXT PRIMARY KEY, codec TEXT NOT NULL, dictionary TEXT, data BLOB NOT NULL, size INTEGER NOT NULL, "
+                "stored_size INTEGER NOT NULL, created_at TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifact_versions ("
+                "agent TEXT NOT NULL, version INTEGER NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL, "
+                "source TEXT, trace_id TEXT, created_at TEXT NOT NULL, PRIMARY KEY (agent, version))"
+            )
+        logger.info(f"Using SQLite agent store at {path}")
+
+    def _format_time(self, value: datetime) -> str:
+        return value.strftime(self.TIMESTAMP_FORMAT)
+
+    def insert_agents(self, documents: list) -> list:
+        rows = []
+        for document in documents:
+            document.setdefault('_id', ObjectId())
+            rows.append((
+                str(document['_id']),
+                document['name'],
+                document.get('description'),
+                json.dumps(document.get('tools', [])),
+                document.get('status'),
+                self._format_time(document['created_at']),
+                self._format_time(document.get('updated_at', document['created_at'])),
+                json.dumps(document['custom_tools']) if 'custom_tools' in document else None,
+                json.dumps(document['validation']) if document.get('validation') is not None else None,
+                json.dumps(document['artifact']) if document.get('artifact') is not None else None
+            ))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO agents (id, name, description, tools, status, created_at, updated_at, custom_tools, "
+                "validation, artifact) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._notify_write()
+        return [row[0] for row in rows]
+
+    def list_agents(self, listing: dict) -> list:
+        clauses = []
+        params = []
+        if listing['status']:
+            clauses.append("status = ?")
+            params.append(listing['status'])
+        if listing['tool']:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(agents.tools) WHERE json_each.value = ?)")
+            params.append(listing['tool'])
+        if listing['name_prefix']:
+            # Case-sensitive like the MongoDB prefix regex, unlike LIKE
+            clauses.append("substr(name, 1, ?) = ?")
+            params.extend([len(listing['name_prefix']), listing['name_prefix']])
+
+        direction = 'DESC' if listing['order'] == 'desc' else 'ASC'
+        if listing['after']:
+            created_at, last_id = listing['after']
+            op = '<' if direction == 'DESC' else '>'
+            clauses.append(f"(created_at {op} ? OR (created_at = ? AND id {op} ?))")
+            params.extend([self._format_time(created_at), self._format_time(created_at), str(last_id)])
+
+        sql = "SELECT * FROM agents"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY created_at {direction}, id {direction} LIMIT ?"
+        params.append(listing['limit'] + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._document(row) for row in rows]
+
+    def _document(self, row: sqlite3.Row) -> dict:
+        document = {
+            '_id': ObjectId(row['id']),
+            'name': row['name'],
+            'description': row['description'],
+            'tools': json.loads(row['tools']),
+            'status': row['status'],
+            'created_at': datetime.strptime(row['created_at'], self.TIMESTAMP_FORMAT),
+            'updated_at': datetime.strptime(row['updated_at'], self.TIMESTAMP_FORMAT) if row['updated_at'] else None
+        }
+        for field in ('custom_tools', 'validation', 'artifact'):
+            if row[field] is not None:
+                document[field] = json.loads(row[field])
+        return document
+
+    def get_agent(self, name: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM agents WHERE name = ? ORDER BY created_at DESC, id DESC LIMIT 1",
+                                     (name,)).fetchone()
+        return self._document(row) if row is not None else None
+
+    def update_agent(self, agent_id, fields: dict) -> bool:
+        unknown = set(fields) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update agent fields: {', '.join(sorted(unknown))}")
+        columns = []
+        params = []
+        for field, value in fields.items():
+            if field in self.JSON_FIELDS:
+                value = json.dumps(value)
+            elif isinstance(value, datetime):
+                value = self._format_time(value)
+            columns.append(f"{field} = ?")
+            params.append(value)
+        with self._lock, self._conn:
+            updated = self._conn.execute(f"UPDATE agents SET {', '.join(columns)} WHERE id = ?",
+                                         params + [str(agent_id)]).rowcount
+        if updated:
+            self._notify_write()
+        return bool(updated)
+
+    def put_blob(self, document: dict) -> bool:
+        with self._lock, self._conn:
+            return bool(self._conn.execute(
+                "INSERT OR IGNORE INTO artifact_blobs (id, codec, dictionary, data, size, stored_size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (document['_id'], document['codec'], document.get('dictionary'), document['data'], document['size'],
+                 document['stored_size'], self._format_time(document['created_at']))).rowcount)
+
+    def get_blob(self, blob_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM artifact_blobs WHERE id = ?", (blob_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            '_id': row['id'],
+            'codec': row['codec'],
+            'dictionary': row['dictionary'],
+            'data': bytes(row['data']),
+            'size': row['size'],
+            'stored_size': row['stored_size'],
+            'created_at': datetime.strptime(row['created_at'], self.TIMESTAMP_FORMAT)
+        }
+
+    def insert_version(self, document: dict) -> int:
+        # One statement under the connection lock, so the number cannot be taken in between
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO artifact_versions (agent, version, sha256, size, source, trace_id, created_at) "
+                "SELECT ?, COALESCE(MAX(version), 0) + 1, ?, ?, ?, ?, ? FROM artifact_versions WHERE agent = ?",
+                (document['agent'], document['sha256'], document['size'], document.get('source'),
+                 document.get('trace_id'), self._format_time(document['created_at']), document['agent']))
+            return self._conn.execute("SELECT MAX(version) FROM artifact_versions WHERE agent = ?",
+                                      (document['agent'],)).fetchone()[0]
+
+    def _version(self, row: sqlite3.Row) -> dict:
+        return {
+            'agent': row['agent'],
+            'version': row['version'],
+            'sha256': row['sha256'],
+            'size': row['size'],
+            'source': row['source'],
+            'trace_id': row['trace_id'],
+            'created_at': datetime.strptime(row['created_at'], self.TIMESTAMP_FORMAT)
+        }
+
+    def get_version(self, agent: str, version: int = None) -> dict:
+        with self._lock:
+            if version is None:
+                row = self._conn.execute("SELECT * FROM artifact_versions WHERE agent = ? ORDER BY version DESC LIMIT 1",
+                                         (agent,)).fetchone()
+            else:
+                row = self._conn.execute("SELECT * FROM artifact_versions WHERE agent = ? AND version = ?",
+                                         (agent, version)).fetchone()
+        return self._version(row) if row is not None else None
+
+    def list_versions(self, agent: str, limit: int = 100) -> list:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM artifact_versions WHERE agent = ? ORDER BY version DESC LIMIT ?",
+                                      (agent, limit)).fetchall()
+        return [self._version(row) for row in rows]
+
+    def ensure_indexes(self):
+        with self._lock, self._conn:
+            self._conn.execute("CREATE INDEX IF NOT EXISTS agents_created ON agents (created_at, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS agents_status ON agents (status, created_at, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS agents_name ON agents (name, created_at, id)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,13 +1,19 @@
 import os
+import asyncio
+import hashlib
+import json
 import logging
-import boto3
-import botocore.config
-from strands import Agent
-from strands_tools import http_request, file_write, file_read
+import re
+import textwrap
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, Any
 import datetime
-from mcp import stdio_client, StdioServerParameters
-from strands.tools.mcp import MCPClient
+ 
+from metrics import GENERATIONS, GenerationTimer
  
 # Configure logging
 logging.basicConfig(
@@ -26,35 +32,23 @@ os.environ['AWS_READ_TIMEOUT'] = '240'
 os.environ['AWS_MAX_ATTEMPTS'] = '3'  
 os.environ['BYPASS_TOOL_CONSENT'] = 'true'  
  
-class StrandsAgent:
-    def __init__(self):
-        """Initialize the Strands Agent with necessary tools and configuration."""
-        # Initialize MCP client for Strands Agents
-        self.mcp_client = MCPClient(lambda: stdio_client(
-            StdioServerParameters(
-                command="uvx",
-                args=["strands-agents-mcp-server"]
-            )
-        ))
-       
-        # Start the MCP client session
-        self.mcp_client.start()
-       
-        # Get MCP tools
-        try:
-            mcp_tools = self.mcp_client.list_tools_sync()
-            logger.info(f"MCP tools loaded: {len(mcp_tools)} tools available")
-        except Exception as e:
-            logger.error(f"Failed to load MCP tools: {str(e)}")
-            mcp_tools = []
-       
-        self.agent = Agent(
-            # Use Claude 3.7 Sonnet model from Bedrock with increased timeout
-            model="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-            # Add tools for the agent
-            tools=[file_write] + mcp_tools,
-            # Configure the system prompt
-            system_prompt="""
+# Directory the generated agents are written to; point it at shared storage when several nodes generate agents
+AGENTS_DIR = os.environ.get('STRANDS_AGENTS_DIR', 'agents')
+ 
+# Bedrock model used to generate agents
+MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+ 
+# How the conversation is carried from one generation to the next on the same instance:
+# 'reset' starts every generation from an empty history, 'window' keeps the most recent messages,
+# 'summary' keeps the most recent messages and summarizes the older ones
+CONTEXT_MODES = ('reset', 'window', 'summary')
+ 
+# Request blocks that can get a Bedrock prompt cache point: the tool definitions, the system prompt,
+# and the conversation so far (which also caches earlier turns of the same generation)
+PROMPT_CACHE_BLOCKS = ('tools', 'system', 'messages')
+ 
+# System prompt for the agent generator
+SYSTEM_PROMPT = """
               You are an expert AI developer specializing in creating powerful, intelligent agents using the Strands Agents framework. You have access to the Strands MCP server, which provides comprehensive documentation and tools for building sophisticated AI agents.
  
                 Your Approach to Agent Creation
@@ -112,10 +106,243 @@ class StrandsAgent:
                 Remember: Your goal is to create the most powerful, effective agent possible for each request, always leveraging the full capabilities of the Strands framework and MCP server.
  
                 Once you have completed the agent, save the code to a file in the 'agents' directory with the name.py using file_write tool.
-        """)
+        """
+# The indentation above is sent with every model call; strip it to save input tokens on each turn
+SYSTEM_PROMPT = "\n".join(line.strip() for line in SYSTEM_PROMPT.strip().splitlines())
+ 
+# Changes whenever the system prompt is edited, so cached generations from an older prompt are not reused
+SYSTEM_PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+ 
+# System prompt for hybrid generations, where the model only writes the bodies of the agent's tool methods
+TOOL_BODIES_SYSTEM_PROMPT = """You write the bodies of @tool methods for Strands agents.
+Each method has the signature (self, query: str) -> Dict[str, Any] and returns a dict with "success", "result" and "message".
+Use only the standard library, handle errors, and answer with a single JSON object mapping each method name to its body, without indentation or markdown."""
+
+# System prompt for fix-ups, where the model repairs an agent module that failed validation
+FIX_AGENT_SYSTEM_PROMPT = """You fix Strands agent modules that failed validation.
+Change only what is needed to resolve the reported errors and keep the rest of the module as it is.
+Answer with the complete corrected module in a single ```python code block."""
+
+def agent_file_path(agent_name: str) -> str:
+    """Return the path of the generated code file for an agent name."""
+    return os.path.join(AGENTS_DIR, agent_name.lower().replace(' ', '_') + '.py')
+ 
+class GenerationEventHandler:
+    """Strands callback handler that turns agent callbacks into generation progress events."""
+   
+    def __init__(self, emit, downstream=None):
+        """
+        Initialize the handler.
+       
+        Args:
+            emit (callable): Called as emit(event_type, data) for every progress event
+            downstream (callable, optional): Callback handler that still receives every callback
+        """
+        self.emit = emit
+        self.downstream = downstream
+        self._tool_names = {}
+   
+    def __call__(self, **kwargs):
+        if self.downstream is not None:
+            self.downstream(**kwargs)
+       
+        data = kwargs.get("data")
+        if data:
+            self.emit('token', {'text': data})
+       
+        event = kwargs.get("event", {})
+        if "messageStart" in event:
+            self.emit('model_start', {})
+        usage = event.get("metadata", {}).get("usage")
+        if usage:
+            self.emit('model_end', {
+                'input_tokens': usage.get("inputTokens", 0),
+                'output_tokens': usage.get("outputTokens", 0),
+                'cache_read_tokens': usage.get("cacheReadInputTokens", 0),
+                'cache_write_tokens': usage.get("cacheWriteInputTokens", 0),
+                'latency_ms': event["metadata"].get("metrics", {}).get("latencyMs")
+            })
+       
+        tool_use = event.get("contentBlockStart", {}).get("start", {}).get("toolUse")
+        if tool_use:
+            self._tool_names[tool_use["toolUseId"]] = tool_use["name"]
+            self.emit('tool_start', {'id': tool_use["toolUseId"], 'name': tool_use["name"]})
+       
+        message = kwargs.get("message")
+        if message and message.get("role") == "user":
+            for content in message.get("content", []):
+                tool_result = content.get("toolResult")
+                if tool_result:
+                    tool_use_id = tool_result.get("toolUseId")
+                    self.emit('tool_end', {
+                        'id': tool_use_id,
+                        'name': self._tool_names.get(tool_use_id),
+                        'status': tool_result.get("status")
+                    })
+ 
+class StrandsAgent:
+    def __init__(self, mcp_manager=None, scheduler=None, model_provider: str = 'bedrock', context_mode: str = 'reset',
+                 context_window: int = 20, prompt_cache: tuple = ()):
+        """
+        Initialize the Strands Agent with necessary tools and configuration.
+       
+        Args:
+            mcp_manager (MCPServerManager, optional): Shared MCP connection layer; when omitted this
+                instance starts and owns its own MCP server process
+            scheduler (ModelScheduler, optional): Shared scheduler that rate-limits and retries model calls
+            model_provider (str, optional): 'bedrock', or 'fake' for the local stub model in fake_model.py
+            context_mode (str, optional): One of CONTEXT_MODES
+            context_window (int, optional): Messages kept between generations in 'window' and 'summary' mode
+            prompt_cache (tuple, optional): PROMPT_CACHE_BLOCKS to place prompt cache points on
+        """
+        if context_mode not in CONTEXT_MODES:
+            raise ValueError(f"Unknown context mode '{context_mode}', expected one of {', '.join(CONTEXT_MODES)}")
+        unknown_blocks = set(prompt_cache) - set(PROMPT_CACHE_BLOCKS)
+        if unknown_blocks:
+            raise ValueError(f"Unknown prompt cache blocks {', '.join(sorted(unknown_blocks))}, "
+                             f"expected any of {', '.join(PROMPT_CACHE_BLOCKS)}")
+        # The strands and MCP libraries take seconds to import, so they are loaded on first use
+        # rather than when the web server imports this module
+        from strands import Agent
+        from strands_tools import file_write
+        from mcp import stdio_client, StdioServerParameters
+        from strands.tools.mcp import MCPClient
+       
+        self.mcp_manager = mcp_manager
+        self.mcp_client = None
+        if mcp_manager is None:
+            # Initialize MCP client for Strands Agents
+            self.mcp_client = MCPClient(lambda: stdio_client(
+                StdioServerParameters(
+                    command="uvx",
+                    args=["strands-agents-mcp-server"]
+                )
+            ))
+           
+            # Start the MCP client session
+            self.mcp_client.start()
+       
+        # Get MCP tools
+        try:
+            if mcp_manager is not None:
+                mcp_tools = mcp_manager.list_tools()
+            else:
+                mcp_tools = self.mcp_client.list_tools_sync()
+            logger.info(f"MCP tools loaded: {len(mcp_tools)} tools available")
+        except Exception as e:
+            logger.error(f"Failed to load MCP tools: {str(e)}")
+            mcp_tools = []
+       
+        # The system prompt and tool definitions are identical on every call, so Bedrock can serve them from
+        # its prompt cache; with a cache point on the conversation every other block is covered as well
+        system_prompt = SYSTEM_PROMPT
+        model_options = {}
+        if 'messages' in prompt_cache:
+            from strands.models import CacheConfig
+            model_options['cache_config'] = CacheConfig(strategy='auto', system_prompt_ttl='system' in prompt_cache,
+                                                        tools_ttl='tools' in prompt_cache)
+        else:
+            if 'system' in prompt_cache:
+                system_prompt = [{'text': SYSTEM_PROMPT}, {'cachePoint': {'type': 'default'}}]
+            if 'tools' in prompt_cache:
+                model_options['cache_tools'] = 'default'
+       
+        model = MODEL_ID
+        if model_provider == 'fake':
+            from fake_model import FakeModel
+            model = FakeModel(**model_options)
+        elif scheduler is not None or model_options:
+            import botocore.config
+            from strands.models import BedrockModel
+            if scheduler is not None:
+                # The scheduler retries throttled calls itself, so botocore must not retry them as well
+                model_options['boto_client_config'] = botocore.config.Config(
+                    connect_timeout=int(os.environ['AWS_CONNECT_TIMEOUT']),
+                    read_timeout=int(os.environ['AWS_READ_TIMEOUT']),
+                    retries={'total_max_attempts': 1, 'mode': 'standard'}
+                )
+            model = BedrockModel(model_id=MODEL_ID, **model_options)
+       
+        # Route every model call through the shared scheduler when one is configured
+        self.scheduled_model = None
+        agent_options = {}
+        if scheduler is not None:
+            from scheduled_model import RateLimitedModel
+            model = self.scheduled_model = RateLimitedModel(model, scheduler)
+            agent_options['retry_strategy'] = None
+       
+        self.context_mode = context_mode
+        self.context_window = context_window
+        if context_mode == 'window':
+            from strands.agent.conversation_manager import SlidingWindowConversationManager
+            agent_options['conversation_manager'] = SlidingWindowConversationManager(window_size=context_window)
+        elif context_mode == 'summary':
+            from strands.agent.conversation_manager import SummarizingConversationManager
+            agent_options['conversation_manager'] = SummarizingConversationManager(
+                summary_ratio=0.5, preserve_recent_messages=max(2, context_window // 2))
+       
+        self.agent = Agent(
+            # Use Claude 3.7 Sonnet model from Bedrock with increased timeout
+            model=model,
+            # Add tools for the agent
+            tools=[file_write] + mcp_tools,
+            # Configure the system prompt
+            system_prompt=system_prompt,
+            **agent_options)
+        # Consecutive failed generations, used by the agent pool to evict broken instances
+        self.consecutive_failures = 0
+        self.closed = False
+        # Model turn, token and tool call timings of the most recent generation
+        self.last_timings = None
         logger.info("Strands Agent initialized successfully")
    
-    def create_strands_agent(self, agent_name: str, agent_purpose: str, required_tools: list = None) -> str:
+    def reset_conversation(self):
+        """Clear the conversation history so the next generation starts from a clean context."""
+        self.agent.messages = []
+   
+    def _bound_context(self):
+        """Summarize older messages once the history outgrows the window ('summary' mode only)."""
+        if self.context_mode != 'summary' or len(self.agent.messages) <= self.context_window:
+            return
+        before = len(self.agent.messages)
+        try:
+            self.agent.conversation_manager.reduce_context(self.agent)
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {str(e)}")
+        if len(self.agent.messages) >= before:
+            # Summarization failed (strands only logs proactive failures), so fall back to an empty history
+            logger.warning("Could not summarize the conversation, resetting it instead")
+            self.reset_conversation()
+        else:
+            logger.info(f"Summarized conversation from {before} to {len(self.agent.messages)} messages")
+   
+    def is_healthy(self, max_failures: int = 3) -> bool:
+        """
+        Check whether this instance can still be used for generations.
+       
+        Args:
+            max_failures (int, optional): Consecutive failures after which the instance is considered broken
+           
+        Returns:
+            bool: True if the instance is usable
+        """
+        return not self.closed and self.consecutive_failures < max_failures
+   
+    def close(self):
+        """Stop the MCP client session owned by this instance; a shared MCP manager is left running."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.mcp_client is not None:
+            try:
+                self.mcp_client.stop(None, None, None)
+                logger.info("MCP client session closed")
+            except Exception as e:
+                logger.error(f"Error closing MCP client: {str(e)}")
+   
+    def create_strands_agent(self, agent_name: str, agent_purpose: str, required_tools: list = None, raise_errors: bool = False,
+                             callback_handler=None, priority: str = 'interactive', documentation: list = None,
+                             output_path: str = None) -> str:
         """
         Create a Strands agent based on the provided specifications.
        
@@ -123,46 +350,26 @@ class StrandsAgent:
             agent_name (str): The name of the agent
             agent_purpose (str): The purpose and functionality of the agent, including custom tool specifications
             required_tools (list, optional): List of tools the agent should use
+            raise_errors (bool, optional): Re-raise generation errors instead of returning an error message
+            callback_handler (callable, optional): Strands callback handler used for this generation only,
+                e.g. a GenerationEventHandler streaming progress to a client
+            priority (str, optional): Scheduler lane for the model calls, 'interactive' or 'batch'
+            documentation (list, optional): Documentation lookups fetched ahead of time (see doc_prefetch.py),
+                given to the model as if it had made them, so it does not spend turns on them
+            output_path (str, optional): File the model saves the code to instead of agent_file_path(agent_name)
            
         Returns:
             str: Path to the generated agent code file
         """
         try:
-            # Construct the prompt for the agent
-            tools_description = ", ".join(required_tools) if required_tools else "standard tools"
-           
-            prompt = f"""
-            I need you to create a new Strands agent with the following specifications:
-           
-            Agent Name: {agent_name}
-            Agent Purpose: {agent_purpose}
-            Required Tools: {tools_description}
-           
-            Please follow these steps:
-            1. Generate complete Python code for a Strands agent that fulfills the purpose
-            2. Include all necessary imports, class structure, and tool definitions
-            3. If the agent purpose includes Custom Tools Specifications, implement each custom tool using the @tool decorator following Strands best practices
-            4. For each custom tool:
-               - Use the provided tool name and description
-               - Design appropriate parameters based on the tool's purpose
-               - Implement the functionality in an robust manner that aligns with the tool's description
-               - Include proper error handling and documentation
-               - Build an tool as per the user requirements
-            5. If the agent purpose includes MCP Servers, implement the MCP server connection and MCP tool usage following Strands best practices and strands documentation
-            6. Add proper error handling and logging for the entire agent
-            7. Create a main function for easy execution
-            8. Return the complete code in a code block
-            9. Save the generated code to a file in the 'agents' directory with the name '{agent_name.lower().replace(" ", "_")}.py using file_write tool'
-           
-            The code should be well-structured, documented, and follow Strands best practices.
-            """
+            prompt = self._generation_prompt(agent_name, agent_purpose, required_tools, output_path)
            
             logger.info(f"Creating Strands agent: {agent_name}")
            
             # Run the agent with the prompt
-            response = self.agent(prompt)
-           
-            logger.info("Strands agent created successfully")
+            with self._generation_turn(callback_handler, priority):
+                response = self.agent(self._generation_input(prompt, documentation))
+            self._generation_succeeded()
            
             # # Extract code from the response
             # code_content = response
@@ -190,9 +397,343 @@ class StrandsAgent:
             return f"Agent '{agent_name}' created successfully and saved"
  
         except Exception as e:
-            logger.error(f"Error creating Strands agent: {str(e)}")
+            self._generation_failed(e)
+            if raise_errors:
+                raise
             return f"Error creating Strands agent: {str(e)}"
    
+    async def create_strands_agent_async(self, agent_name: str, agent_purpose: str, required_tools: list = None,
+                                         callback_handler=None, priority: str = 'interactive',
+                                         documentation: list = None) -> str:
+        """
+        Async variant of create_strands_agent() that runs the generation on the calling event loop; errors are raised.
+       
+        Waiting for the scheduler and for documentation lookups holds no thread; only the Bedrock response stream
+        itself is read on a worker thread by strands.
+        """
+        try:
+            prompt = self._generation_prompt(agent_name, agent_purpose, required_tools)
+            logger.info(f"Creating Strands agent: {agent_name}")
+            with self._generation_turn(callback_handler, priority):
+                await self.agent.invoke_async(self._generation_input(prompt, documentation))
+            if self.context_mode == 'summary':
+                # Summarizing the history makes a synchronous model call
+                await asyncio.to_thread(self._generation_succeeded)
+            else:
+                self._generation_succeeded()
+            return f"Agent '{agent_name}' created successfully and saved"
+        except Exception as e:
+            self._generation_failed(e)
+            raise
+   
+    def _generation_prompt(self, agent_name: str, agent_purpose: str, required_tools: list = None,
+                           output_path: str = None) -> str:
+        """Build the prompt asking the generator agent to write and save an agent."""
+        tools_description = ", ".join(required_tools) if required_tools else "standard tools"
+        directory, filename = os.path.split(output_path or agent_file_path(agent_name))
+       
+        prompt = f"""
+            I need you to create a new Strands agent with the following specifications:
+           
+            Agent Name: {agent_name}
+            Agent Purpose: {agent_purpose}
+            Required Tools: {tools_description}
+           
+            Please follow these steps:
+            1. Generate complete Python code for a Strands agent that fulfills the purpose
+            2. Include all necessary imports, class structure, and tool definitions
+            3. If the agent purpose includes Custom Tools Specifications, implement each custom tool using the @tool decorator following Strands best practices
+            4. For each custom tool:
+               - Use the provided tool name and description
+               - Design appropriate parameters based on the tool's purpose
+               - Implement the functionality in an robust manner that aligns with the tool's description
+               - Include proper error handling and documentation
+               - Build an tool as per the user requirements
+            5. If the agent purpose includes MCP Servers, implement the MCP server connection and MCP tool usage following Strands best practices and strands documentation
+            6. Add proper error handling and logging for the entire agent
+            7. Create a main function for easy execution
+            8. Return the complete code in a code block
+            9. Save the generated code to a file in the '{directory}' directory with the name '{filename} using file_write tool'
+           
+            The code should be well-structured, documented, and follow Strands best practices.
+            """
+        return prompt
+   
+    def _generation_input(self, prompt: str, documentation: list = None):
+        """Return what the generator is invoked with: the prompt, followed by any prefetched lookups and their results."""
+        if not documentation:
+            return prompt
+        # Fresh ids each time, since a windowed history may still hold the lookups of an earlier generation
+        ids = [f"tooluse_prefetch_{uuid.uuid4().hex[:16]}" for _ in documentation]
+        return [
+            {'role': 'user', 'content': [{'text': prompt}]},
+            {'role': 'assistant', 'content': [
+                {'toolUse': {'toolUseId': tool_use_id, 'name': lookup['name'], 'input': {}}}
+                for tool_use_id, lookup in zip(ids, documentation)
+            ]},
+            {'role': 'user', 'content': [
+                {'toolResult': {'toolUseId': tool_use_id, **lookup['result']}}
+                for tool_use_id, lookup in zip(ids, documentation)
+            ]}
+        ]
+   
+    @contextmanager
+    def _generation_turn(self, callback_handler=None, priority: str = 'interactive'):
+        """Prepare the conversation, scheduler lane and callbacks for one generation, and time it."""
+        # Token usage per generation stays flat only if earlier generations do not pile up in the history
+        if self.context_mode == 'reset':
+            self.reset_conversation()
+       
+        if self.scheduled_model is not None:
+            self.scheduled_model.priority = priority
+        previous_handler = self.agent.callback_handler
+        # Every generation is timed; the caller's handler (or the default one) still receives all callbacks
+        timer = GenerationTimer()
+        self.agent.callback_handler = GenerationEventHandler(timer.on_event, downstream=callback_handler or previous_handler)
+        try:
+            yield
+        finally:
+            self.agent.callback_handler = previous_handler
+            self.last_timings = timer.summary()
+   
+    def _generation_succeeded(self):
+        """Record a successful generation and bound the history it leaves behind."""
+        logger.info(f"Strands agent created successfully: {self.last_timings}")
+        GENERATIONS.inc(status='success')
+        self.consecutive_failures = 0
+        self._bound_context()
+   
+    def _generation_failed(self, error: Exception):
+        """Record a failed generation and clear the conversation it broke."""
+        logger.error(f"Error creating Strands agent: {str(error)}")
+        GENERATIONS.inc(status='failed')
+        self.consecutive_failures += 1
+        # A failed turn can leave a tool call without its result, which the model would reject next time
+        self.reset_conversation()
+   
+    def _single_turn(self, system_prompt: str, prompt: str, callback_handler=None, priority: str = 'interactive') -> str:
+        """
+        Answer a prompt in a single turn on a short-lived agent on the same model.
+       
+        The agent has none of the generator's tools, documentation or conversation. The turn is timed into
+        last_timings but is not counted in GENERATIONS, which counts agent generations only.
+        """
+        from strands import Agent
+       
+        if self.scheduled_model is not None:
+            self.scheduled_model.priority = priority
+        timer = GenerationTimer()
+        agent = Agent(
+            model=self.agent.model,
+            system_prompt=system_prompt,
+            callback_handler=GenerationEventHandler(timer.on_event, downstream=callback_handler),
+            **({'retry_strategy': None} if self.scheduled_model is not None else {}))
+        try:
+            response = str(agent(prompt))
+        except Exception:
+            self.consecutive_failures += 1
+            raise
+        finally:
+            self.last_timings = timer.summary()
+        self.consecutive_failures = 0
+        return response
+   
+    def generate_tool_bodies(self, agent_name: str, agent_purpose: str, tools: list, callback_handler=None,
+                             priority: str = 'interactive') -> dict:
+        """
+        Ask the model for the bodies of an agent's @tool methods, for templates that write the rest of the agent.
+       
+        The request goes to a short-lived agent on the same model, without the generator's tools, documentation
+        or conversation, so it costs a single model turn.
+       
+        Args:
+            agent_name (str): The name of the agent
+            agent_purpose (str): The purpose of the agent
+            tools (list): Dicts with 'function_name' and 'description' for each method
+            callback_handler (callable, optional): Strands callback handler, e.g. a GenerationEventHandler
+            priority (str, optional): Scheduler lane for the model call, 'interactive' or 'batch'
+           
+        Returns:
+            dict: Method body by function name; methods whose body is missing or does not compile are left out
+        """
+        if not tools:
+            return {}
+        tool_lines = "\n".join(f"- {tool['function_name']}: {tool['description']}" for tool in tools)
+        prompt = (f"Write the tool bodies for the Strands agent '{agent_name}'.\n"
+                  f"Agent Purpose: {agent_purpose}\n"
+                  f"Tools:\n{tool_lines}")
+       
+        logger.info(f"Generating {len(tools)} tool bodies for {agent_name}")
+        try:
+            response = self._single_turn(TOOL_BODIES_SYSTEM_PROMPT, prompt, callback_handler, priority)
+        except Exception as e:
+            logger.error(f"Error generating tool bodies: {str(e)}")
+            raise
+       
+        try:
+            bodies = json.loads(response[response.index('{'):response.rindex('}') + 1])
+        except ValueError:
+            logger.warning(f"Model did not answer with tool bodies for {agent_name}, using placeholders")
+            return {}
+        valid = {}
+        for tool in tools:
+            body = bodies.get(tool['function_name'])
+            if not isinstance(body, str) or not body.strip():
+                continue
+            body = textwrap.dedent(body).strip()
+            try:
+                compile(f"def {tool['function_name']}(self, query):\n{textwrap.indent(body, '    ')}\n", agent_name, 'exec')
+            except SyntaxError as e:
+                logger.warning(f"Body of {tool['function_name']} does not compile ({str(e)}), using a placeholder")
+                continue
+            valid[tool['function_name']] = body
+        logger.info(f"Tool bodies generated for {agent_name}: {self.last_timings}")
+        return valid
+   
+    def fix_agent_code(self, agent_name: str, code: str, errors: list, callback_handler=None,
+                       priority: str = 'interactive') -> str:
+        """
+        Ask the model to repair an agent module that failed validation, instead of generating it again.
+       
+        Like generate_tool_bodies, this is a single turn on a short-lived agent without the generator's tools
+        or conversation; the model gets the module and the errors and answers with the corrected module.
+       
+        Args:
+            agent_name (str): The name of the agent
+            code (str): The agent module that failed validation
+            errors (list): The validation errors
+            callback_handler (callable, optional): Strands callback handler, e.g. a GenerationEventHandler
+            priority (str, optional): Scheduler lane for the model call, 'interactive' or 'batch'
+           
+        Returns:
+            str: The corrected module, or None if the answer has no code
+        """
+        error_lines = "\n".join(f"- {error}" for error in errors)
+        prompt = (f"Fix the Strands agent '{agent_name}'.\n"
+                  f"Errors:\n{error_lines}\n"
+                  f"Module:\n```python\n{code}\n```")
+       
+        logger.info(f"Asking the model to fix {len(errors)} validation errors in {agent_name}")
+        try:
+            response = self._single_turn(FIX_AGENT_SYSTEM_PROMPT, prompt, callback_handler, priority)
+        except Exception as e:
+            logger.error(f"Error fixing agent code: {str(e)}")
+            raise
+       
+        blocks = re.findall(r"```(?:python|py)?\n(.*?)```", response, re.DOTALL)
+        if not blocks:
+            logger.warning(f"Model did not answer with corrected code for {agent_name}")
+            return None
+        logger.info(f"Agent code fixed for {agent_name}: {self.last_timings}")
+        # The longest block is the module; shorter ones would be snippets quoted in the explanation
+        return max(blocks, key=len)
+   
+    @classmethod
+    def create_strands_agents_batch(cls, specs: list, max_concurrency: int = 4, timeout: float = None, retries: int = 1,
+                                    pool=None, mcp_manager=None, on_result=None) -> list:
+        """
+        Create several Strands agents in parallel, each on its own StrandsAgent instance.
+       
+        Args:
+            specs (list): Dicts with 'name', 'purpose' and optionally 'tools'
+            max_concurrency (int, optional): Maximum generations running at the same time
+            timeout (float, optional): Seconds after which a generation is given up on; the abandoned
+                generation keeps its concurrency slot until it actually finishes, is not retried, and the
+                file it writes is thrown away
+            retries (int, optional): Additional attempts for a generation that failed with an error
+            pool (StrandsAgentPool, optional): Pool to check instances out of; when omitted a temporary
+                pool of up to max_concurrency instances is created and closed afterwards
+            mcp_manager (MCPServerManager, optional): Shared MCP connection layer for a temporary pool
+            on_result (callable, optional): Called with (index, result) as soon as each spec has finished
+           
+        Returns:
+            list: One result per spec, in input order, with 'name', 'success', 'attempts', 'seconds', 'error'
+                and the 'timings' of the last attempt
+        """
+        owns_pool = pool is None
+        if owns_pool:
+            from agent_pool import StrandsAgentPool
+            pool = StrandsAgentPool(factory=lambda: cls(mcp_manager=mcp_manager), min_size=0, max_size=max_concurrency)
+       
+        # Permits are returned by the generation itself, so timed-out generations still count against the limit
+        slots = threading.BoundedSemaphore(max_concurrency)
+       
+        # Each attempt writes to its own file there; only the attempt that wins is moved to the agent's path
+        partial_dir = os.path.join(AGENTS_DIR, '.partial')
+        os.makedirs(partial_dir, exist_ok=True)
+       
+        def discard(path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Error removing abandoned agent file {path}: {str(e)}")
+       
+        def attempt(spec, outcome, finished, state):
+            try:
+                with pool.agent() as strands_agent:
+                    try:
+                        strands_agent.create_strands_agent(spec['name'], spec['purpose'], spec.get('tools'), raise_errors=True,
+                                                           priority='batch', output_path=outcome['path'])
+                    finally:
+                        outcome['timings'] = strands_agent.last_timings
+            except Exception as e:
+                outcome['error'] = str(e)
+            finally:
+                slots.release()
+                with state['lock']:
+                    if state['abandoned']:
+                        discard(outcome['path'])
+                    finished.set()
+       
+        def run_spec(index, spec):
+            started = time.monotonic()
+            result = {'name': spec['name'], 'success': False, 'attempts': 0, 'error': None}
+            final_path = agent_file_path(spec['name'])
+            while result['attempts'] <= retries:
+                result['attempts'] += 1
+                outcome = {'path': os.path.join(partial_dir, f"{uuid.uuid4().hex}-{os.path.basename(final_path)}")}
+                finished = threading.Event()
+                state = {'lock': threading.Lock(), 'abandoned': False}
+                slots.acquire()
+                threading.Thread(target=attempt, args=(spec, outcome, finished, state), name="strands-batch-generation",
+                                 daemon=True).start()
+                finished.wait(timeout)
+                with state['lock']:
+                    # Decided under the lock, so a generation finishing right now either wins or cleans up after itself
+                    state['abandoned'] = not finished.is_set()
+                if state['abandoned']:
+                    result['error'] = f"Generation timed out after {timeout:.0f}s"
+                    logger.error(f"Batch generation of '{spec['name']}' timed out")
+                    break
+                result['timings'] = outcome.get('timings')
+                if 'error' not in outcome:
+                    try:
+                        os.replace(outcome['path'], final_path)
+                    except OSError as e:
+                        outcome['error'] = f"Generated code was not saved: {str(e)}"
+                if 'error' not in outcome:
+                    result['success'] = True
+                    result['error'] = None
+                    break
+                discard(outcome['path'])
+                result['error'] = outcome['error']
+                logger.warning(f"Batch generation of '{spec['name']}' failed (attempt {result['attempts']}): {outcome['error']}")
+            result['seconds'] = round(time.monotonic() - started, 3)
+            if on_result is not None:
+                on_result(index, result)
+            return result
+       
+        logger.info(f"Creating {len(specs)} Strands agents with up to {max_concurrency} in parallel")
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="strands-batch") as executor:
+                futures = [executor.submit(run_spec, index, spec) for index, spec in enumerate(specs)]
+                return [future.result() for future in futures]
+        finally:
+            if owns_pool:
+                pool.close()
+   
     def run_cli(self):
         """Run the Strands Agent in CLI mode."""
         print("=" * 60)
@@ -227,12 +768,7 @@ class StrandsAgent:
             print(f"\nAn error occurred: {str(e)}")
         finally:
             # Ensure MCP client is properly closed
-            if hasattr(self, 'mcp_client'):
-                try:
-                    self.mcp_client.stop()
-                    logger.info("MCP client session closed")
-                except Exception as e:
-                    logger.error(f"Error closing MCP client: {str(e)}")
+            self.close()
  
 def main():
     """Main entry point for the Strands Agent."""
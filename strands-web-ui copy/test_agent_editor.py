@@ -0,0 +1,193 @@
+import ast
+import textwrap
+import unittest
+
+from agent_editor import AgentEditError, AgentModule, list_tool_methods, splice_tool_methods
+
+AGENT = '''"""
+Weather - Strands Agent
+"""
+import logging
+from typing import Dict, Any
+
+from strands import Agent, tool
+
+logger = logging.getLogger("weather")
+
+
+class WeatherAgent:
+    """Answers questions about the weather."""
+
+    def __init__(self):
+        self.agent = Agent(system_prompt="Be brief", tools=[self.forecast, self.alerts])
+
+    @tool
+    def forecast(self, query: str) -> Dict[str, Any]:
+        """Forecast for a city."""
+        return {"success": True, "result": "sunny"}
+
+    @tool(name="weather_alerts")
+    def alerts(self, query: str) -> Dict[str, Any]:
+        """Severe weather alerts."""
+        # A comment that mentions def forecast(self, query) must not confuse the editor
+        return {"success": True, "result": []}
+
+    def run(self, query: str) -> str:
+        return str(self.agent(query))
+
+
+def main():
+    WeatherAgent().run("hi")
+'''
+
+
+def method(name: str, result: str = '"new"', decorator: str = '@tool') -> str:
+    """Source of an @tool method as the generator writes it, indented for a class body."""
+    return textwrap.indent(textwrap.dedent(f'''
+        {decorator}
+        def {name}(self, query: str) -> Dict[str, Any]:
+            """Regenerated."""
+            return {{"success": True, "result": {result}}}
+        '''), '    ')
+
+
+def agent_class(source: str) -> ast.ClassDef:
+    return next(node for node in ast.parse(source).body if isinstance(node, ast.ClassDef))
+
+
+def tools_list(source: str) -> list:
+    """The self.<method> names passed as Agent(tools=[...])."""
+    call = next(node for node in ast.walk(ast.parse(source))
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'Agent')
+    tools = next(keyword.value for keyword in call.keywords if keyword.arg == 'tools')
+    return [element.attr for element in tools.elts]
+
+
+class SpliceToolMethodsTest(unittest.TestCase):
+    """Edits to the @tool methods of an agent file leave every other line as it was."""
+
+    def test_list_tool_methods(self):
+        self.assertEqual(list_tool_methods(AGENT), ['forecast', 'alerts'])
+
+    def test_replace(self):
+        result = splice_tool_methods(AGENT, replace={'forecast': method('forecast', '"rainy"')})
+        self.assertIn('"result": "rainy"', result)
+        self.assertNotIn('"result": "sunny"', result)
+        self.assertEqual([node.name for node in agent_class(result).body if isinstance(node, ast.FunctionDef)],
+                         ['__init__', 'forecast', 'alerts', 'run'])
+        # Everything outside the method is byte for byte the same
+        self.assertEqual(result.split('    @tool\n    def forecast')[0], AGENT.split('    @tool\n    def forecast')[0])
+        self.assertEqual(result.split('    @tool(name="weather_alerts")')[1], AGENT.split('    @tool(name="weather_alerts")')[1])
+
+    def test_replace_unknown_name_adds(self):
+        result = splice_tool_methods(AGENT, replace={'radar': method('radar')})
+        self.assertEqual(list_tool_methods(result), ['forecast', 'alerts', 'radar'])
+
+    def test_remove(self):
+        result = splice_tool_methods(AGENT, remove=['alerts', 'unknown'])
+        self.assertEqual(list_tool_methods(result), ['forecast'])
+        self.assertEqual(tools_list(result), ['forecast'])
+        # The decorator with arguments, the comment and the blank line before the method go with it
+        self.assertNotIn('weather_alerts', result)
+        self.assertNotIn('A comment', result)
+        self.assertIn('        return {"success": True, "result": "sunny"}\n\n    def run(', result)
+
+    def test_remove_and_replace_same_name(self):
+        result = splice_tool_methods(AGENT, replace={'alerts': method('alerts')}, remove=['alerts'])
+        self.assertEqual(list_tool_methods(result), ['forecast'])
+
+    def test_add(self):
+        result = splice_tool_methods(AGENT, add=[method('radar'), method('radar_map', decorator='@tool(name="map")')])
+        self.assertEqual(list_tool_methods(result), ['forecast', 'alerts', 'radar', 'radar_map'])
+        # Appended at the end of the class with one blank line before each, before the module-level code
+        self.assertIn('        return str(self.agent(query))\n\n    @tool\n    def radar', result)
+        self.assertIn('"new"}\n\n    @tool(name="map")\n    def radar_map', result)
+        self.assertIn('\n\ndef main():', result)
+        self.assertEqual(tools_list(result), ['forecast', 'alerts', 'radar', 'radar_map'])
+
+    def test_method_added_twice_is_registered_once(self):
+        result = AgentModule(AGENT)
+        result.add_method(method('radar'))
+        result.add_method(method('radar'))
+        self.assertEqual(tools_list(result.render()), ['forecast', 'alerts', 'radar'])
+
+    def test_replaced_method_keeps_one_blank_line(self):
+        result = splice_tool_methods(AGENT, replace={'alerts': method('alerts')})
+        self.assertIn('"result": "sunny"}\n\n    @tool\n    def alerts', result)
+        self.assertNotIn('\n\n\n    @tool', result)
+
+    def test_method_indentation_follows_the_class(self):
+        source = AGENT.replace('\n    ', '\n  ').replace('\n      ', '\n    ')
+        result = splice_tool_methods(source, add=[method('radar')])
+        self.assertIn('\n  @tool\n  def radar(self, query: str)', result)
+        self.assertIn('radar', list_tool_methods(result))
+
+    def test_tools_list_is_kept_in_sync(self):
+        result = splice_tool_methods(AGENT, remove=['forecast'], add=[method('radar')])
+        self.assertEqual(tools_list(result), ['alerts', 'radar'])
+        self.assertIn('Agent(system_prompt="Be brief", tools=[self.alerts, self.radar])', result)
+
+    def test_agent_without_tools_list_is_left_alone(self):
+        source = AGENT.replace('tools=[self.forecast, self.alerts]', 'tools=self.collect_tools()')
+        result = splice_tool_methods(source, add=[method('radar')])
+        self.assertIn('tools=self.collect_tools()', result)
+        self.assertIn('radar', list_tool_methods(result))
+
+    def test_missing_imports_go_after_the_last_import(self):
+        source = AGENT.replace('from typing import Dict, Any\n', '').replace('from strands import Agent, tool\n',
+                                                                            'from strands import Agent\n')
+        body = method('radar', 'json.dumps({"at": time.time()})')
+        result = splice_tool_methods(source, add=[body])
+        self.assertIn('from strands import Agent\nimport json\nimport time\nfrom strands import tool\n'
+                      'from typing import Any, Dict\n\nlogger', result)
+
+    def test_missing_imports_go_after_the_docstring(self):
+        source = '"""Module docstring."""\n\n\nclass Bare:\n    def run(self):\n        pass\n'
+        result = splice_tool_methods(source, add=[method('radar')])
+        self.assertTrue(result.startswith('"""Module docstring."""\nfrom strands import tool\nfrom typing import Any, Dict\n'))
+        self.assertEqual(list_tool_methods(result), ['radar'])
+
+    def test_missing_imports_without_docstring(self):
+        source = 'class Bare:\n    def run(self):\n        pass\n'
+        result = splice_tool_methods(source, add=[method('radar')])
+        self.assertTrue(result.startswith('from strands import tool\nfrom typing import Any, Dict\nclass Bare:'))
+
+    def test_names_defined_by_the_module_are_not_imported(self):
+        result = splice_tool_methods(AGENT, add=[method('radar', 'logger.name')])
+        self.assertNotIn('import logger', result)
+        self.assertEqual(result.count('from typing import'), 1)
+
+    def test_non_ascii_source(self):
+        # Column offsets from ast count UTF-8 bytes; the edits must land on characters
+        source = AGENT.replace('system_prompt="Be brief"', 'system_prompt="Sé breve ☀️ 天気"')
+        result = splice_tool_methods(source, remove=['alerts'], add=[method('radar', '"🌧"')])
+        self.assertIn('Agent(system_prompt="Sé breve ☀️ 天気", tools=[self.forecast, self.radar])', result)
+        self.assertIn('"result": "🌧"', result)
+        self.assertEqual(list_tool_methods(result), ['forecast', 'radar'])
+
+    def test_source_that_does_not_parse(self):
+        with self.assertRaises(AgentEditError):
+            splice_tool_methods(AGENT + '\ndef broken(:\n')
+
+    def test_method_that_does_not_parse(self):
+        with self.assertRaisesRegex(AgentEditError, 'does not parse'):
+            splice_tool_methods(AGENT, replace={'forecast': method('forecast', 'broken(')})
+
+    def test_edit_that_does_not_compile(self):
+        # Parses on its own, but is rejected by the compiler
+        body = method('forecast').replace('"""Regenerated."""', 'nonlocal missing')
+        with self.assertRaisesRegex(AgentEditError, 'does not compile'):
+            splice_tool_methods(AGENT, replace={'forecast': body})
+
+    def test_module_without_class(self):
+        with self.assertRaisesRegex(AgentEditError, 'no class'):
+            splice_tool_methods('def main():\n    pass\n', add=[method('radar')])
+
+    def test_agent_class_is_found_among_several(self):
+        source = 'class Helper:\n    pass\n\n\n' + AGENT
+        result = AgentModule(source)
+        self.assertEqual(result.agent_class.name, 'WeatherAgent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import ast
+import unittest
+
+from agent_templates import TemplateLibrary
+
+
+class RenderTest(unittest.TestCase):
+    """Rendered agent modules must be valid Python whatever text the user typed."""
+
+    DESCRIPTIONS = [
+        'Says "hi"',
+        '"Quoted" from start to end"',
+        'Ends with a backslash \\',
+        'Windows paths like C:\\new\\table and \\N{BULLET}',
+        'Triple """ quotes and \'single\' ones',
+        'Line one\nLine two\r\nwith a tab\there and a \x00 byte',
+    ]
+
+    def setUp(self):
+        self.library = TemplateLibrary()
+
+    def test_descriptions_with_quotes_and_backslashes(self):
+        for description in self.DESCRIPTIONS:
+            with self.subTest(description=description):
+                code = self.library.render('default', 'Quote "Bot"', description,
+                                           standard_tools=['calculator', 'lookup "x"'],
+                                           custom_tools=[{'name': 'say "hi"', 'description': description}])
+                module = ast.parse(code)
+                agent_class = next(node for node in module.body if isinstance(node, ast.ClassDef))
+                self.assertEqual(ast.get_docstring(agent_class, clean=False), description)
+                tool_method = agent_class.body[-2]
+                self.assertIn(description.split('\n')[0], ast.get_docstring(tool_method))
+                self.assertIn('Quote "Bot" - Strands Agent', ast.get_docstring(module))
+
+
+if __name__ == '__main__':
+    unittest.main()
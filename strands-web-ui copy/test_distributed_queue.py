@@ -0,0 +1,206 @@
+import threading
+import time
+import unittest
+
+from distributed_queue import DistributedJobQueue, MemoryJobStore, StoredJob, job_document
+from job_queue import DeferredJob, Job, JobLostError
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Poll until condition() is true, failing the test if it does not become true in time."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.01)
+
+
+class MemoryJobStoreTest(unittest.TestCase):
+    """Claims and leases of the in-process store, which behaves like MongoJobStore."""
+
+    def setUp(self):
+        self.store = MemoryJobStore()
+        self.document = job_document(Job('create-agent', {'name': 'Bot'}))
+        self.store.insert(self.document)
+
+    def test_claim(self):
+        claimed = self.store.claim('node-a', ['create-agent'], 30)
+        self.assertEqual((claimed['_id'], claimed['status'], claimed['owner'], claimed['attempts']),
+                         (self.document['_id'], Job.RUNNING, 'node-a', 1))
+        self.assertIsNone(self.store.claim('node-b', ['create-agent'], 30))
+
+    def test_claim_only_registered_kinds(self):
+        self.assertIsNone(self.store.claim('node-a', ['update-agent'], 30))
+
+    def test_expired_lease_is_taken_over(self):
+        self.store.claim('node-a', ['create-agent'], 0.01)
+        time.sleep(0.02)
+        claimed = self.store.claim('node-b', ['create-agent'], 30)
+        self.assertEqual((claimed['owner'], claimed['attempts']), ('node-b', 2))
+        # The first claim can no longer write, even if the same node claims the job again later
+        self.assertFalse(self.store.update(claimed['_id'], 'node-a', 1, {'status': Job.DONE}))
+        self.assertFalse(self.store.update(claimed['_id'], 'node-b', 1, {'status': Job.DONE}))
+        self.assertTrue(self.store.update(claimed['_id'], 'node-b', 2, {'status': Job.DONE}))
+
+    def test_requeue_returns_the_attempt(self):
+        claimed = self.store.claim('node-a', ['create-agent'], 30)
+        self.assertTrue(self.store.requeue(claimed['_id'], 'node-a', 1, 0))
+        self.assertEqual(self.store.claim('node-b', ['create-agent'], 30)['attempts'], 1)
+
+    def test_locks(self):
+        self.assertTrue(self.store.acquire_lock('agent:bot', 'job-1', 30))
+        self.assertTrue(self.store.acquire_lock('agent:bot', 'job-1', 30))
+        self.assertFalse(self.store.acquire_lock('agent:bot', 'job-2', 30))
+        self.store.release_locks(['agent:bot'], 'job-2')
+        self.assertFalse(self.store.acquire_lock('agent:bot', 'job-2', 30))
+        self.store.release_locks(['agent:bot'], 'job-1')
+        self.assertTrue(self.store.acquire_lock('agent:bot', 'job-2', 30))
+
+    def test_expired_lock_is_taken_over(self):
+        self.store.acquire_lock('agent:bot', 'job-1', 0.01)
+        time.sleep(0.02)
+        self.assertTrue(self.store.acquire_lock('agent:bot', 'job-2', 30))
+
+
+class DistributedJobQueueTest(unittest.TestCase):
+    """Jobs run by DistributedJobQueue workers against a MemoryJobStore."""
+
+    def setUp(self):
+        self.store = MemoryJobStore()
+        self.queues = []
+
+    def tearDown(self):
+        for queue in self.queues:
+            queue.shutdown(wait=False)
+
+    def queue(self, **options) -> DistributedJobQueue:
+        options = {'max_workers': 1, 'poll_interval': 0.01, 'lease_seconds': 5, **options}
+        queue = DistributedJobQueue(self.store, **options)
+        self.queues.append(queue)
+        return queue
+
+    def finished(self, job_id: str) -> dict:
+        wait_for(lambda: self.store.get(job_id)['status'] in (Job.DONE, Job.FAILED))
+        return self.store.get(job_id, events_from=0)
+
+    def test_submitted_job_runs(self):
+        queue = self.queue()
+        queue.start()
+        job = queue.submit('create-agent', lambda job: {'name': job.payload['name']}, {'name': 'Bot'})
+        document = self.finished(job.id)
+        self.assertEqual((document['status'], document['result'], document['attempts']), (Job.DONE, {'name': 'Bot'}, 1))
+        self.assertEqual(document['events'][-1]['type'], 'done')
+
+    def test_job_of_a_lost_worker_is_resumed(self):
+        # A worker that claimed the job and then stopped renewing its lease, e.g. because its node died
+        document = job_document(Job('create-agent', {'name': 'Bot'}))
+        self.store.insert(document)
+        self.store.claim('dead-node', ['create-agent'], 0.01)
+        time.sleep(0.02)
+        queue = self.queue()
+        queue.register('create-agent', lambda job: 'resumed')
+        queue.start()
+        resumed = self.finished(document['_id'])
+        self.assertEqual((resumed['status'], resumed['result'], resumed['attempts']), (Job.DONE, 'resumed', 2))
+        self.assertEqual(resumed['owner'], queue.node_id)
+
+    def test_max_attempts(self):
+        document = job_document(Job('create-agent'))
+        self.store.insert(document)
+        for node in ('node-a', 'node-b'):
+            self.store.claim(node, ['create-agent'], 0.01)
+            time.sleep(0.02)
+        runs = []
+        queue = self.queue(max_attempts=2)
+        queue.register('create-agent', runs.append)
+        queue.start()
+        failed = self.finished(document['_id'])
+        self.assertEqual(failed['status'], Job.FAILED)
+        self.assertIn('abandoned', failed['error'])
+        self.assertEqual(runs, [])
+
+    def test_busy_lock_requeues_until_released(self):
+        self.store.acquire_lock('agent:bot', 'other-job', 30)
+        runs = []
+        queue = self.queue()
+        queue.start()
+        job = queue.submit('create-agent', lambda job: runs.append(job.id), locks=['agent:bot'])
+        time.sleep(0.2)
+        document = self.store.get(job.id)
+        self.assertEqual((document['status'], document['attempts'], runs), (Job.QUEUED, 0, []))
+        self.store.release_locks(['agent:bot'], 'other-job')
+        self.assertEqual(self.finished(job.id)['status'], Job.DONE)
+        self.assertEqual(runs, [job.id])
+        # The job released its lock when it finished
+        self.assertTrue(self.store.acquire_lock('agent:bot', 'next-job', 30))
+
+    def test_run_inline(self):
+        queue = self.queue(max_workers=0)
+        job = queue.run_inline('create-agent', lambda job: job.inline, locks=['agent:bot'])
+        self.assertEqual((job.status, job.result), (Job.DONE, True))
+        self.assertEqual(self.store.get(job.id)['status'], Job.DONE)
+        self.assertTrue(self.store.acquire_lock('agent:bot', 'next-job', 30))
+
+    def test_run_inline_deferred_job_is_queued(self):
+        def run(job):
+            if job.inline:
+                raise DeferredJob("needs a worker")
+            return 'worker'
+
+        queue = self.queue(max_workers=0)
+        job = queue.run_inline('create-agent', run, locks=['agent:bot'])
+        self.assertIsInstance(job, StoredJob)
+        self.assertEqual((job.status, self.store.get(job.id)['attempts']), (Job.QUEUED, 0))
+        # The lock is free again for the worker that picks the job up
+        worker = self.queue()
+        worker.register('create-agent', run)
+        worker.start()
+        document = self.finished(job.id)
+        self.assertEqual((document['status'], document['result'], document['attempts']), (Job.DONE, 'worker', 1))
+
+    def test_run_inline_with_busy_lock_is_queued(self):
+        self.store.acquire_lock('agent:bot', 'other-job', 30)
+        runs = []
+        queue = self.queue(max_workers=0)
+        job = queue.run_inline('create-agent', runs.append, locks=['agent:bot'])
+        self.assertIsInstance(job, StoredJob)
+        self.assertEqual((job.status, runs), (Job.QUEUED, []))
+
+    def test_lost_job_stops_before_side_effects(self):
+        taken_over = threading.Event()
+        side_effects = []
+        outcome = {}
+
+        def run(job):
+            taken_over.wait(5)
+            try:
+                job.ensure_owned()
+            except JobLostError as e:
+                outcome['error'] = e
+                raise
+            side_effects.append(job.id)
+
+        # Lease renewals are rarer than the lease, so the lease runs out while the job runs
+        queue = self.queue(lease_seconds=0.05, poll_interval=10)
+        queue.start()
+        job = queue.submit('create-agent', run, locks=['agent:bot'])
+        wait_for(lambda: self.store.get(job.id)['status'] == Job.RUNNING)
+        time.sleep(0.1)
+        claimed = self.store.claim('other-node', ['create-agent'], 30)
+        self.assertEqual((claimed['_id'], claimed['attempts']), (job.id, 2))
+        # Its locks ran out with the lease and now belong to the new claim
+        self.assertTrue(self.store.acquire_lock('agent:bot', f"{job.id}:2", 30))
+        taken_over.set()
+
+        wait_for(lambda: 'error' in outcome)
+        # Finished here: no longer served from this node's running jobs
+        wait_for(lambda: not isinstance(queue.get(job.id), Job))
+        self.assertEqual(side_effects, [])
+        document = self.store.get(job.id)
+        self.assertEqual((document['status'], document['owner'], document['attempts']), (Job.RUNNING, 'other-node', 2))
+        # The stale claim did not release the new claim's lock
+        self.assertFalse(self.store.acquire_lock('agent:bot', 'next-job', 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import threading
+import time
+import unittest
+
+from job_queue import DeferredJob, Job, JobQueue
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Poll until condition() is true, failing the test if it does not become true in time."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.01)
+
+
+class JobQueueLocksTest(unittest.TestCase):
+    """Jobs sharing a resource run one after the other without holding up the other workers."""
+
+    def setUp(self):
+        self.queue = JobQueue(max_workers=2)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.queue.shutdown(wait=True)
+
+    def blocking(self, job):
+        self.release.wait(5)
+        return job.payload.get('name')
+
+    def test_job_waiting_for_a_resource_does_not_take_a_worker(self):
+        first = self.queue.submit('create-agent', self.blocking, {'name': 'a'}, locks=['agent:a'])
+        second = self.queue.submit('create-agent', self.blocking, {'name': 'a'}, locks=['agent:a'])
+        wait_for(lambda: first.status == Job.RUNNING)
+        other = self.queue.submit('create-agent', lambda job: 'b', locks=['agent:b'])
+        wait_for(lambda: other.finished)
+        self.assertEqual(other.result, 'b')
+        # Still waiting for its turn, not running on a worker
+        self.assertEqual(second.status, Job.QUEUED)
+
+        self.release.set()
+        wait_for(lambda: second.finished)
+        self.assertEqual((first.status, second.status), (Job.DONE, Job.DONE))
+        self.assertLessEqual(first.finished_at, second.started_at)
+
+    def test_released_resources_are_forgotten(self):
+        self.release.set()
+        jobs = [self.queue.submit('create-agent', self.blocking, locks=[f"agent:{index % 3}"]) for index in range(9)]
+        wait_for(lambda: all(job.finished for job in jobs))
+        # Resources are released just after a job has finished
+        wait_for(lambda: not self.queue._held)
+        self.assertEqual(self.queue._parked, {})
+
+    def test_inline_job_with_busy_resource_is_queued(self):
+        first = self.queue.submit('create-agent', self.blocking, locks=['agent:a'])
+        wait_for(lambda: first.status == Job.RUNNING)
+        inline = self.queue.run_inline('create-agent', lambda job: job.inline, locks=['agent:a'])
+        self.assertEqual(inline.status, Job.QUEUED)
+        self.release.set()
+        wait_for(lambda: inline.finished)
+        self.assertEqual(inline.result, False)
+
+    def test_deferred_inline_job_is_queued(self):
+        def run(job):
+            if job.inline:
+                raise DeferredJob("needs a worker")
+            return 'worker'
+
+        job = self.queue.run_inline('create-agent', run, locks=['agent:a'])
+        wait_for(lambda: job.finished)
+        self.assertEqual(job.result, 'worker')
+
+    def test_parked_jobs_fail_when_dropped_at_shutdown(self):
+        first = self.queue.submit('create-agent', self.blocking, locks=['agent:a'])
+        wait_for(lambda: first.status == Job.RUNNING)
+        parked = self.queue.submit('create-agent', self.blocking, locks=['agent:a'])
+        self.queue.shutdown(wait=False, cancel_pending=True)
+        self.assertEqual((parked.status, parked.error), (Job.FAILED, "Server shutting down"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import ast
+import unittest
+
+from agent_editor import list_tool_methods
+from postprocess import PostProcessError, process_agent_code
+
+GENERATED = '''"""
+Support - Strands Agent
+"""
+import logging
+from typing import Dict, Any
+
+from strands import Agent, tool
+
+logger = logging.getLogger("support")
+
+
+class SupportAgent:
+    """Answers support tickets."""
+
+    def __init__(self):
+        self.agent = Agent(system_prompt="Be kind", tools=[self.greet])
+
+    @tool
+    def greet(self, query: str) -> Dict[str, Any]:
+        """Greet the customer."""
+        return {"success": True, "result": "hello"}
+
+    def run(self, query: str) -> str:
+        return str(self.agent(query))
+'''
+
+
+def agent_class(source: str) -> ast.ClassDef:
+    return next(node for node in ast.parse(source).body if isinstance(node, ast.ClassDef))
+
+
+def tools_list(source: str) -> list:
+    """The self.<method> names passed as Agent(tools=[...])."""
+    call = next(node for node in ast.walk(ast.parse(source))
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'Agent')
+    tools = next(keyword.value for keyword in call.keywords if keyword.arg == 'tools')
+    return [element.attr for element in tools.elts]
+
+
+def tool(name: str, description: str = 'Does things') -> dict:
+    return {'name': name, 'description': description}
+
+
+class ProcessAgentCodeTest(unittest.TestCase):
+    """Custom tools the model left out are added to the generated agent without touching the rest."""
+
+    def test_missing_tools_are_added(self):
+        code = process_agent_code(GENERATED, [tool('Ticket lookup'), tool('escalate')])
+        self.assertEqual(list_tool_methods(code), ['greet', 'ticket_lookup', 'escalate'])
+        self.assertEqual(tools_list(code), ['greet', 'ticket_lookup', 'escalate'])
+        # Appended to the class; the model's code is otherwise left as it was
+        self.assertTrue(code.startswith(GENERATED.replace('tools=[self.greet]',
+                                                          'tools=[self.greet, self.ticket_lookup, self.escalate]')))
+
+    def test_missing_imports_are_added(self):
+        source = GENERATED.replace('from typing import Dict, Any\n', '').replace('-> Dict[str, Any]', '-> dict')
+        code = process_agent_code(source, [tool('escalate')])
+        self.assertIn('from strands import Agent, tool\nfrom typing import Any, Dict\n\nlogger', code)
+
+    def test_tools_the_model_implemented_are_kept(self):
+        implemented = GENERATED.replace('    def run(', '''    @tool
+    def escalate(self, query: str) -> Dict[str, Any]:
+        """Escalate to a human."""
+        return {"success": True, "result": "paged"}
+
+    def run(''')
+        code = process_agent_code(implemented, [tool('escalate'), tool('refund')])
+        self.assertEqual(list_tool_methods(code), ['greet', 'escalate', 'refund'])
+        self.assertIn('"result": "paged"', code)
+        self.assertEqual(code.count('def escalate'), 1)
+
+    def test_colliding_names_get_distinct_methods(self):
+        code = process_agent_code(GENERATED, [tool('foo-bar', 'First'), tool('foo bar', 'Second'), tool('Foo Bar')])
+        self.assertEqual(list_tool_methods(code), ['greet', 'foo_bar', 'foo_bar_tool', 'foo_bar_tool_tool'])
+        self.assertEqual(tools_list(code), ['greet', 'foo_bar', 'foo_bar_tool', 'foo_bar_tool_tool'])
+        methods = {node.name: node for node in agent_class(code).body if isinstance(node, ast.FunctionDef)}
+        self.assertIn('Second', ast.get_docstring(methods['foo_bar_tool']))
+
+    def test_collision_with_an_implemented_tool(self):
+        # The model implemented the first of two tools with the same method name; only the second is added
+        implemented = GENERATED.replace('tools=[self.greet]', 'tools=[self.greet, self.foo_bar]').replace('    def run(', '''    @tool
+    def foo_bar(self, query: str) -> Dict[str, Any]:
+        """Implemented."""
+        return {"success": True, "result": "done"}
+
+    def run(''')
+        code = process_agent_code(implemented, [tool('foo-bar'), tool('foo bar')])
+        self.assertEqual(list_tool_methods(code), ['greet', 'foo_bar', 'foo_bar_tool'])
+        self.assertEqual(tools_list(code), ['greet', 'foo_bar', 'foo_bar_tool'])
+        self.assertIn('"result": "done"', code)
+
+    def test_names_and_descriptions_with_quotes(self):
+        tools = [tool('say "hi"', 'Ends with a quote"'), tool("it's \\ done", 'Line one\n"""Triple""" \\N{BULLET}')]
+        code = process_agent_code(GENERATED, tools)
+        methods = {node.name: node for node in agent_class(code).body if isinstance(node, ast.FunctionDef)}
+        self.assertEqual(list(methods), ['__init__', 'greet', 'run', 'say_hi', 'it_s_done'])
+        self.assertTrue(ast.get_docstring(methods['say_hi']).startswith('Ends with a quote"'))
+        self.assertTrue(ast.get_docstring(methods['it_s_done']).startswith('Line one\n"""Triple""" \\N{BULLET}'))
+        # The messages in the placeholder body are the tool names as they were typed
+        self.assertIn(repr('Successfully executed say "hi"'), code)
+        self.assertIn(repr("Failed to execute it's \\ done: "), code)
+
+    def test_without_custom_tools_the_code_is_unchanged(self):
+        self.assertEqual(process_agent_code(GENERATED), GENERATED)
+        self.assertEqual(process_agent_code(GENERATED, []), GENERATED)
+
+    def test_code_without_a_class_is_only_validated(self):
+        code = 'def main():\n    pass\n'
+        self.assertEqual(process_agent_code(code, [tool('escalate')]), code)
+
+    def test_code_that_does_not_compile(self):
+        with self.assertRaisesRegex(PostProcessError, 'support.py'):
+            process_agent_code(GENERATED + '\ndef broken(:\n', [tool('escalate')], filename='support.py')
+
+
+if __name__ == '__main__':
+    unittest.main()
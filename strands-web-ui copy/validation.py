@@ -0,0 +1,387 @@
+import ast
+import builtins
+import importlib.util
+import json
+import logging
+import os
+import queue
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_validation")
+
+# pyflakes messages that mean the module will fail when the code runs; everything else is a warning
+LINT_ERRORS = ('UndefinedName', 'UndefinedLocal', 'UndefinedExport', 'DuplicateArgument', 'ReturnOutsideFunction',
+               'YieldOutsideFunction', 'ContinueOutsideLoop', 'BreakOutsideLoop')
+
+# Environment variables not passed to validation workers, so imported agent code cannot use the server's credentials
+SECRET_VARIABLE = re.compile(r'(^AWS_|^MONGO|KEY|SECRET|TOKEN|PASSWORD|CREDENTIAL)', re.IGNORECASE)
+
+# Names every module or class body has without binding them itself
+IMPLICIT_NAMES = {'__file__', '__name__', '__doc__', '__spec__', '__loader__', '__package__', '__builtins__',
+                  '__path__', '__annotations__', '__module__', '__qualname__'}
+
+# Modules workers import before reporting ready, so smoke imports of generated agents only pay for their own code
+PRELOAD_MODULES = ('strands', 'strands.models', 'strands_tools')
+
+
+class ValidationError(Exception):
+    """Raised when a validation worker cannot be started."""
+
+
+def _lint(tree: ast.Module, filename: str) -> dict:
+    """Lint a parsed module with pyflakes when it is installed, else with a check for undefined names."""
+    try:
+        from pyflakes import checker
+    except ImportError:
+        checker = None
+    errors, warnings = [], []
+    if checker is not None:
+        for message in sorted(checker.Checker(tree, filename=filename).messages, key=lambda message: message.lineno):
+            text = f"line {message.lineno}: {message.message % message.message_args}"
+            (errors if type(message).__name__ in LINT_ERRORS else warnings).append(text)
+        return {'ok': not errors, 'linter': 'pyflakes', 'errors': errors, 'warnings': warnings}
+
+    # Coarse fallback: a name read somewhere that is bound nowhere in the module and is not a builtin
+    bound = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            bound.add(node.id)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            bound.update((alias.asname or alias.name).split('.')[0] for alias in node.names)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+    reported = set()
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in bound
+                and not hasattr(builtins, node.id) and node.id not in IMPLICIT_NAMES and node.id not in reported):
+            reported.add(node.id)
+            errors.append(f"line {node.lineno}: undefined name '{node.id}'")
+    return {'ok': not errors, 'linter': 'ast', 'errors': errors, 'warnings': warnings}
+
+
+def _smoke_import(source: str, filename: str, directory: str, sequence: int) -> dict:
+    """Import a module from source under a throwaway name and report the exception it raises, if any."""
+    module_name = f"_strands_smoke_{sequence}"
+    path = os.path.join(directory, module_name + '.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    started = time.monotonic()
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        error = None
+    except BaseException as e:
+        if isinstance(e, KeyboardInterrupt):
+            raise
+        # Report the innermost line of the agent's own code, as the model knows it
+        lines = [frame.lineno for frame in traceback.extract_tb(e.__traceback__) if frame.filename == path]
+        where = f"line {lines[-1]}: " if lines else ''
+        error = f"{where}{type(e).__name__}: {str(e)}".replace(path, filename)
+    finally:
+        sys.modules.pop(module_name, None)
+        os.remove(path)
+    return {'ok': error is None, 'error': error, 'seconds': round(time.monotonic() - started, 3)}
+
+
+def check_source(source: str, filename: str, smoke_import: bool = True, directory: str = None, sequence: int = 0) -> dict:
+    """
+    Run the validation checks on an agent module: compile, lint and, if those pass, a smoke import.
+
+    Runs inside a validation worker; the smoke import executes the module's top-level code, so it must not
+    be called in the server process.
+
+    Args:
+        source (str): The agent module's source
+        filename (str): Shown in error messages
+        smoke_import (bool, optional): Import the module after the static checks
+        directory (str, optional): Where the module is written for the import, defaults to the working directory
+        sequence (int, optional): Makes the module name of the import unique within the worker
+
+    Returns:
+        dict: 'compile', 'lint' and 'import' results; 'import' is None when it was skipped
+    """
+    result = {'compile': {'ok': True, 'error': None}, 'lint': None, 'import': None}
+    try:
+        tree = compile(source, filename, 'exec', ast.PyCF_ONLY_AST, dont_inherit=True)
+        compile(tree, filename, 'exec', dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        result['compile'] = {'ok': False, 'error': str(e)}
+        return result
+    result['lint'] = _lint(tree, filename)
+    if smoke_import and result['lint']['ok']:
+        result['import'] = _smoke_import(source, filename, directory or os.getcwd(), sequence)
+    return result
+
+
+def worker_main():
+    """
+    Serve validation requests, one JSON line per request on stdin and one JSON line per result on stdout.
+
+    The protocol gets private copies of stdin and stdout; the real ones are pointed at /dev/null and stderr,
+    so agent code that reads input or prints while it is imported cannot interfere with it.
+    """
+    protocol_in = os.fdopen(os.dup(0), 'r', encoding='utf-8')
+    protocol_out = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(2, 1)
+    sys.stdin = open(os.devnull, 'r')
+    sys.stdout = sys.stderr
+
+    # The scratch directory is also the home directory, so ~/.aws and other per-user files are not found
+    directory = tempfile.mkdtemp(prefix='strands-validation-')
+    os.chdir(directory)
+    os.environ['HOME'] = directory
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Validation worker could not preload {module}: {str(e)}")
+    protocol_out.write(json.dumps({'ready': True}) + '\n')
+    protocol_out.flush()
+
+    for sequence, line in enumerate(protocol_in):
+        request = json.loads(line)
+        try:
+            result = check_source(request['source'], request['filename'], request.get('import', True), directory, sequence)
+        except Exception as e:
+            result = {'error': f"{type(e).__name__}: {str(e)}"}
+        protocol_out.write(json.dumps(result) + '\n')
+        protocol_out.flush()
+
+
+class _Worker:
+    """A validation worker process and the thread reading its results."""
+
+    def __init__(self, environment: dict):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            env=environment, text=True, encoding='utf-8', bufsize=1
+        )
+        self.lines = queue.Queue()
+        self.validations = 0
+        threading.Thread(target=self._read, name='validation-worker-reader', daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.lines.put(line)
+        # End of output: the process exited or was killed
+        self.lines.put(None)
+
+    def receive(self, timeout: float) -> dict:
+        """Wait for the next line from the worker; raises queue.Empty on timeout and EOFError if it exited."""
+        line = self.lines.get(timeout=timeout)
+        if line is None:
+            raise EOFError(f"Validation worker exited with code {self.process.wait()}")
+        return json.loads(line)
+
+    def send(self, request: dict):
+        self.process.stdin.write(json.dumps(request) + '\n')
+        self.process.stdin.flush()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception as e:
+            logger.warning(f"Could not stop validation worker {self.process.pid}: {str(e)}")
+
+
+class ValidationPool:
+    """
+    Long-lived worker processes that check generated agent modules: compile, lint and a smoke import.
+
+    Workers are reused across jobs and keep strands imported, so a check costs the agent module's own import
+    time. Each runs in a scratch directory, which is also its home directory, without the server's credentials
+    (environment variables, AWS credentials and config files, instance metadata), and one that exceeds the per-file
+    timeout is killed and replaced, taking whatever the agent code was doing with it.
+    """
+
+    def __init__(self, size: int = 2, timeout: float = 30.0, smoke_import: bool = True, startup_timeout: float = 120.0,
+                 max_validations: int = 200):
+        """
+        Initialize the pool; workers are started by prewarm() or on first use.
+
+        Args:
+            size (int): Maximum number of worker processes, i.e. files checked at the same time
+            timeout (float): Seconds one file may take before its worker is killed
+            smoke_import (bool): Import modules that pass the static checks
+            startup_timeout (float): Seconds a new worker may take to import strands and report ready
+            max_validations (int): Files a worker checks before it is replaced, so module-level side effects
+                of earlier agents do not pile up
+        """
+        self.size = size
+        self.timeout = timeout
+        self.smoke_import = smoke_import
+        self.startup_timeout = startup_timeout
+        self.max_validations = max_validations
+        self._environment = {name: value for name, value in os.environ.items() if not SECRET_VARIABLE.search(name)}
+        # Imported agents construct boto3 clients; keep them from probing the instance metadata service and from
+        # reading the server's shared credentials and config files
+        self._environment['AWS_EC2_METADATA_DISABLED'] = 'true'
+        self._environment['AWS_SHARED_CREDENTIALS_FILE'] = os.devnull
+        self._environment['AWS_CONFIG_FILE'] = os.devnull
+        self._idle = []
+        self._workers = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {'passed': 0, 'failed': 0, 'error': 0, 'timeouts': 0, 'worker_errors': 0}
+
+    def _start_worker(self) -> _Worker:
+        """Start a worker and wait until it has preloaded strands."""
+        worker = _Worker(self._environment)
+        try:
+            worker.receive(self.startup_timeout)
+        except (queue.Empty, EOFError, ValueError) as e:
+            worker.kill()
+            raise ValidationError(f"Validation worker did not start: {str(e) or 'timed out'}")
+        logger.info(f"Started validation worker {worker.process.pid}")
+        return worker
+
+    def prewarm(self):
+        """Start every worker now so the first generations do not wait for strands to be imported."""
+        workers = []
+        try:
+            while True:
+                with self._condition:
+                    if self._closed or self._workers >= self.size:
+                        return
+                    self._workers += 1
+                try:
+                    workers.append(self._start_worker())
+                except Exception:
+                    with self._condition:
+                        self._workers -= 1
+                    raise
+        finally:
+            for worker in workers:
+                self._release(worker)
+
+    def _acquire(self) -> _Worker:
+        with self._condition:
+            while not self._idle and self._workers >= self.size and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                raise ValidationError("Validation pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            self._workers += 1
+        try:
+            return self._start_worker()
+        except Exception:
+            self._discard(None)
+            raise
+
+    def _release(self, worker: _Worker):
+        if worker.validations >= self.max_validations or worker.process.poll() is not None:
+            worker.kill()
+            self._discard(worker)
+            return
+        with self._condition:
+            if self._closed:
+                worker.kill()
+                return
+            self._idle.append(worker)
+            self._condition.notify()
+
+    def _discard(self, worker: _Worker):
+        with self._condition:
+            self._workers -= 1
+            self._condition.notify()
+
+    def validate(self, source: str, filename: str) -> dict:
+        """
+        Check an agent module in a worker.
+
+        Args:
+            source (str): The agent module's source
+            filename (str): Shown in error messages
+
+        Returns:
+            dict: 'status' ('passed', 'failed' or 'error' when the check itself could not run), 'errors' as a
+                list of messages for a fix-up, the per-check 'checks' results and the 'seconds' it took
+        """
+        started = time.monotonic()
+        checks = None
+        try:
+            worker = self._acquire()
+        except ValidationError as e:
+            return self._report('error', [str(e)], checks, started)
+        try:
+            worker.send({'source': source, 'filename': filename, 'import': self.smoke_import})
+            checks = worker.receive(self.timeout)
+            worker.validations += 1
+        except queue.Empty:
+            # The agent code hangs (or takes too long) when imported; the worker cannot be reused
+            logger.warning(f"Validation of {filename} timed out after {self.timeout}s, replacing worker {worker.process.pid}")
+            worker.kill()
+            self._discard(worker)
+            with self._condition:
+                self._stats['timeouts'] += 1
+            return self._report('failed', [f"Importing the module did not finish within {self.timeout} seconds"],
+                                {'import': {'ok': False, 'error': 'timed out', 'seconds': self.timeout}}, started)
+        except (EOFError, OSError, ValueError) as e:
+            # The worker died, e.g. because the agent code exited the process while it was imported
+            logger.error(f"Validation worker {worker.process.pid} failed on {filename}: {str(e)}")
+            worker.kill()
+            self._discard(worker)
+            with self._condition:
+                self._stats['worker_errors'] += 1
+            return self._report('failed', [f"Importing the module ended the process: {str(e)}"], checks, started)
+        self._release(worker)
+
+        if 'error' in checks:
+            return self._report('error', [checks['error']], None, started)
+        errors = []
+        if not checks['compile']['ok']:
+            errors.append(f"Does not compile: {checks['compile']['error']}")
+        if checks['lint'] is not None:
+            errors += [f"Lint: {error}" for error in checks['lint']['errors']]
+        if checks['import'] is not None and not checks['import']['ok']:
+            errors.append(f"Import failed: {checks['import']['error']}")
+        return self._report('failed' if errors else 'passed', errors, checks, started)
+
+    def _report(self, status: str, errors: list, checks: dict, started: float) -> dict:
+        with self._condition:
+            if status in self._stats:
+                self._stats[status] += 1
+        return {'status': status, 'errors': errors, 'checks': checks, 'seconds': round(time.monotonic() - started, 3)}
+
+    def stats(self) -> dict:
+        """Return the number of workers and validation outcomes since startup."""
+        with self._condition:
+            return {'workers': self._workers, 'idle': len(self._idle), **self._stats}
+
+    def close(self):
+        """Stop the idle workers; busy ones are stopped when their check finishes."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for worker in idle:
+            worker.kill()
+
+
+if __name__ == '__main__' and '--worker' in sys.argv:
+    worker_main()
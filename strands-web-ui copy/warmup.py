@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("strands_warmup")
+
+
+class WarmUp:
+    """Runs slow startup steps on a background thread so the web server can accept connections right away."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self, steps: list, retry_delay: float = 5.0, max_retry_delay: float = 60.0):
+        """
+        Initialize the warm-up.
+
+        Args:
+            steps (list): (name, callable) pairs run in order; a step that raises is retried with backoff
+            retry_delay (float): Seconds before the first retry of a failed step
+            max_retry_delay (float): Upper bound for the doubling retry delay
+        """
+        self.steps = steps
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.status = WarmUp.PENDING
+        self.started_at = None
+        self.ready_at = None
+        self.attempts = 0
+        self.last_error = None
+        self.step_seconds = {}
+        self._current_step = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._created_monotonic = time.monotonic()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        """True once every step has completed."""
+        return self._ready.is_set()
+
+    def start(self):
+        """Start warming up on a background thread."""
+        self.started_at = datetime.now()
+        self._thread = threading.Thread(target=self._run, name="strands-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for name, step in self.steps:
+            delay = self.retry_delay
+            while not self._stopped.is_set():
+                self.status = WarmUp.RUNNING
+                self._current_step = name
+                self.attempts += 1
+                started = time.monotonic()
+                try:
+                    step()
+                    self.step_seconds[name] = round(time.monotonic() - started, 3)
+                    logger.info(f"Warm-up step '{name}' finished in {self.step_seconds[name]:.2f}s")
+                    break
+                except Exception as e:
+                    self.status = WarmUp.FAILED
+                    self.last_error = f"{name}: {str(e)}"
+                    logger.error(f"Warm-up step '{name}' failed, retrying in {delay:.0f}s: {str(e)}")
+                    self._stopped.wait(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+            if self._stopped.is_set():
+                return
+
+        self._current_step = None
+        self.status = WarmUp.READY
+        self.ready_at = datetime.now()
+        self._ready.set()
+        logger.info(f"Warm-up complete {time.monotonic() - self._created_monotonic:.2f}s after startup")
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Block until warm-up has completed.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if warm-up completed in time
+        """
+        return self._ready.wait(timeout)
+
+    def stop(self):
+        """Abandon warm-up, e.g. during shutdown."""
+        self._stopped.set()
+
+    def to_dict(self) -> dict:
+        """Return a JSON-serializable view of the warm-up state."""
+        return {
+            'status': self.status,
+            'step': self._current_step,
+            'completed_steps': self.step_seconds,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'ready_at': self.ready_at.isoformat() if self.ready_at else None
+        }